@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 
 try:
-    from pyEdgeEval._lib.correspond_pixels import correspond_pixels
+    from pyEdgeEval._lib.correspond_pixels import (
+        correspond_pixels,
+        correspond_pixels_multi,
+        correspond_pixels_sweep,
+    )
 except ImportError:
     raise ImportError("`correspond_pixels` hasn't been compiled yet")
 
@@ -10,4 +14,9 @@ try:
 except ImportError:
     raise ImportError("`nms` hasn't been compiled yet")
 
-__all__ = ["correspond_pixels", "nms"]
+__all__ = [
+    "correspond_pixels",
+    "correspond_pixels_multi",
+    "correspond_pixels_sweep",
+    "nms",
+]
@@ -1,66 +1,262 @@
 import math
 import numpy as np
 
+from libc.stdint cimport uint64_t
 
-cdef extern from "Matrix.hh":
-    cppclass Matrix:
-        Matrix () except +
-        Matrix (int rows, int cols) except +
-        Matrix (int rows, int cols, double* data) except +
-        double* data ()
 
 cdef extern from "match.hh":
-    double matchEdgeMaps(const Matrix& bmap1, const Matrix& bmap2,
+    double matchEdgeMaps(const unsigned char* bmap1, const unsigned char* bmap2,
+                         const int height, const int width,
                          double maxDist, double outlierCost,
-                         Matrix& match1, Matrix& match2)
+                         double* match1, double* match2, uint64_t seed) nogil
+    double matchEdgeMapsCount(const unsigned char* bmap1, const unsigned char* bmap2,
+                              const int height, const int width,
+                              double maxDist, double outlierCost,
+                              int* count1, int* count2, unsigned char* acc1,
+                              uint64_t seed) nogil
+    void matchEdgeMapsSweep(const double* pred, const unsigned char* gt,
+                            const int height, const int width,
+                            const double* thresholds, const int nthresh,
+                            double maxDist, double outlierCost,
+                            int* count1, int* count2, uint64_t seed) nogil
+    void matchEdgeMapsMulti(const unsigned char* bmap1, const unsigned char* gts, const int ngts,
+                            const int height, const int width,
+                            double maxDist, double outlierCost,
+                            int* count2, unsigned char* acc1, uint64_t seed) nogil
 
 
-cdef _correspond_pixels(double[::1,:] img0, double[::1,:] img1, double max_dist, double outlier_cost,
-                        double[::1,:] out0, double[::1,:] out1):
+cdef _correspond_pixels(const unsigned char[:,::1] img0, const unsigned char[:,::1] img1, double max_dist, double outlier_cost,
+                        double[:,::1] out0, double[:,::1] out1, uint64_t seed):
     cdef int rows = img0.shape[0]
     cdef int cols = img0.shape[1]
     cdef double idiag = math.sqrt(rows * rows + cols * cols)
     cdef double oc = outlier_cost * max_dist * idiag
 
-    # Copy data to Matrix types; construct matrices, get views of their contents and copy
-    # over
-    # Constructing a Matrix from a double* acquired from views of img0 and img1 don't
-    # work well at all...
-    cdef Matrix i0 = Matrix(rows, cols)
-    cdef Matrix i1 = Matrix(rows, cols)
-    cdef double[::1,:] i0_view = <double[:img0.shape[0]:1,:img0.shape[1]]>i0.data()
-    cdef double[::1,:] i1_view = <double[:img1.shape[0]:1,:img1.shape[1]]>i1.data()
-    i0_view[:,:] = img0[:,:]
-    i1_view[:,:] = img1[:,:]
-
-    # Output matrices
-    cdef Matrix m0, m1
-
-    # Perform the match
-    cdef double cost = matchEdgeMaps(i0, i1, max_dist * idiag, oc, m0, m1)
-
-    # Get views of the output matrices and copy to our output arrays
-    cdef double[::1,:] o0_view = <double[:out0.shape[0]:1,:out0.shape[1]]>m0.data()
-    cdef double[::1,:] o1_view = <double[:out1.shape[0]:1,:out1.shape[1]]>m1.data()
-    out0[:,:] = o0_view[:,:]
-    out1[:,:] = o1_view[:,:]
+    if rows == 0 or cols == 0:
+        return 0.0, oc
+
+    # Perform the match directly on the input and output buffers
+    # (the GIL is released so that multiple threads can match in parallel)
+    cdef double cost
+    cdef double md = max_dist * idiag
+    with nogil:
+        cost = matchEdgeMaps(&img0[0, 0], &img1[0, 0], rows, cols, md, oc,
+                             &out0[0, 0], &out1[0, 0], seed)
 
     return cost, oc
 
 
-def correspond_pixels(img0, img1, max_dist=0.0075, outlier_cost=100.0):
+cdef _correspond_pixels_count(const unsigned char[:,::1] img0, const unsigned char[:,::1] img1,
+                              double max_dist, double outlier_cost, unsigned char[:,::1] acc0,
+                              uint64_t seed):
+    cdef int rows = img0.shape[0]
+    cdef int cols = img0.shape[1]
+    cdef double idiag = math.sqrt(rows * rows + cols * cols)
+    cdef double oc = outlier_cost * max_dist * idiag
+
+    if rows == 0 or cols == 0:
+        return 0, 0, 0.0, oc
+
+    # Only count the matched pixels (no match maps are materialised)
+    cdef double cost
+    cdef double md = max_dist * idiag
+    cdef int count0 = 0
+    cdef int count1 = 0
+    cdef unsigned char* acc = NULL
+    if acc0 is not None:
+        acc = &acc0[0, 0]
+    with nogil:
+        cost = matchEdgeMapsCount(&img0[0, 0], &img1[0, 0], rows, cols, md, oc,
+                                  &count0, &count1, acc, seed)
+
+    return count0, count1, cost, oc
+
+
+def _as_binary_map(img):
+    """View (or convert) an edge map as a C-contiguous uint8 array"""
+    if img.dtype == np.bool_ or img.dtype == np.uint8:
+        # zero-copy when the input is already C-contiguous
+        return np.ascontiguousarray(img).view(np.uint8)
+    return np.ascontiguousarray(img != 0).view(np.uint8)
+
+
+def _native_seed(seed):
+    """Convert `seed` to the native seed (0 uses the global random stream)"""
+    if seed is None:
+        return 0
+    seed = int(seed)
+    if seed < 0 or seed >= 2 ** 48:
+        raise ValueError('seed must be None or in [0, 2**48) (it is {})'.format(seed))
+    return seed + 1
+
+
+def _check_output(out, shape, name):
+    if out is None:
+        return np.zeros(shape, dtype=np.float64)
+    if out.shape != shape or out.dtype != np.float64 or not out.flags.c_contiguous:
+        raise ValueError('{} must be a C-contiguous float64 array of shape {}'.format(name, shape))
+    return out
+
+
+def correspond_pixels(img0, img1, max_dist=0.0075, outlier_cost=100.0, out0=None, out1=None,
+                      return_maps=True, acc0=None, seed=0):
+    """Match the pixels of two edge maps
+
+    `img0` and `img1` are (H,W) edge maps; `bool` and `uint8` C-contiguous
+    arrays are passed to the native code without copying. The match maps
+    are written to `out0` and `out1` (C-contiguous float64 arrays which can
+    be reused between calls) when they are given.
+
+    With `return_maps=False`, only the number of matched pixels is returned
+    (the match maps are not materialised). The matched pixels of `img0` can
+    be OR-ed into `acc0`, a C-contiguous bool (or uint8) array that is
+    updated in place (e.g. to accumulate the matches against multiple GTs).
+
+    The outlier connections of the assignment problem are sampled randomly.
+    The sampling is seeded with `seed` for every call, so identical inputs
+    give identical results (also across threads and processes). With
+    `seed=None`, the global (clock-seeded) random stream is used instead.
+
+    Returns:
+        tuple `(match0, match1, cost, oc)` where the match maps hold the
+        1-based column-major index of the matched pixel (0 if unmatched),
+        or `(count0, count1, cost, oc)` when `return_maps=False`
+    """
     if img0.shape != img1.shape:
         raise ValueError('img0.shape ({}) and img1.shape({}) do not match'.format(img0.shape, img1.shape))
     if max_dist <= 0.0:
-        raise ValueError('max_dist must be >= 0 (it is {})'.format(max_dist))
+        raise ValueError('max_dist must be > 0 (it is {})'.format(max_dist))
     if outlier_cost <= 1:
-        raise ValueError('outlier_cost must be > 1 (it is {})'.format(max_dist))
+        raise ValueError('outlier_cost must be > 1 (it is {})'.format(outlier_cost))
 
-    i0 = img0.astype('float64').copy(order='F')
-    i1 = img1.astype('float64').copy(order='F')
-    o0 = np.zeros_like(i0, order='F')
-    o1 = np.zeros_like(i1, order='F')
+    i0 = _as_binary_map(img0)
+    i1 = _as_binary_map(img1)
     max_dist = float(max_dist)
     outlier_cost = float(outlier_cost)
-    cost, oc = _correspond_pixels(i0, i1, max_dist, outlier_cost, o0, o1)
+    _seed = _native_seed(seed)
+
+    if not return_maps:
+        acc = None
+        if acc0 is not None:
+            if (acc0.shape != i0.shape or acc0.dtype not in (np.bool_, np.uint8)
+                    or not acc0.flags.c_contiguous):
+                raise ValueError('acc0 must be a C-contiguous bool array of shape {}'.format(i0.shape))
+            acc = acc0.view(np.uint8)
+        return _correspond_pixels_count(i0, i1, max_dist, outlier_cost, acc, _seed)
+    if acc0 is not None:
+        raise ValueError('acc0 is only supported with return_maps=False')
+
+    o0 = _check_output(out0, i0.shape, 'out0')
+    o1 = _check_output(out1, i1.shape, 'out1')
+    cost, oc = _correspond_pixels(i0, i1, max_dist, outlier_cost, o0, o1, _seed)
     return o0, o1, cost, oc
+
+cdef _correspond_pixels_sweep(double[:,::1] pred, unsigned char[:,::1] gt, double[::1] thresholds,
+                              double max_dist, double outlier_cost,
+                              int[::1] count0, int[::1] count1, uint64_t seed):
+    cdef int rows = pred.shape[0]
+    cdef int cols = pred.shape[1]
+    cdef double idiag = math.sqrt(rows * rows + cols * cols)
+    cdef double oc = outlier_cost * max_dist * idiag
+
+    if thresholds.shape[0] == 0:
+        return oc
+
+    # Perform the match for all thresholds; the neighbourhood structure is
+    # shared between the thresholds
+    cdef int nthresh = thresholds.shape[0]
+    cdef double md = max_dist * idiag
+    with nogil:
+        matchEdgeMapsSweep(&pred[0, 0], &gt[0, 0], rows, cols,
+                           &thresholds[0], nthresh,
+                           md, oc, &count0[0], &count1[0], seed)
+
+    return oc
+
+
+def correspond_pixels_sweep(pred, gt, thresholds, max_dist=0.0075, outlier_cost=100.0, seed=0):
+    """Match a prediction against a GT for a range of thresholds
+
+    Equivalent to calling `correspond_pixels(pred >= t, gt)` for each
+    threshold `t` and counting the matched pixels, but the candidate pixels
+    and edges are computed once and reused across the thresholds. With the
+    same `seed`, the counts are identical to those of `correspond_pixels`.
+
+    Returns:
+        tuple `(count0, count1)` of int arrays with the number of matched
+        pixels in the thresholded prediction and the GT for each threshold
+    """
+    if pred.shape != gt.shape:
+        raise ValueError('pred.shape ({}) and gt.shape({}) do not match'.format(pred.shape, gt.shape))
+    if max_dist <= 0.0:
+        raise ValueError('max_dist must be > 0 (it is {})'.format(max_dist))
+    if outlier_cost <= 1:
+        raise ValueError('outlier_cost must be > 1 (it is {})'.format(outlier_cost))
+
+    p = np.ascontiguousarray(pred, dtype='float64')
+    g = np.ascontiguousarray(gt != 0, dtype='uint8')
+    t = np.ascontiguousarray(thresholds, dtype='float64').ravel()
+    c0 = np.zeros(t.shape, dtype=np.intc)
+    c1 = np.zeros(t.shape, dtype=np.intc)
+    max_dist = float(max_dist)
+    outlier_cost = float(outlier_cost)
+    _correspond_pixels_sweep(p, g, t, max_dist, outlier_cost, c0, c1, _native_seed(seed))
+    return c0, c1
+
+
+cdef _correspond_pixels_multi(const unsigned char[:,::1] img0, const unsigned char[:,:,::1] gts,
+                              double max_dist, double outlier_cost,
+                              int[::1] count1, unsigned char[:,::1] acc0, uint64_t seed):
+    cdef int rows = img0.shape[0]
+    cdef int cols = img0.shape[1]
+    cdef double idiag = math.sqrt(rows * rows + cols * cols)
+    cdef double oc = outlier_cost * max_dist * idiag
+
+    if rows == 0 or cols == 0 or gts.shape[0] == 0:
+        return oc
+
+    # Match against all the GTs; the prediction-side structures are shared
+    cdef int ngts = gts.shape[0]
+    cdef double md = max_dist * idiag
+    with nogil:
+        matchEdgeMapsMulti(&img0[0, 0], &gts[0, 0, 0], ngts, rows, cols,
+                           md, oc, &count1[0], &acc0[0, 0], seed)
+
+    return oc
+
+
+def correspond_pixels_multi(img0, gts, max_dist=0.0075, outlier_cost=100.0, seed=0):
+    """Match the pixels of an edge map against multiple GTs
+
+    Equivalent to calling `correspond_pixels(img0, gt, return_maps=False,
+    acc0=acc)` for each GT, but the prediction-side structures are built
+    once and shared by the GTs. `gts` is a (N,H,W) array (a C-contiguous
+    `bool` or `uint8` stack is passed without copying) or a list of (H,W)
+    edge maps. With the same `seed`, the results are identical to those of
+    `correspond_pixels`.
+
+    Returns:
+        tuple `(count1, acc0)` with the number of matched GT pixels summed
+        over the GTs and a bool map of the pixels of `img0` that are matched
+        to at least one GT
+    """
+    if max_dist <= 0.0:
+        raise ValueError('max_dist must be > 0 (it is {})'.format(max_dist))
+    if outlier_cost <= 1:
+        raise ValueError('outlier_cost must be > 1 (it is {})'.format(outlier_cost))
+
+    i0 = _as_binary_map(img0)
+    if isinstance(gts, np.ndarray):
+        g = _as_binary_map(gts)
+    elif len(gts) > 0:
+        g = np.stack([_as_binary_map(gt) for gt in gts])
+    else:
+        g = np.zeros((0,) + i0.shape, dtype=np.uint8)
+    if g.ndim != 3 or g.shape[1:] != i0.shape:
+        raise ValueError('gts.shape ({}) and img0.shape ({}) do not match'.format(g.shape, i0.shape))
+
+    c1 = np.zeros(g.shape[0], dtype=np.intc)
+    acc = np.zeros(i0.shape, dtype=np.bool_)
+    _correspond_pixels_multi(i0, g, float(max_dist), float(outlier_cost), c1,
+                             acc.view(np.uint8), _native_seed(seed))
+    return int(c1.sum()), acc
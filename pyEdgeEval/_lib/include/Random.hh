@@ -34,6 +34,9 @@
 
 // If seed==0, then the seed is generated from the system clock.
 
+// NOTE: Random::rand is thread-local so that the matching code can run in
+// multiple threads (with the GIL released) without sharing the stream.
+
 typedef uint16_t u_int16_t;
 typedef uint32_t u_int32_t;
 typedef uint64_t u_int64_t;
@@ -42,7 +45,7 @@ class Random
 {
 public:
 
-    static Random rand;
+    static thread_local Random rand;
 
     // These are defined in <limits.h> as the limits of int, but
     // here we need the limits of int32_t.
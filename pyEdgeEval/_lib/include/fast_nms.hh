@@ -0,0 +1,29 @@
+#ifndef __fast_nms_hh__
+#define __fast_nms_hh__
+
+// Edge NMS (same pipeline as `pyEdgeEval.preprocess.fast_nms`).
+//
+// `img` is a row-major (height x width) edge map in [0, 1] and `out` is a
+// row-major (height x width) buffer for the suppressed edges.
+// The edges are smoothed with a triangle filter (radius 1), the orientations
+// are computed from the second derivatives of the edges smoothed again
+// (radius 4), and the edges are suppressed as in `benms`:
+//   r: radius for nms supr
+//   s: radius for supr boundaries
+//   m: multiplier for conservative supr
+void fastNms(const double* img, double* out, const int height,
+             const int width, const int r, const int s, const double m);
+void fastNms(const float* img, double* out, const int height,
+             const int width, const int r, const int s, const double m);
+
+// Same as `fastNms` for `num` maps stored one after the other in `imgs` and
+// `out` (the temporaries are allocated once for all the maps).
+// `out` can be the same buffer as `imgs` when `imgs` is double.
+void fastNmsBatch(const double* imgs, double* out, const int num,
+                  const int height, const int width, const int r,
+                  const int s, const double m);
+void fastNmsBatch(const float* imgs, double* out, const int num,
+                  const int height, const int width, const int r,
+                  const int s, const double m);
+
+#endif // __fast_nms_hh__
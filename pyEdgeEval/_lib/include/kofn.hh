@@ -2,6 +2,11 @@
 #ifndef __kofn_hh__
 #define __kofn_hh__
 
+class Random;
+
 void kOfN (int k, int n, int* values);
 
+// Same as above, using the given random stream.
+void kOfN (int k, int n, int* values, Random& rng);
+
 #endif // __kofn_hh__
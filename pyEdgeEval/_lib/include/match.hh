@@ -2,6 +2,8 @@
 #ifndef __match_hh__
 #define __match_hh__
 
+#include <stdint.h>
+
 class Matrix;
 
 // returns the cost of the assignment
@@ -10,4 +12,52 @@ double matchEdgeMaps (
     double maxDist, double outlierCost,
     Matrix& match1, Matrix& match2);
 
+// Same as above, without Matrix.  The binary maps and the match arrays
+// are C-contiguous (row-major) arrays of size height x width that are
+// owned by the caller.  The match arrays hold 1-based column-major
+// (MATLAB) indices of the matched pixels, or 0.
+// The outlier connections are sampled from a random stream seeded with
+// seed, so the result only depends on the inputs.  If seed is 0, the
+// global random stream (Random::rand) is used instead.
+double matchEdgeMaps (
+    const unsigned char* bmap1, const unsigned char* bmap2,
+    const int height, const int width,
+    double maxDist, double outlierCost,
+    double* match1, double* match2, uint64_t seed);
+
+// Same as above, but only count the matched pixels of each map.  If acc1
+// is not NULL, the matched pixels of bmap1 are set to 1 in acc1 (a
+// row-major array of size height x width).
+double matchEdgeMapsCount (
+    const unsigned char* bmap1, const unsigned char* bmap2,
+    const int height, const int width,
+    double maxDist, double outlierCost,
+    int* count1, int* count2, unsigned char* acc1, uint64_t seed);
+
+// Match a prediction against a GT for multiple thresholds.  The inputs
+// are C-contiguous (row-major) arrays of size height x width.  For each
+// threshold, the number of matched pixels in the thresholded prediction
+// (count1) and the GT (count2) are written to the output arrays.  With a
+// non-zero seed, the counts of each threshold are the same as those of a
+// matchEdgeMaps call with the same seed.
+void matchEdgeMapsSweep (
+    const double* pred, const unsigned char* gt,
+    const int height, const int width,
+    const double* thresholds, const int nthresh,
+    double maxDist, double outlierCost,
+    int* count1, int* count2, uint64_t seed);
+
+// Match a binary map against multiple GTs (ngts C-contiguous row-major
+// arrays of size height x width, stored one after the other).  The
+// prediction-side structures are built once and shared by the GTs.  The
+// number of matched pixels of each GT is written to count2, and the
+// pixels of bmap1 matched to any GT are set to 1 in acc1 (if not NULL).
+// With a non-zero seed, the results are the same as those of a
+// matchEdgeMapsCount call with the same seed for each GT.
+void matchEdgeMapsMulti (
+    const unsigned char* bmap1, const unsigned char* gts, const int ngts,
+    const int height, const int width,
+    double maxDist, double outlierCost,
+    int* count2, unsigned char* acc1, uint64_t seed);
+
 #endif // __match_hh__
@@ -0,0 +1,13 @@
+#ifndef __thin_hh__
+#define __thin_hh__
+
+// Binary thinning (same LUT-based algorithm as `pyEdgeEval.preprocess.binary_thin`).
+//
+// `img` is a row-major (height x width) buffer that is thinned in place;
+// non-zero pixels are foreground and the output is 0/1.
+// `maxIter` is the maximum number of iterations (negative for no limit).
+// Returns the number of iterations.
+int thinBinary(unsigned char* img, const int height, const int width,
+               const int maxIter);
+
+#endif // __thin_hh__
@@ -1,3 +1,4 @@
+cimport cython
 import numpy as np
 
 
@@ -10,7 +11,19 @@ cdef extern from "Matrix.hh":
 
 cdef extern from "benms.hh":
     void benms(Matrix& out, const Matrix& edge, const Matrix& ori,
-               int r, int s, float m)
+               int r, int s, float m) nogil
+
+cdef extern from "fast_nms.hh":
+    void fastNms(const double* img, double* out, const int height,
+                 const int width, const int r, const int s, const double m) nogil
+    void fastNms(const float* img, double* out, const int height,
+                 const int width, const int r, const int s, const double m) nogil
+    void fastNmsBatch(const double* imgs, double* out, const int num,
+                      const int height, const int width, const int r,
+                      const int s, const double m) nogil
+    void fastNmsBatch(const float* imgs, double* out, const int num,
+                      const int height, const int width, const int r,
+                      const int s, const double m) nogil
 
 
 cdef _nms(double[::1,:] out, double[::1,:] edge, double[::1,:] ori, int r, int s, float m):
@@ -30,7 +43,9 @@ cdef _nms(double[::1,:] out, double[::1,:] edge, double[::1,:] ori, int r, int s
     # define output
     cdef Matrix mout
 
-    benms(mout, medge, mori, r, s, m)
+    # release the GIL so that multiple threads can run nms in parallel
+    with nogil:
+        benms(mout, medge, mori, r, s, m)
 
     cdef double[::1,:] mout_view = <double[:out.shape[0]:1,:out.shape[1]]>mout.data()
     out[:,:] = mout_view[:,:]
@@ -51,3 +66,91 @@ def nms(edge, ori, r=1, s=5, m=1.01):
     _nms(_out, _edge, _ori, _r, _s, _m)
 
     return _out
+
+
+def _fast_nms(const cython.floating[:,::1] img, double[:,::1] out, int r, int s, float m):
+    cdef int rows = img.shape[0]
+    cdef int cols = img.shape[1]
+
+    if rows == 0 or cols == 0:
+        return
+
+    # release the GIL so that multiple threads can run nms in parallel
+    with nogil:
+        fastNms(&img[0, 0], &out[0, 0], rows, cols, r, s, m)
+
+
+def fast_nms(img, r=1, s=5, m=1.01):
+    """Fused NMS (same pipeline as `pyEdgeEval.preprocess.fast_nms`)
+
+    Smoothing, gradients, orientations and suppression are computed in a
+    single native call on the float32 or float64 buffer of `img`.
+
+    Args:
+        img: edge map (float32 or float64, normalized between 0~1)
+        r: radius for nms supr
+        s: radius for supr boundaries
+        m: multiplier for conservative supr
+
+    Returns:
+        suppressed edge (float64)
+    """
+    if img.ndim != 2:
+        raise ValueError('img should have 2 dimensions, not {}'.format(img.ndim))
+    if img.dtype != np.float64 and img.dtype != np.float32:
+        raise ValueError('img.dtype should be float64 or float32, not {}'.format(img.dtype))
+
+    _img = np.ascontiguousarray(img)
+    _out = np.zeros(img.shape, dtype=np.float64)
+
+    _fast_nms(_img, _out, int(r), int(s), float(m))
+
+    return _out
+
+
+def _fast_nms_batch(const cython.floating[:,:,::1] imgs, double[:,:,::1] out, int r, int s, float m):
+    cdef int num = imgs.shape[0]
+    cdef int rows = imgs.shape[1]
+    cdef int cols = imgs.shape[2]
+
+    if num == 0 or rows == 0 or cols == 0:
+        return
+
+    # release the GIL so that multiple threads can run nms in parallel
+    with nogil:
+        fastNmsBatch(&imgs[0, 0, 0], &out[0, 0, 0], num, rows, cols, r, s, m)
+
+
+def fast_nms_batch(imgs, r=1, s=5, m=1.01, out=None):
+    """Fused NMS for a stack of edge maps (e.g. the classes of a prediction)
+
+    Same as `fast_nms` for each map, but all the maps are processed in a
+    single native call that reuses the temporaries.
+
+    Args:
+        imgs: `(C, H, W)` edge maps (float32 or float64, normalized between 0~1)
+        r: radius for nms supr
+        s: radius for supr boundaries
+        m: multiplier for conservative supr
+        out: C-contiguous float64 array of the same shape for the output
+            (can be `imgs` itself to suppress in place)
+
+    Returns:
+        suppressed edges (float64)
+    """
+    if imgs.ndim != 3:
+        raise ValueError('imgs should have 3 dimensions, not {}'.format(imgs.ndim))
+    if imgs.dtype != np.float64 and imgs.dtype != np.float32:
+        raise ValueError('imgs.dtype should be float64 or float32, not {}'.format(imgs.dtype))
+
+    if out is None:
+        out = np.zeros(imgs.shape, dtype=np.float64)
+    elif out.shape != imgs.shape or out.dtype != np.float64 or not out.flags.c_contiguous:
+        raise ValueError('out should be a C-contiguous float64 array of shape {}'.format(imgs.shape))
+    if np.shares_memory(imgs, out) and imgs is not out:
+        # only the whole buffer can be reused
+        raise ValueError('out should be imgs itself or not overlap with it')
+
+    _fast_nms_batch(np.ascontiguousarray(imgs), out, int(r), int(s), float(m))
+
+    return out
@@ -25,7 +25,7 @@
 // Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA
 // 02111-1307, USA, or see http://www.gnu.org/copyleft/gpl.html.
 
-Random Random::rand;
+thread_local Random Random::rand;
 
 Random::Random ()
 {
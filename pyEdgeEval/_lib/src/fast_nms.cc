@@ -0,0 +1,299 @@
+#include <cmath>
+#include <vector>
+#include "fast_nms.hh"
+
+// Fused version of `pyEdgeEval.preprocess.fast_nms`:
+//   edge = convTri(img, 1)
+//   ox, oy = gradient2(convTri(edge, 4))
+//   oxx = d(ox)/dx, oxy = d(oy)/dx, oyy = d(oy)/dy
+//   ori = mod(atan(oyy * sign(-oxy) / oxx), pi)
+//   out = benms(edge, ori, r, s, m)
+//
+// The triangle filters are separable (rows, then columns) with symmetric
+// padding, the gradients are the same finite differences as `np.gradient`, and
+// the orientations are only computed for the non-zero edges. The suppression
+// is the same as `src/benms.cc`.
+//
+// NOTE: the filters add the products of the taps in the same order as
+// `scipy.signal.convolve2d` (used by `conv_tri` originally) and in the
+// precision of the image, so that the results are bit-identical: the taps
+// are taken from the last one to the first one, and along the rows they are
+// added to the sum in groups of four (`sum += ((p0 + p1) + p2) + p3`, the
+// remaining taps one by one). Rounding differences flip the suppression of
+// near ties, and running sums would leave rounding residues in flat regions
+// where the second derivatives should be exactly zero.
+
+// index of the padded signal (`np.pad(..., mode="symmetric")`)
+static inline int reflect(int i, const int n)
+{
+  const int period = 2 * n;
+  i %= period;
+  if (i < 0) { i += period; }
+  return i < n ? i : period - 1 - i;
+}
+
+// weights of the triangle filter (1, 2, ..., r + 1, ..., 2, 1) / (r + 1)^2
+// in the precision of the image
+template <class T>
+static void triWeights(const int r, std::vector<T>& f)
+{
+  f.resize(2 * r + 1);
+  for (int k = -r; k <= r; k++) {
+    f[k + r] = T(double(r + 1 - (k < 0 ? -k : k)) / ((r + 1) * (r + 1)));
+  }
+}
+
+// triangle filter along the rows (row-major, height x width)
+template <class T>
+static void convTriRows(const T* src, T* dst, const int height,
+                        const int width, const int r, std::vector<T>& f,
+                        std::vector<T>& pad)
+{
+  triWeights(r, f);
+  const int n = 2 * r + 1;
+  const int n4 = n - n % 4;
+  pad.resize(width + 2 * r);
+  for (int y = 0; y < height; y++) {
+    const T* row = src + (long)y * width;
+    T* out = dst + (long)y * width;
+    for (int i = 0; i < width + 2 * r; i++) {
+      pad[i] = row[reflect(i - r, width)];
+    }
+    for (int x = 0; x < width; x++) {
+      // taps from the last one (`pad[x + 2r]`) to the first one
+      const T* p = &pad[x + 2 * r];
+      T acc = 0;
+      int k = 0;
+      for (; k < n4; k += 4) {
+        acc += ((p[-k] * f[k] + p[-k - 1] * f[k + 1]) +
+                p[-k - 2] * f[k + 2]) + p[-k - 3] * f[k + 3];
+      }
+      for (; k < n; k++) { acc += p[-k] * f[k]; }
+      out[x] = acc;
+    }
+  }
+}
+
+// triangle filter along the columns (row-major, height x width)
+template <class T>
+static void convTriCols(const T* src, T* dst, const int height,
+                        const int width, const int r, std::vector<T>& f)
+{
+  triWeights(r, f);
+  for (int y = 0; y < height; y++) {
+    T* out = dst + (long)y * width;
+    for (int x = 0; x < width; x++) { out[x] = 0; }
+    // taps from the last one (row `y + r`) to the first one
+    for (int k = 0; k <= 2 * r; k++) {
+      const T* row = src + (long)reflect(y + r - k, height) * width;
+      for (int x = 0; x < width; x++) { out[x] += row[x] * f[k]; }
+    }
+  }
+}
+
+// d(src)/dx (same as `np.gradient`)
+template <class T>
+static void gradX(const T* src, T* dst, const int height, const int width)
+{
+  for (int y = 0; y < height; y++) {
+    const T* row = src + (long)y * width;
+    T* out = dst + (long)y * width;
+    if (width < 2) {
+      for (int x = 0; x < width; x++) { out[x] = 0; }
+      continue;
+    }
+    out[0] = row[1] - row[0];
+    for (int x = 1; x < width - 1; x++) {
+      out[x] = (row[x + 1] - row[x - 1]) / T(2);
+    }
+    out[width - 1] = row[width - 1] - row[width - 2];
+  }
+}
+
+// d(src)/dy (same as `np.gradient`)
+template <class T>
+static void gradY(const T* src, T* dst, const int height, const int width)
+{
+  for (int y = 0; y < height; y++) {
+    T* out = dst + (long)y * width;
+    if (height < 2) {
+      for (int x = 0; x < width; x++) { out[x] = 0; }
+      continue;
+    }
+    const int y0 = y > 0 ? y - 1 : 0;
+    const int y1 = y < height - 1 ? y + 1 : height - 1;
+    const T* up = src + (long)y0 * width;
+    const T* down = src + (long)y1 * width;
+    if (y1 - y0 == 2) {
+      for (int x = 0; x < width; x++) { out[x] = (down[x] - up[x]) / T(2); }
+    } else {
+      for (int x = 0; x < width; x++) { out[x] = down[x] - up[x]; }
+    }
+  }
+}
+
+// single value of `np.gradient` along a row or column
+template <class T>
+static inline T grad1(const T* f, const int i, const int n, const long step)
+{
+  if (n < 2) { return 0; }
+  if (i == 0) { return f[step] - f[0]; }
+  if (i == n - 1) { return f[0] - f[-step]; }
+  return (f[step] - f[-step]) / T(2);
+}
+
+// edge orientation at (y, x) from the gradients of the smoothed edges
+template <class T>
+static inline double orientation(const T* ox, const T* oy, const int height,
+                                 const int width, const int y, const int x)
+{
+  const long i = (long)y * width + x;
+  T oxx = grad1(ox + i, x, width, 1);
+  const T oxy = grad1(oy + i, x, width, 1);
+  const T oyy = grad1(oy + i, y, height, width);
+  // sometimes oxx + 1e-5 = 0, and causes true divide warnings
+  if (oxx == 0) { oxx = T(1e-5); }
+  const T sgn = -oxy > 0 ? T(1) : (-oxy < 0 ? T(-1) : T(0));
+  T ori = std::atan(oyy * sgn / oxx);
+  if (ori < 0) { ori += T(M_PI); }
+  return ori;
+}
+
+template <class T>
+static inline double interp(const T* I, const int h, const int w, double x,
+                            double y)
+{
+  // return I[x,y] via bilinear interpolation
+  x = x < 0 ? 0 : (x > w - 1.001 ? w - 1.001 : x);
+  y = y < 0 ? 0 : (y > h - 1.001 ? h - 1.001 : y);
+  int x0 = int(x), y0 = int(y);
+  int x1 = x0 + 1, y1 = y0 + 1;
+  double dx0 = x - x0, dy0 = y - y0;
+  double dx1 = 1 - dx0, dy1 = 1 - dy0;
+  double out = I[(long)y0 * w + x0] * dx1 * dy1 +
+               I[(long)y0 * w + x1] * dx0 * dy1 +
+               I[(long)y1 * w + x0] * dx1 * dy0 +
+               I[(long)y1 * w + x1] * dx0 * dy0;
+  return out;
+}
+
+// temporaries of `fastNmsImpl` (shared by the maps of a batch)
+template <class T>
+struct NmsWorkspace {
+  std::vector<T> edge, tmp, ox, oy, f, buf;
+};
+
+// NOTE: `img` is only read by the first filter, so `out` can be `img` (when
+// `T` is double)
+template <class T>
+static void fastNmsImpl(const T* img, double* out, const int h, const int w,
+                        const int r, int s, const double m,
+                        NmsWorkspace<T>& ws)
+{
+  const long n = (long)h * w;
+  if (n == 0) { return; }
+  std::vector<T>& edge = ws.edge;
+  std::vector<T>& tmp = ws.tmp;
+  std::vector<T>& ox = ws.ox;
+  std::vector<T>& oy = ws.oy;
+  std::vector<T>& f = ws.f;
+  std::vector<T>& buf = ws.buf;
+  edge.resize(n);
+  tmp.resize(n);
+  ox.resize(n);
+  oy.resize(n);
+
+  // smoothed edges
+  convTriRows(img, &tmp[0], h, w, 1, f, buf);
+  convTriCols(&tmp[0], &edge[0], h, w, 1, f);
+
+  // gradients of the edges smoothed again (`oy` holds the smoothed edges
+  // until the gradients are computed)
+  convTriRows(&edge[0], &tmp[0], h, w, 4, f, buf);
+  convTriCols(&tmp[0], &oy[0], h, w, 4, f);
+  gradX(&oy[0], &ox[0], h, w);
+  gradY(&oy[0], &tmp[0], h, w);
+  oy.swap(tmp);
+
+  // suppress edges where edge is stronger in orthogonal direction
+  const T* E = &edge[0];
+  for (int y = 0; y < h; y++) {
+    for (int x = 0; x < w; x++) {
+      const long i = (long)y * w + x;
+      double e = out[i] = E[i];
+      if (e == 0) {
+        continue;
+      }
+      e *= m;
+      const double ori = orientation(&ox[0], &oy[0], h, w, y, x);
+      const double cos_o = std::cos(ori);
+      const double sin_o = std::sin(ori);
+      for (int d = -r; d <= r; ++d) {
+        if (d != 0) {
+          const double e0 = interp(E, h, w, x + d * cos_o, y + d * sin_o);
+          if (e < e0) {
+            out[i] = 0;
+            break;
+          }
+        }
+      }
+    }
+  }
+
+  // suppress noisy edge estimates near boundaries
+  s = s > w / 2 ? w / 2 : s;
+  s = s > h / 2 ? h / 2 : s;
+  for (int y = 0; y < h; y++) {
+    double* row = out + (long)y * w;
+    for (int x = 0; x < s; ++x) {
+      row[x] *= double(x) / s;
+      row[w - 1 - x] *= double(x) / s;
+    }
+  }
+  for (int y = 0; y < s; ++y) {
+    double* top = out + (long)y * w;
+    double* bottom = out + (long)(h - 1 - y) * w;
+    for (int x = 0; x < w; ++x) {
+      top[x] *= double(y) / s;
+      bottom[x] *= double(y) / s;
+    }
+  }
+}
+
+template <class T>
+static void fastNmsBatchImpl(const T* imgs, double* out, const int num,
+                             const int h, const int w, const int r,
+                             const int s, const double m)
+{
+  const long n = (long)h * w;
+  NmsWorkspace<T> ws;
+  for (int c = 0; c < num; c++) {
+    fastNmsImpl(imgs + c * n, out + c * n, h, w, r, s, m, ws);
+  }
+}
+
+void fastNms(const double* img, double* out, const int height,
+             const int width, const int r, const int s, const double m)
+{
+  fastNmsBatchImpl(img, out, 1, height, width, r, s, m);
+}
+
+void fastNms(const float* img, double* out, const int height,
+             const int width, const int r, const int s, const double m)
+{
+  fastNmsBatchImpl(img, out, 1, height, width, r, s, m);
+}
+
+void fastNmsBatch(const double* imgs, double* out, const int num,
+                  const int height, const int width, const int r,
+                  const int s, const double m)
+{
+  fastNmsBatchImpl(imgs, out, num, height, width, r, s, m);
+}
+
+void fastNmsBatch(const float* imgs, double* out, const int num,
+                  const int height, const int width, const int r,
+                  const int s, const double m)
+{
+  fastNmsBatchImpl(imgs, out, num, height, width, r, s, m);
+}
@@ -4,7 +4,7 @@
 
 // O(n) implementation.
 static void
-_kOfN_largeK (int k, int n, int* values)
+_kOfN_largeK (int k, int n, int* values, Random& rng)
 {
     assert (k > 0);
     assert (k <= n);
@@ -12,7 +12,7 @@ _kOfN_largeK (int k, int n, int* values)
     for (int i = 0; i < n; i++) {
         double prob = (double) (k - j) / (n - i);
         assert (prob <= 1);
-        double x = Random::rand.fp ();
+        double x = rng.fp ();
         if (x < prob) {
             values[j++] = i;
         }
@@ -23,12 +23,12 @@ _kOfN_largeK (int k, int n, int* values)
 // O(k*lg(k)) implementation; constant factor is about 2x the constant
 // factor for the O(n) implementation.
 static void
-_kOfN_smallK (int k, int n, int* values)
+_kOfN_smallK (int k, int n, int* values, Random& rng)
 {
     assert (k > 0);
     assert (k <= n);
     if (k == 1) {
-        values[0] = Random::rand.i32 (0, n - 1);
+        values[0] = rng.i32 (0, n - 1);
         return;
     }
     int leftN = n / 2;
@@ -36,15 +36,15 @@ _kOfN_smallK (int k, int n, int* values)
     int leftK = 0;
     int rightK = 0;
     for (int i = 0; i < k; i++) {
-        int x = Random::rand.i32 (0, n - i - 1);
+        int x = rng.i32 (0, n - i - 1);
         if (x < leftN - leftK) {
             leftK++; 
         } else {
             rightK++;
         }
     }
-    if (leftK > 0) { _kOfN_smallK (leftK, leftN, values); }
-    if (rightK > 0) { _kOfN_smallK (rightK, rightN, values + leftK); }
+    if (leftK > 0) { _kOfN_smallK (leftK, leftN, values, rng); }
+    if (rightK > 0) { _kOfN_smallK (rightK, rightN, values + leftK, rng); }
     for (int i = leftK; i < k; i++) {
         values[i] += leftN;
     }
@@ -54,6 +54,12 @@ _kOfN_smallK (int k, int n, int* values)
 // increasing sorted order.
 void
 kOfN (int k, int n, int* values)
+{
+    kOfN (k, n, values, Random::rand);
+}
+
+void
+kOfN (int k, int n, int* values, Random& rng)
 {
     assert (k >= 0);
     assert (n >= 0);
@@ -61,9 +67,9 @@ kOfN (int k, int n, int* values)
     static double log2 = log (2);
     double klogk = k * log (k) / log2;
     if (klogk < n / 2) {
-        _kOfN_smallK (k, n, values);
+        _kOfN_smallK (k, n, values, rng);
     } else {
-        _kOfN_largeK (k, n, values);
+        _kOfN_largeK (k, n, values, rng);
     }
 }
 
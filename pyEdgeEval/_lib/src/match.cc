@@ -11,12 +11,18 @@
 #include "Array.hh"
 #include "match.hh"
 #include "Timer.hh"
+#include "Random.hh"
 
 struct Edge {
     int i,j;	// node ids, 0-based
     double w;	// distance between pixels
 };
 
+struct Match {
+    int i,j;	// node ids, 0-based
+    int c;	// cost of the assignment edge
+};
+
 // CSA code needs integer weights.  Use this multiplier to convert
 // floating-point weights to integers.
 static const int multiplier = 100;
@@ -24,120 +30,16 @@ static const int multiplier = 100;
 // The degree of outlier connections.
 static const int degree = 6;
 
-double 
-matchEdgeMaps (
-    const Matrix& bmap1, const Matrix& bmap2,
-    double maxDist, double outlierCost,
-    Matrix& m1, Matrix& m2)
+// Solve the assignment problem between n1 and n2 nodes connected by
+// the given edges.  Outlier connections (sampled from rng) and the
+// high-cost perfect match overlay are added to the graph here.  The
+// edges of the assignment that connect real nodes are appended to
+// matches.
+static void
+assignEdges (
+    const int n1, const int n2, const std::vector<Edge>& edges,
+    const double outlierCost, Random& rng, std::vector<Match>& matches)
 {
-    // Check global constants.
-    assert (degree > 0);
-    assert (multiplier > 0);
-
-    // Check arguments.
-    assert (bmap1.nrows() == bmap2.nrows());
-    assert (bmap1.ncols() == bmap2.ncols());
-    assert (maxDist >= 0);
-    assert (outlierCost > maxDist);
-    
-    const int height = bmap1.nrows();
-    const int width = bmap1.ncols();
-
-    // Initialize to zeros.
-    m1 = Matrix(height,width);
-    m2 = Matrix(height,width);
-
-    // Initialize match[12] arrays to (-1,-1).
-    Array2D<Pixel> match1 (width,height);
-    Array2D<Pixel> match2 (width,height);
-    for (int x = 0; x < width; x++) {
-        for (int y = 0; y < height; y++) {
-            match1(x,y) = Pixel(-1,-1);
-            match2(x,y) = Pixel(-1,-1);
-        }
-    }
-
-    // Radius of search window.
-    const int r = (int) ceil (maxDist);	
-
-    // Figure out which nodes are matchable, i.e. within maxDist
-    // of another node.
-    Array2D<bool> matchable1 (width,height);
-    Array2D<bool> matchable2 (width,height);
-    matchable1.init(false);
-    matchable2.init(false);
-    for (int y1 = 0; y1 < height; y1++) {
-        for (int x1 = 0; x1 < width; x1++) {
-            if (!bmap1(y1,x1)) { continue; }
-            for (int v = -r; v <= r; v++) {
-                for (int u = -r; u <= r; u++) {
-                    const double d2 = u*u + v*v;
-                    if (d2 > maxDist*maxDist) { continue; }
-                    const int x2 = x1 + u;
-                    const int y2 = y1 + v;
-                    if (x2 < 0 || x2 >= width) { continue; }
-                    if (y2 < 0 || y2 >= height) { continue; }
-                    if (!bmap2(y2,x2)) { continue; }
-                    matchable1(x1,y1) = true;
-                    matchable2(x2,y2) = true;
-                }
-            }
-        }
-    }
-
-    // Count the number of nodes on each side of the match.
-    // Construct nodeID->pixel and pixel->nodeID maps.
-    // Node IDs range from [0,n1) and [0,n2).
-    int n1=0, n2=0;
-    std::vector<Pixel> nodeToPix1;
-    std::vector<Pixel> nodeToPix2;
-    Array2D<int> pixToNode1 (width,height);
-    Array2D<int> pixToNode2 (width,height);
-    for (int x = 0; x < width; x++) {
-        for (int y = 0; y < height; y++) {
-            pixToNode1(x,y) = -1;
-            pixToNode2(x,y) = -1;
-            Pixel pix (x,y);
-            if (matchable1(x,y)) {
-                pixToNode1(x,y) = n1;
-                nodeToPix1.push_back(pix);
-                n1++;
-            }
-            if (matchable2(x,y)) {
-                pixToNode2(x,y) = n2;
-                nodeToPix2.push_back(pix);
-                n2++;
-            }
-        }
-    }
-
-    // Construct the list of edges between pixels within maxDist.
-    std::vector<Edge> edges;
-    for (int x1 = 0; x1 < width; x1++) {
-        for (int y1 = 0; y1 < height; y1++) {
-            if (!matchable1(x1,y1)) { continue; }
-            for (int u = -r; u <= r; u++) {
-                for (int v = -r; v <= r; v++) {
-                    const double d2 = u*u + v*v;
-                    if (d2 > maxDist*maxDist) { continue; }
-                    const int x2 = x1 + u;
-                    const int y2 = y1 + v;
-                    if (x2 < 0 || x2 >= width) { continue; }
-                    if (y2 < 0 || y2 >= height) { continue; }
-                    if (!matchable2(x2,y2)) { continue; }
-                    Edge e; 
-                    e.i = pixToNode1(x1,y1);
-                    e.j = pixToNode2(x2,y2);
-                    e.w = sqrt(d2);
-                    assert (e.i >= 0 && e.i < n1);
-                    assert (e.j >= 0 && e.j < n2);
-                    assert (e.w < outlierCost);
-                    edges.push_back(e);
-                }
-            }
-        }
-    }
-
     // The cardinality of the match is n.
     const int n = n1 + n2;
     const int nmin = std::min(n1,n2);
@@ -163,7 +65,7 @@ matchEdgeMaps (
 
     // If the graph is empty, then there's nothing to do.
     if (m == 0) {
-        return 0;
+        return;
     }
 
     // Weight of outlier connections.
@@ -188,7 +90,7 @@ matchEdgeMaps (
     }
     // outliers edges for map1, exclude diagonal
     for (int i = 0; i < n1; i++) {
-        kOfN(d1,n1-1,outliers.data());
+        kOfN(d1,n1-1,outliers.data(),rng);
         for (int a = 0; a < d1; a++) {
             int j = outliers(a);
             if (j >= i) { j++; }
@@ -202,7 +104,7 @@ matchEdgeMaps (
     }
     // outliers edges for map2, exclude diagonal
     for (int j = 0; j < n2; j++) {
-        kOfN(d2,n2-1,outliers.data());
+        kOfN(d2,n2-1,outliers.data(),rng);
         for (int a = 0; a < d2; a++) {
             int i = outliers(a);
             if (i >= j) { i++; }
@@ -216,7 +118,7 @@ matchEdgeMaps (
     }
     // outlier-to-outlier edges
     for (int i = 0; i < nmax; i++) {
-        kOfN(d3,nmin,outliers.data());
+        kOfN(d3,nmin,outliers.data(),rng);
         for (int a = 0; a < d3; a++) {
             const int j = outliers(a);
             assert (j >= 0 && j < nmin);
@@ -285,13 +187,12 @@ matchEdgeMaps (
         // skip outlier edges
         if (i >= n1) { continue; }
         if (j >= n2) { continue; }
-        // for edges between real nodes, check the edge weight
-        const Pixel pix1 = nodeToPix1[i];
-        const Pixel pix2 = nodeToPix2[j];
-        const int dx = pix1.x - pix2.x;
-        const int dy = pix1.y - pix2.y;
-        const int w = (int) rint (sqrt(dx*dx+dy*dy)*multiplier);
-        assert (w == c);
+        // edges between real nodes
+        Match match;
+        match.i = i;
+        match.j = j;
+        match.c = c;
+        matches.push_back(match);
     }
 
     // Print a warning if any of the edges from the perfect match overlay
@@ -303,41 +204,282 @@ matchEdgeMaps (
                  __FILE__, __LINE__, overlayCount);
     }
 
-    // Compute match arrays.
+}
+
+// Find the root of a node (with path halving).
+static inline int
+findRoot (std::vector<int>& parent, int a)
+{
+    while (parent[a] != a) {
+        parent[a] = parent[parent[a]];
+        a = parent[a];
+    }
+    return a;
+}
+
+// Solve the assignment problem of assignEdges separately for each
+// connected component of the bipartite graph.  Nodes farther apart than
+// maxDist never share an edge, so the components are independent and
+// much smaller than the whole graph.  The components are solved in the
+// order of their smallest node id (map1 first), and the node and edge
+// orders are kept within a component.  A component made of a single edge
+// is matched directly.  The edges of the assignment that connect real
+// nodes are appended to matches (with the global node ids).
+static void
+assignComponents (
+    const int n1, const int n2, const std::vector<Edge>& edges,
+    const double outlierCost, Random& rng, std::vector<Match>& matches)
+{
+    const int n = n1 + n2;
+    if (n == 0) { return; }
+
+    // Connected components (nodes of map2 are offset by n1).
+    std::vector<int> parent (n);
+    for (int a = 0; a < n; a++) { parent[a] = a; }
+    for (int a = 0; a < (int)edges.size(); a++) {
+        const int ri = findRoot (parent, edges[a].i);
+        const int rj = findRoot (parent, n1 + edges[a].j);
+        if (ri != rj) { parent[std::max(ri,rj)] = std::min(ri,rj); }
+    }
+
+    // Component ids in the order of the smallest node id, and local node
+    // ids in the order of the global node ids.
+    std::vector<int> comp (n);
+    std::vector<int> local (n);
+    std::vector<int> size1;
+    std::vector<int> size2;
     for (int a = 0; a < n; a++) {
-        // node ids
-        const int i = ograph(a,0);
-        const int j = ograph(a,1);
-        // skip outlier edges
-        if (i >= n1) { continue; }
-        if (j >= n2) { continue; }
-        // map node ids to pixels
-        const Pixel pix1 = nodeToPix1[i];
-        const Pixel pix2 = nodeToPix2[j];
-        // record edges
-        match1(pix1.x,pix1.y) = pix2;
-        match2(pix2.x,pix2.y) = pix1;
+        const int r = findRoot (parent, a);
+        if (r == a) {
+            comp[a] = size1.size();
+            size1.push_back(0);
+            size2.push_back(0);
+        } else {
+            comp[a] = comp[r];	// r < a
+        }
+        local[a] = (a < n1) ? size1[comp[a]]++ : size2[comp[a]]++;
+    }
+    const int ncomp = size1.size();
+
+    // Bucket the edges and the nodes by component (counting sort, the
+    // order within a component is kept).
+    std::vector<int> edgeStart (ncomp+1, 0);
+    for (int a = 0; a < (int)edges.size(); a++) {
+        edgeStart[comp[edges[a].i]+1]++;
+    }
+    std::vector<int> nodeStart (ncomp+1, 0);
+    for (int c = 0; c < ncomp; c++) {
+        edgeStart[c+1] += edgeStart[c];
+        nodeStart[c+1] = nodeStart[c] + size1[c];
+    }
+    std::vector<int> edgeOrder (edges.size());
+    std::vector<int> fill (edgeStart.begin(), edgeStart.end()-1);
+    for (int a = 0; a < (int)edges.size(); a++) {
+        edgeOrder[fill[comp[edges[a].i]]++] = a;
+    }
+    std::vector<int> nodes1 (n1);
+    for (int a = 0; a < n1; a++) {
+        nodes1[nodeStart[comp[a]]+local[a]] = a;
+    }
+    std::vector<int> nodeStart2 (ncomp+1, 0);
+    for (int c = 0; c < ncomp; c++) {
+        nodeStart2[c+1] = nodeStart2[c] + size2[c];
     }
+    std::vector<int> nodes2 (n2);
+    for (int a = n1; a < n; a++) {
+        nodes2[nodeStart2[comp[a]]+local[a]] = a - n1;
+    }
+
+    // Solve each component.
+    std::vector<Edge> compEdges;
+    std::vector<Match> compMatches;
+    for (int c = 0; c < ncomp; c++) {
+        const int c1 = size1[c];
+        const int c2 = size2[c];
+        const int ne = edgeStart[c+1] - edgeStart[c];
+        // isolated nodes are never matched
+        if (ne == 0) { continue; }
+        if (ne == 1) {
+            // a single edge is always part of the assignment
+            assert (c1 == 1 && c2 == 1);
+            const Edge& e = edges[edgeOrder[edgeStart[c]]];
+            Match match;
+            match.i = e.i;
+            match.j = e.j;
+            match.c = (int) rint (e.w * multiplier);
+            matches.push_back(match);
+            continue;
+        }
+        compEdges.clear();
+        for (int k = edgeStart[c]; k < edgeStart[c+1]; k++) {
+            Edge e = edges[edgeOrder[k]];
+            e.i = local[e.i];
+            e.j = local[n1 + e.j];
+            compEdges.push_back(e);
+        }
+        compMatches.clear();
+        assignEdges (c1, c2, compEdges, outlierCost, rng, compMatches);
+        for (int k = 0; k < (int)compMatches.size(); k++) {
+            Match match = compMatches[k];
+            match.i = nodes1[nodeStart[c]+match.i];
+            match.j = nodes2[nodeStart2[c]+match.j];
+            matches.push_back(match);
+        }
+    }
+}
+
+// Check that the weight of the assignment edge matches the distance
+// between the two pixels.
+static inline void
+checkMatchWeight (const Match& match, const Pixel& pix1, const Pixel& pix2)
+{
+    const int dx = pix1.x - pix2.x;
+    const int dy = pix1.y - pix2.y;
+    const int w = (int) rint (sqrt(dx*dx+dy*dy)*multiplier);
+    assert (w == match.c);
+    (void) w; // only read by the assertion (unused with NDEBUG)
+}
+
+// Match the pixels of two row-major binary maps.  The matched pixels are
+// written to the match[12] arrays ((-1,-1) if unmatched), and the cost of
+// the match is returned.
+static double
+matchPixels (
+    const unsigned char* bmap1, const unsigned char* bmap2,
+    const int height, const int width,
+    double maxDist, double outlierCost, Random& rng,
+    Array2D<Pixel>& match1, Array2D<Pixel>& match2)
+{
+    // Check global constants.
+    assert (degree > 0);
+    assert (multiplier > 0);
+
+    // Check arguments.
+    assert (height >= 0 && width >= 0);
+    assert (maxDist >= 0);
+    assert (outlierCost > maxDist);
+
+    // Inputs are C-contiguous (row-major) arrays.
+    #define BMAP1(y,x) bmap1[(y)*width+(x)]
+    #define BMAP2(y,x) bmap2[(y)*width+(x)]
+
+    // Initialize match[12] arrays to (-1,-1).
     for (int x = 0; x < width; x++) {
         for (int y = 0; y < height; y++) {
-            if (bmap1(y,x)) {
-                if (match1(x,y) != Pixel(-1,-1)) {
-                    m1(y,x) = match1(x,y).x*height + match1(x,y).y + 1;
+            match1(x,y) = Pixel(-1,-1);
+            match2(x,y) = Pixel(-1,-1);
+        }
+    }
+
+    // Radius of search window.
+    const int r = (int) ceil (maxDist);	
+
+    // Figure out which nodes are matchable, i.e. within maxDist
+    // of another node.
+    Array2D<bool> matchable1 (width,height);
+    Array2D<bool> matchable2 (width,height);
+    matchable1.init(false);
+    matchable2.init(false);
+    for (int y1 = 0; y1 < height; y1++) {
+        for (int x1 = 0; x1 < width; x1++) {
+            if (!BMAP1(y1,x1)) { continue; }
+            for (int v = -r; v <= r; v++) {
+                for (int u = -r; u <= r; u++) {
+                    const double d2 = u*u + v*v;
+                    if (d2 > maxDist*maxDist) { continue; }
+                    const int x2 = x1 + u;
+                    const int y2 = y1 + v;
+                    if (x2 < 0 || x2 >= width) { continue; }
+                    if (y2 < 0 || y2 >= height) { continue; }
+                    if (!BMAP2(y2,x2)) { continue; }
+                    matchable1(x1,y1) = true;
+                    matchable2(x2,y2) = true;
                 }
             }
-            if (bmap2(y,x)) {
-                if (match2(x,y) != Pixel(-1,-1)) {
-                    m2(y,x) = match2(x,y).x*height + match2(x,y).y + 1;
+        }
+    }
+
+    // Count the number of nodes on each side of the match.
+    // Construct nodeID->pixel and pixel->nodeID maps.
+    // Node IDs range from [0,n1) and [0,n2).
+    int n1=0, n2=0;
+    std::vector<Pixel> nodeToPix1;
+    std::vector<Pixel> nodeToPix2;
+    Array2D<int> pixToNode1 (width,height);
+    Array2D<int> pixToNode2 (width,height);
+    for (int x = 0; x < width; x++) {
+        for (int y = 0; y < height; y++) {
+            pixToNode1(x,y) = -1;
+            pixToNode2(x,y) = -1;
+            Pixel pix (x,y);
+            if (matchable1(x,y)) {
+                pixToNode1(x,y) = n1;
+                nodeToPix1.push_back(pix);
+                n1++;
+            }
+            if (matchable2(x,y)) {
+                pixToNode2(x,y) = n2;
+                nodeToPix2.push_back(pix);
+                n2++;
+            }
+        }
+    }
+
+    // Construct the list of edges between pixels within maxDist.
+    std::vector<Edge> edges;
+    for (int x1 = 0; x1 < width; x1++) {
+        for (int y1 = 0; y1 < height; y1++) {
+            if (!matchable1(x1,y1)) { continue; }
+            for (int u = -r; u <= r; u++) {
+                for (int v = -r; v <= r; v++) {
+                    const double d2 = u*u + v*v;
+                    if (d2 > maxDist*maxDist) { continue; }
+                    const int x2 = x1 + u;
+                    const int y2 = y1 + v;
+                    if (x2 < 0 || x2 >= width) { continue; }
+                    if (y2 < 0 || y2 >= height) { continue; }
+                    if (!matchable2(x2,y2)) { continue; }
+                    Edge e; 
+                    e.i = pixToNode1(x1,y1);
+                    e.j = pixToNode2(x2,y2);
+                    e.w = sqrt(d2);
+                    assert (e.i >= 0 && e.i < n1);
+                    assert (e.j >= 0 && e.j < n2);
+                    assert (e.w < outlierCost);
+                    edges.push_back(e);
                 }
             }
         }
     }
 
+    // If the graph is empty, then there's nothing to do.
+    if (n1 + n2 == 0) {
+        return 0;
+    }
+
+    // Solve the assignment problem.
+    std::vector<Match> matches;
+    assignComponents (n1, n2, edges, outlierCost, rng, matches);
+
+    // Compute match arrays.
+    for (int a = 0; a < (int)matches.size(); a++) {
+        // node ids
+        const int i = matches[a].i;
+        const int j = matches[a].j;
+        // map node ids to pixels
+        const Pixel pix1 = nodeToPix1[i];
+        const Pixel pix2 = nodeToPix2[j];
+        checkMatchWeight (matches[a], pix1, pix2);
+        // record edges
+        match1(pix1.x,pix1.y) = pix2;
+        match2(pix2.x,pix2.y) = pix1;
+    }
+
     // Compute the match cost.
     double cost = 0;
     for (int x = 0; x < width; x++) {
         for (int y = 0; y < height; y++) {
-            if (bmap1(y,x)) {
+            if (BMAP1(y,x)) {
                 if (match1(x,y) == Pixel(-1,-1)) {
                     cost += outlierCost;
                 } else {
@@ -346,7 +488,7 @@ matchEdgeMaps (
                     cost += 0.5 * sqrt (dx*dx + dy*dy);
                 }
             }
-            if (bmap2(y,x)) {
+            if (BMAP2(y,x)) {
                 if (match2(x,y) == Pixel(-1,-1)) {
                     cost += outlierCost;
                 } else {
@@ -358,6 +500,461 @@ matchEdgeMaps (
         }
     }    
 
+    #undef BMAP1
+    #undef BMAP2
+
+    // Return the match cost.
+    return cost;
+}
+
+double 
+matchEdgeMaps (
+    const unsigned char* bmap1, const unsigned char* bmap2,
+    const int height, const int width,
+    double maxDist, double outlierCost,
+    double* m1, double* m2, uint64_t seed)
+{
+    // Check arguments.
+    assert (height >= 0 && width >= 0);
+
+    // Inputs and outputs are C-contiguous (row-major) arrays.
+    #define BMAP1(y,x) bmap1[(y)*width+(x)]
+    #define BMAP2(y,x) bmap2[(y)*width+(x)]
+    #define M1(y,x) m1[(y)*width+(x)]
+    #define M2(y,x) m2[(y)*width+(x)]
+
+    // Initialize to zeros.
+    for (int a = 0; a < height*width; a++) {
+        m1[a] = 0;
+        m2[a] = 0;
+    }
+
+    // Random stream for the outlier connections.
+    Random seeded (seed);
+    Random& rng = (seed == 0) ? Random::rand : seeded;
+
+    // Match the pixels.
+    Array2D<Pixel> match1 (width,height);
+    Array2D<Pixel> match2 (width,height);
+    const double cost = matchPixels (
+        bmap1, bmap2, height, width, maxDist, outlierCost, rng,
+        match1, match2);
+
+    // Compute match arrays.
+    for (int x = 0; x < width; x++) {
+        for (int y = 0; y < height; y++) {
+            if (BMAP1(y,x)) {
+                if (match1(x,y) != Pixel(-1,-1)) {
+                    M1(y,x) = match1(x,y).x*height + match1(x,y).y + 1;
+                }
+            }
+            if (BMAP2(y,x)) {
+                if (match2(x,y) != Pixel(-1,-1)) {
+                    M2(y,x) = match2(x,y).x*height + match2(x,y).y + 1;
+                }
+            }
+        }
+    }
+
+    #undef BMAP1
+    #undef BMAP2
+    #undef M1
+    #undef M2
+
     // Return the match cost.
     return cost;
 }
+
+double 
+matchEdgeMapsCount (
+    const unsigned char* bmap1, const unsigned char* bmap2,
+    const int height, const int width,
+    double maxDist, double outlierCost,
+    int* count1, int* count2, unsigned char* acc1, uint64_t seed)
+{
+    // Check arguments.
+    assert (height >= 0 && width >= 0);
+
+    // Random stream for the outlier connections.
+    Random seeded (seed);
+    Random& rng = (seed == 0) ? Random::rand : seeded;
+
+    // Match the pixels.
+    Array2D<Pixel> match1 (width,height);
+    Array2D<Pixel> match2 (width,height);
+    const double cost = matchPixels (
+        bmap1, bmap2, height, width, maxDist, outlierCost, rng,
+        match1, match2);
+
+    // Count the matched pixels (the match is one-to-one), and mark the
+    // matched pixels of bmap1 in the accumulator.
+    int count = 0;
+    for (int x = 0; x < width; x++) {
+        for (int y = 0; y < height; y++) {
+            if (match1(x,y) == Pixel(-1,-1)) { continue; }
+            count++;
+            if (acc1 != NULL) { acc1[y*width+x] = 1; }
+        }
+    }
+    *count1 = count;
+    *count2 = count;
+
+    // Return the match cost.
+    return cost;
+}
+
+double 
+matchEdgeMaps (
+    const Matrix& bmap1, const Matrix& bmap2,
+    double maxDist, double outlierCost,
+    Matrix& m1, Matrix& m2)
+{
+    // Check arguments.
+    assert (bmap1.nrows() == bmap2.nrows());
+    assert (bmap1.ncols() == bmap2.ncols());
+
+    const int height = bmap1.nrows();
+    const int width = bmap1.ncols();
+
+    // Convert to row-major binary maps.
+    std::vector<unsigned char> b1 (height*width);
+    std::vector<unsigned char> b2 (height*width);
+    for (int y = 0; y < height; y++) {
+        for (int x = 0; x < width; x++) {
+            b1[y*width+x] = (bmap1(y,x) != 0);
+            b2[y*width+x] = (bmap2(y,x) != 0);
+        }
+    }
+
+    std::vector<double> o1 (height*width);
+    std::vector<double> o2 (height*width);
+    const double cost = matchEdgeMaps (
+        b1.data(), b2.data(), height, width,
+        maxDist, outlierCost, o1.data(), o2.data(), 0);
+
+    m1 = Matrix(height,width);
+    m2 = Matrix(height,width);
+    for (int y = 0; y < height; y++) {
+        for (int x = 0; x < width; x++) {
+            m1(y,x) = o1[y*width+x];
+            m2(y,x) = o2[y*width+x];
+        }
+    }
+    return cost;
+}
+
+void
+matchEdgeMapsSweep (
+    const double* pred, const unsigned char* gt,
+    const int height, const int width,
+    const double* thresholds, const int nthresh,
+    double maxDist, double outlierCost,
+    int* count1, int* count2, uint64_t seed)
+{
+    // Check arguments.
+    assert (maxDist >= 0);
+    assert (outlierCost > maxDist);
+    assert (nthresh >= 0);
+
+    // Inputs are C-contiguous (row-major) arrays.
+    #define PRED(x,y) pred[(y)*width+(x)]
+    #define GT(x,y) gt[(y)*width+(x)]
+
+    for (int t = 0; t < nthresh; t++) {
+        count1[t] = 0;
+        count2[t] = 0;
+    }
+    if (nthresh == 0) { return; }
+
+    // The lowest threshold gives the largest set of predicted pixels;
+    // the sets for the other thresholds are subsets of it.
+    double tmin = thresholds[0];
+    for (int t = 1; t < nthresh; t++) {
+        tmin = std::min(tmin,thresholds[t]);
+    }
+
+    // Radius of search window.
+    const int r = (int) ceil (maxDist);
+
+    // Offsets within maxDist, in the same order as matchEdgeMaps.
+    std::vector<Pixel> offsets;
+    std::vector<double> offsetDist;
+    for (int u = -r; u <= r; u++) {
+        for (int v = -r; v <= r; v++) {
+            const double d2 = u*u + v*v;
+            if (d2 > maxDist*maxDist) { continue; }
+            offsets.push_back(Pixel(u,v));
+            offsetDist.push_back(sqrt(d2));
+        }
+    }
+    const int noffsets = offsets.size();
+
+    // GT-side neighbourhood structure (built once):
+    // - near: the pixel is within maxDist of a GT pixel
+    // - best: for a GT pixel, the highest prediction within maxDist
+    Array2D<bool> near (width,height);
+    Array2D<double> best (width,height);
+    near.init(false);
+    best.init(-HUGE_VAL);
+    for (int y2 = 0; y2 < height; y2++) {
+        for (int x2 = 0; x2 < width; x2++) {
+            if (!GT(x2,y2)) { continue; }
+            for (int o = 0; o < noffsets; o++) {
+                const int x1 = x2 + offsets[o].x;
+                const int y1 = y2 + offsets[o].y;
+                if (x1 < 0 || x1 >= width) { continue; }
+                if (y1 < 0 || y1 >= height) { continue; }
+                near(x1,y1) = true;
+                if (PRED(x1,y1) >= tmin) {
+                    best(x2,y2) = std::max(best(x2,y2),PRED(x1,y1));
+                }
+            }
+        }
+    }
+
+    // Candidate nodes for the lowest threshold, ordered like the node
+    // ids of matchEdgeMaps.
+    std::vector<Pixel> cand1;
+    std::vector<Pixel> cand2;
+    for (int x = 0; x < width; x++) {
+        for (int y = 0; y < height; y++) {
+            if (near(x,y) && PRED(x,y) >= tmin) {
+                cand1.push_back(Pixel(x,y));
+            }
+            if (GT(x,y) && best(x,y) >= tmin) {
+                cand2.push_back(Pixel(x,y));
+            }
+        }
+    }
+
+    // Candidate edges for the lowest threshold (indices into cand1 and
+    // cand2), ordered like the edges of matchEdgeMaps.
+    Array2D<int> candToNode2 (width,height);
+    candToNode2.init(-1);
+    for (int b = 0; b < (int)cand2.size(); b++) {
+        candToNode2(cand2[b].x,cand2[b].y) = b;
+    }
+    std::vector<Edge> candEdges;
+    std::vector<double> candScore;
+    for (int a = 0; a < (int)cand1.size(); a++) {
+        const int x1 = cand1[a].x;
+        const int y1 = cand1[a].y;
+        for (int o = 0; o < noffsets; o++) {
+            const int x2 = x1 + offsets[o].x;
+            const int y2 = y1 + offsets[o].y;
+            if (x2 < 0 || x2 >= width) { continue; }
+            if (y2 < 0 || y2 >= height) { continue; }
+            if (candToNode2(x2,y2) < 0) { continue; }
+            Edge e;
+            e.i = a;
+            e.j = candToNode2(x2,y2);
+            e.w = offsetDist[o];
+            assert (e.w < outlierCost);
+            candEdges.push_back(e);
+            candScore.push_back(PRED(x1,y1));
+        }
+    }
+
+    // Solve the assignment problem for each threshold.
+    std::vector<int> candToNode1 (cand1.size());
+    std::vector<int> candToNode2v (cand2.size());
+    std::vector<Pixel> nodeToPix1;
+    std::vector<Pixel> nodeToPix2;
+    std::vector<Edge> edges;
+    std::vector<Match> matches;
+    Random seeded (seed);
+    Random& rng = (seed == 0) ? Random::rand : seeded;
+    for (int t = 0; t < nthresh; t++) {
+        const double thresh = thresholds[t];
+
+        // Matchable nodes for this threshold.
+        int n1=0, n2=0;
+        nodeToPix1.clear();
+        nodeToPix2.clear();
+        for (int a = 0; a < (int)cand1.size(); a++) {
+            candToNode1[a] = -1;
+            if (PRED(cand1[a].x,cand1[a].y) >= thresh) {
+                candToNode1[a] = n1++;
+                nodeToPix1.push_back(cand1[a]);
+            }
+        }
+        for (int b = 0; b < (int)cand2.size(); b++) {
+            candToNode2v[b] = -1;
+            if (best(cand2[b].x,cand2[b].y) >= thresh) {
+                candToNode2v[b] = n2++;
+                nodeToPix2.push_back(cand2[b]);
+            }
+        }
+
+        // Edges between the matchable nodes.
+        edges.clear();
+        for (int a = 0; a < (int)candEdges.size(); a++) {
+            if (candScore[a] < thresh) { continue; }
+            Edge e;
+            e.i = candToNode1[candEdges[a].i];
+            e.j = candToNode2v[candEdges[a].j];
+            e.w = candEdges[a].w;
+            assert (e.i >= 0 && e.i < n1);
+            assert (e.j >= 0 && e.j < n2);
+            edges.push_back(e);
+        }
+
+        // Solve the assignment problem.  With a seed, each threshold
+        // replays the same random stream (as a seeded matchEdgeMaps call).
+        if (seed != 0) { rng.reset(); }
+        matches.clear();
+        assignComponents (n1, n2, edges, outlierCost, rng, matches);
+        for (int a = 0; a < (int)matches.size(); a++) {
+            checkMatchWeight (
+                matches[a], nodeToPix1[matches[a].i], nodeToPix2[matches[a].j]);
+        }
+
+        // Every edge of the assignment matches one pixel of each map.
+        count1[t] = matches.size();
+        count2[t] = matches.size();
+    }
+
+    #undef PRED
+    #undef GT
+}
+
+void
+matchEdgeMapsMulti (
+    const unsigned char* bmap1, const unsigned char* gts, const int ngts,
+    const int height, const int width,
+    double maxDist, double outlierCost,
+    int* count2, unsigned char* acc1, uint64_t seed)
+{
+    // Check arguments.
+    assert (height >= 0 && width >= 0);
+    assert (ngts >= 0);
+    assert (maxDist >= 0);
+    assert (outlierCost > maxDist);
+
+    for (int g = 0; g < ngts; g++) {
+        count2[g] = 0;
+    }
+    if (ngts == 0) { return; }
+
+    // Radius of search window.
+    const int r = (int) ceil (maxDist);
+
+    // Offsets within maxDist, in the same order as matchEdgeMaps.
+    std::vector<Pixel> offsets;
+    std::vector<double> offsetDist;
+    for (int u = -r; u <= r; u++) {
+        for (int v = -r; v <= r; v++) {
+            const double d2 = u*u + v*v;
+            if (d2 > maxDist*maxDist) { continue; }
+            offsets.push_back(Pixel(u,v));
+            offsetDist.push_back(sqrt(d2));
+        }
+    }
+    const int noffsets = offsets.size();
+
+    // Prediction-side structure (built once): the predicted pixels,
+    // ordered like the node ids of matchEdgeMaps.
+    std::vector<Pixel> pix1;
+    for (int x = 0; x < width; x++) {
+        for (int y = 0; y < height; y++) {
+            if (bmap1[y*width+x]) { pix1.push_back(Pixel(x,y)); }
+        }
+    }
+    const int npix1 = pix1.size();
+
+    // Scratch arrays shared by the GTs.  pixToNode2 is reset after each
+    // GT by only clearing the touched pixels.
+    std::vector<int> pixToNode1 (npix1);
+    std::vector<Pixel> nodeToPix1;
+    Array2D<int> pixToNode2 (width,height);
+    pixToNode2.init(-1);
+    std::vector<int> touched2;
+    std::vector<Edge> edges;
+    std::vector<Match> matches;
+    Random seeded (seed);
+    Random& rng = (seed == 0) ? Random::rand : seeded;
+
+    for (int g = 0; g < ngts; g++) {
+        const unsigned char* gt = gts + (size_t)g*height*width;
+
+        // Matchable nodes, i.e. within maxDist of a pixel of the other
+        // map.  The matchable GT pixels are marked with -2.
+        int n1 = 0;
+        nodeToPix1.clear();
+        touched2.clear();
+        for (int a = 0; a < npix1; a++) {
+            const int x1 = pix1[a].x;
+            const int y1 = pix1[a].y;
+            bool matchable = false;
+            for (int o = 0; o < noffsets; o++) {
+                const int x2 = x1 + offsets[o].x;
+                const int y2 = y1 + offsets[o].y;
+                if (x2 < 0 || x2 >= width) { continue; }
+                if (y2 < 0 || y2 >= height) { continue; }
+                if (!gt[y2*width+x2]) { continue; }
+                matchable = true;
+                if (pixToNode2(x2,y2) == -1) {
+                    pixToNode2(x2,y2) = -2;
+                    touched2.push_back(x2*height+y2);
+                }
+            }
+            pixToNode1[a] = -1;
+            if (matchable) {
+                pixToNode1[a] = n1++;
+                nodeToPix1.push_back(pix1[a]);
+            }
+        }
+
+        // Node ids of the GT, in column-major order like matchEdgeMaps.
+        std::sort(touched2.begin(), touched2.end());
+        const int n2 = touched2.size();
+        for (int b = 0; b < n2; b++) {
+            pixToNode2(touched2[b]/height,touched2[b]%height) = b;
+        }
+
+        // Edges between the matchable nodes, ordered like matchEdgeMaps.
+        edges.clear();
+        for (int a = 0; a < npix1; a++) {
+            if (pixToNode1[a] < 0) { continue; }
+            const int x1 = pix1[a].x;
+            const int y1 = pix1[a].y;
+            for (int o = 0; o < noffsets; o++) {
+                const int x2 = x1 + offsets[o].x;
+                const int y2 = y1 + offsets[o].y;
+                if (x2 < 0 || x2 >= width) { continue; }
+                if (y2 < 0 || y2 >= height) { continue; }
+                if (pixToNode2(x2,y2) < 0) { continue; }
+                Edge e;
+                e.i = pixToNode1[a];
+                e.j = pixToNode2(x2,y2);
+                e.w = offsetDist[o];
+                assert (e.w < outlierCost);
+                edges.push_back(e);
+            }
+        }
+
+        // Solve the assignment problem.  With a seed, each GT replays the
+        // same random stream (as a seeded matchEdgeMapsCount call).
+        if (n1 + n2 > 0) {
+            if (seed != 0) { rng.reset(); }
+            matches.clear();
+            assignComponents (n1, n2, edges, outlierCost, rng, matches);
+
+            // Every edge of the assignment matches one pixel of each map.
+            count2[g] = matches.size();
+            for (int a = 0; a < (int)matches.size(); a++) {
+                const Pixel pix = nodeToPix1[matches[a].i];
+                checkMatchWeight (
+                    matches[a], pix,
+                    Pixel(touched2[matches[a].j]/height,
+                          touched2[matches[a].j]%height));
+                if (acc1 != NULL) { acc1[pix.y*width+pix.x] = 1; }
+            }
+        }
+
+        // Reset the scratch array.
+        for (int b = 0; b < n2; b++) {
+            pixToNode2(touched2[b]/height,touched2[b]%height) = -1;
+        }
+    }
+}
@@ -0,0 +1,168 @@
+#include <stddef.h>
+#include <vector>
+#include "thin.hh"
+
+// Thinning using lookup tables over the 3x3 neighbourhood of a pixel.
+// The bits of the LUT index are:
+//    1   2   4
+//    8  16  32
+//   64 128 256
+// and the neighbours x1..x8 start from the east, counter-clockwise.
+
+static const int kNeighMasks[9] = {
+    16,  // centre
+    32,  // x1: east
+    4,   // x2: north east
+    2,   // x3: north
+    1,   // x4: north west
+    8,   // x5: west
+    64,  // x6: south west
+    128, // x7: south
+    256, // x8: south east
+};
+
+static inline int neigh(int index, int i)
+{
+  if (i > 8) { i -= 8; }
+  return (index & kNeighMasks[i]) != 0;
+}
+
+// Tables of the pixels that are removed in each sub-iteration
+// (conditions G1, G2 and G3 / G3')
+struct ThinLuts {
+  unsigned char remove[2][512];
+  ThinLuts();
+};
+
+ThinLuts::ThinLuts()
+{
+  for (int index = 0; index < 512; index++) {
+    int b = 0;
+    int n1 = 0;
+    int n2 = 0;
+    for (int k = 1; k <= 4; k++) {
+      b += !neigh(index, 2 * k - 1)
+           && (neigh(index, 2 * k) || neigh(index, 2 * k + 1));
+      n1 += neigh(index, 2 * k - 1) || neigh(index, 2 * k);
+      n2 += neigh(index, 2 * k) || neigh(index, 2 * k + 1);
+    }
+    const int m = n1 < n2 ? n1 : n2;
+    const bool g1 = b == 1;
+    const bool g2 = m >= 2 && m <= 3;
+    const bool g3 = !((neigh(index, 2) || neigh(index, 3) || !neigh(index, 8))
+                      && neigh(index, 1));
+    const bool g3p = !((neigh(index, 6) || neigh(index, 7) || !neigh(index, 4))
+                       && neigh(index, 5));
+    const bool centre = (index & kNeighMasks[0]) != 0;
+    remove[0][index] = centre && g1 && g2 && g3;
+    remove[1][index] = centre && g1 && g2 && g3p;
+  }
+}
+
+static inline int lutIndex(const unsigned char* img, const int height,
+                           const int width, const int r, const int c)
+{
+  const unsigned char* row = img + (long)r * width;
+  const bool n = r > 0;
+  const bool s = r < height - 1;
+  const bool w = c > 0;
+  const bool e = c < width - 1;
+  int index = 16;
+  if (n) {
+    if (w && row[c - width - 1]) { index |= 1; }
+    if (row[c - width]) { index |= 2; }
+    if (e && row[c - width + 1]) { index |= 4; }
+  }
+  if (w && row[c - 1]) { index |= 8; }
+  if (e && row[c + 1]) { index |= 32; }
+  if (s) {
+    if (w && row[c + width - 1]) { index |= 64; }
+    if (row[c + width]) { index |= 128; }
+    if (e && row[c + width + 1]) { index |= 256; }
+  }
+  return index;
+}
+
+// Adds the foreground 8-neighbours of `pixels` to `cand` (each pixel once,
+// `mark` is cleared again by the caller)
+static void addNeighbours(const unsigned char* img, const int height,
+                          const int width, const std::vector<long>& pixels,
+                          std::vector<unsigned char>& mark,
+                          std::vector<long>& cand)
+{
+  for (size_t k = 0; k < pixels.size(); k++) {
+    const int r = (int)(pixels[k] / width);
+    const int c = (int)(pixels[k] % width);
+    for (int rr = r - 1; rr <= r + 1; rr++) {
+      if (rr < 0 || rr >= height) { continue; }
+      for (int cc = c - 1; cc <= c + 1; cc++) {
+        if (cc < 0 || cc >= width) { continue; }
+        const long i = (long)rr * width + cc;
+        if (img[i] && !mark[i]) {
+          mark[i] = 1;
+          cand.push_back(i);
+        }
+      }
+    }
+  }
+}
+
+int thinBinary(unsigned char* img, const int height, const int width,
+               const int maxIter)
+{
+  // initialized once (thread-safe)
+  static const ThinLuts luts;
+
+  // candidates of the sub-iteration: all the foreground pixels at first
+  std::vector<long> cand;
+  const long n = (long)height * width;
+  for (long i = 0; i < n; i++) {
+    if (img[i]) {
+      img[i] = 1;
+      cand.push_back(i);
+    }
+  }
+
+  // A pixel can only become removable when its neighbourhood changes. The
+  // two sub-iterations use different tables, so the candidates are the
+  // neighbours of the pixels removed in the last two sub-iterations (the
+  // first two sub-iterations test all the pixels).
+  std::vector<long> removed, removedPrev;
+  std::vector<unsigned char> mark(n, 0);
+  int iter = 0;
+  int step = 0;
+  while (maxIter < 0 || iter < maxIter) {
+    for (int sub = 0; sub < 2; sub++, step++) {
+      if (step == 1) {
+        // remaining foreground pixels
+        size_t m = 0;
+        for (size_t k = 0; k < cand.size(); k++) {
+          if (img[cand[k]]) { cand[m++] = cand[k]; }
+        }
+        cand.resize(m);
+      } else if (step > 1) {
+        cand.clear();
+        addNeighbours(img, height, width, removed, mark, cand);
+        addNeighbours(img, height, width, removedPrev, mark, cand);
+        for (size_t k = 0; k < cand.size(); k++) { mark[cand[k]] = 0; }
+      }
+      removedPrev.swap(removed);
+
+      // all pixels are removed at once, based on the image before the
+      // sub-iteration
+      removed.clear();
+      for (size_t k = 0; k < cand.size(); k++) {
+        const long i = cand[k];
+        const int r = (int)(i / width);
+        const int c = (int)(i % width);
+        if (luts.remove[sub][lutIndex(img, height, width, r, c)]) {
+          removed.push_back(i);
+        }
+      }
+      if (removed.empty()) { return iter; }
+      for (size_t k = 0; k < removed.size(); k++) { img[removed[k]] = 0; }
+    }
+    iter++;
+  }
+  return iter;
+}
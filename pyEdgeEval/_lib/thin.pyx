@@ -0,0 +1,50 @@
+import numpy as np
+
+
+cdef extern from "thin.hh":
+    int thinBinary(unsigned char* img, const int height, const int width,
+                   const int maxIter) nogil
+
+
+cdef _thin(unsigned char[:,::1] img, int max_iter):
+    cdef int rows = img.shape[0]
+    cdef int cols = img.shape[1]
+    cdef int n_iter = 0
+
+    if rows == 0 or cols == 0:
+        return 0
+
+    # thin in place (the GIL is released so that multiple threads can run)
+    with nogil:
+        n_iter = thinBinary(&img[0, 0], rows, cols, max_iter)
+
+    return n_iter
+
+
+def binary_thin(img, max_iter=None, inplace=False):
+    """Binary thinning (same results as `pyEdgeEval.preprocess.binary_thin`)
+
+    Args:
+        img: a binary image, or an image that is to be converted to a binary image
+        max_iter: maximum number of iterations (None for no limit)
+        inplace: thin `img` in place (needs a C-contiguous bool or uint8 array;
+            the pixels are set to 0/1)
+
+    Returns:
+        bool mask (a view of `img` when `inplace`)
+    """
+    if img.ndim != 2:
+        raise ValueError('img should have 2 dimensions, not {}'.format(img.ndim))
+
+    if inplace:
+        if img.dtype != np.bool_ and img.dtype != np.uint8:
+            raise ValueError('img.dtype should be bool or uint8 for inplace thinning, not {}'.format(img.dtype))
+        if not img.flags.c_contiguous:
+            raise ValueError('img should be C-contiguous for inplace thinning')
+        out = img.view(np.uint8)
+    else:
+        out = np.ascontiguousarray(img != 0).view(np.uint8)
+
+    _thin(out, -1 if max_iter is None else int(max_iter))
+
+    return out.view(np.bool_)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+"""Chunked evaluation of samples
+
+With `chunksize=1`, every sample dict (with all the evaluation parameters)
+is pickled and sent to a worker and the four count arrays are pickled back.
+Here, the samples are grouped into chunks of similar cost (GT area x number
+of predictions x number of thresholds), the parameters that are shared by all
+the samples are installed once in each worker (by the pool initializer), and
+the results of a chunk are returned as a single array.
+"""
+
+import os.path as osp
+
+import numpy as np
+from PIL import Image
+
+from pyEdgeEval.utils import preload_worker, track_parallel_iter_progress
+from pyEdgeEval.utils.progressbar import ProgressBar
+
+__all__ = ["estimate_cost", "make_chunks", "track_eval_progress"]
+
+IMG_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+# keys of the GT files in the samples (in order of preference)
+GT_KEYS = ("edge_path", "seg_path", "inst_path", "gt_path")
+
+
+def _image_area(path):
+    """Area of an image (only the header is read), 0 if not an image"""
+    if not (
+        isinstance(path, str)
+        and osp.splitext(path)[1].lower() in IMG_EXTENSIONS
+        and osp.isfile(path)
+    ):
+        return 0
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+    except OSError:
+        return 0
+    return width * height
+
+
+def estimate_cost(sample):
+    """Estimated cost of evaluating a sample (GT area x predictions x
+    thresholds)
+
+    Only the header of a single GT image is read (the costs are estimated
+    serially in the main process); the predictions are resized to the GT's
+    size anyway.
+    """
+    thresholds = sample.get("thresholds", 1)
+    if isinstance(thresholds, int):
+        n_thresh = thresholds
+    else:
+        n_thresh = np.asarray(thresholds).size
+
+    n_preds = len(sample.get("pred_paths", [None]))
+
+    area = 0
+    for key in GT_KEYS:
+        area = _image_area(sample.get(key))
+        if area > 0:
+            break
+    return max(area, 1) * max(n_preds, 1) * max(n_thresh, 1)
+
+
+def _is_equal(a, b):
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return (
+            isinstance(a, np.ndarray)
+            and isinstance(b, np.ndarray)
+            and np.array_equal(a, b)
+        )
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def _split_shared(samples):
+    """Split the entries that are the same for all the samples"""
+    shared = dict(samples[0])
+    for sample in samples[1:]:
+        for k in list(shared.keys()):
+            if k not in sample or not _is_equal(shared[k], sample[k]):
+                del shared[k]
+    items = [{k: v for k, v in s.items() if k not in shared} for s in samples]
+    return shared, items
+
+
+def make_chunks(samples, num_chunks, cost_fn=estimate_cost):
+    """Group consecutive samples into chunks of similar cost
+
+    Args:
+        samples (list): list of sample dicts
+        num_chunks (int): (maximum) number of chunks
+        cost_fn (Callable): estimated cost of a sample
+
+    Returns:
+        tuple `(shared, chunks)` where `shared` is a dict of the entries that
+            are the same for all the samples, and `chunks` is a list of
+            `(indices, items)` with the indices of the samples of the chunk
+            and the other entries of each sample
+    """
+    assert num_chunks > 0, f"ERR: `num_chunks` should be positive: {num_chunks}"
+    if len(samples) == 0:
+        return {}, []
+
+    shared, items = _split_shared(samples)
+    costs = np.array([cost_fn(s) for s in samples], dtype=float)
+
+    # cut where the cumulative cost crosses a multiple of the target cost
+    cum_costs = np.cumsum(costs)
+    target = cum_costs[-1] / min(num_chunks, len(samples))
+    chunk_ids = np.minimum(
+        ((cum_costs - costs / 2) // target).astype(int), num_chunks - 1
+    )
+    chunks = []
+    for chunk_id in np.unique(chunk_ids):
+        indices = np.flatnonzero(chunk_ids == chunk_id).tolist()
+        chunks.append((indices, [items[i] for i in indices]))
+    return shared, chunks
+
+
+# entries shared by all the samples, installed in each worker by
+# `_init_worker`
+_worker_shared = None
+
+
+def _init_worker(shared):
+    """Worker initializer that also installs the shared entries"""
+    global _worker_shared
+    preload_worker()
+    _worker_shared = shared
+
+
+class _ChunkEvalSingle(object):
+    """Evaluate all the samples of a chunk in a worker
+
+    `shared` is only given for existing pools (whose workers are already
+    initialized); otherwise the entries installed by `_init_worker` are used.
+    """
+
+    def __init__(self, eval_single, shared=None):
+        self.eval_single = eval_single
+        self.shared = shared
+
+    def __call__(self, chunk):
+        indices, items = chunk
+        shared = _worker_shared if self.shared is None else self.shared
+        results = [self.eval_single(dict(shared, **item)) for item in items]
+        # a single array for the whole chunk
+        return indices, np.asarray(results, dtype=float)
+
+
+def track_eval_progress(
+    eval_single,
+    samples,
+    nproc,
+    backend="process",
+    pool=None,
+    chunks_per_proc=4,
+):
+    """Evaluate the samples and yield `(index, result)` of each sample as
+    soon as it is evaluated
+
+    With a process pool, the samples are evaluated in chunks, and the entries
+    that are shared by all the samples are sent once to each worker (an
+    existing `pool` was started before, so they are sent with the chunks).
+    Otherwise (threads or a single process), nothing is pickled and the
+    samples are evaluated one by one.
+
+    Args:
+        eval_single (Callable): function that takes a sample (dict) as input
+            and returns a tuple of arrays with the same shape
+        samples (list): list of sample dicts
+        nproc (int): number of workers
+        backend (str): "process" or "thread"
+        pool (WorkerPool): existing pool of workers (`nproc` and `backend`
+            are ignored)
+        chunks_per_proc (int): number of chunks per worker (more chunks
+            balance the load better)
+
+    Yields:
+        tuple `(index, result)`
+    """
+    nproc = getattr(pool, "nproc", nproc)
+    backend = getattr(pool, "backend", backend)
+    if (pool is None and nproc <= 1) or backend != "process":
+        yield from track_parallel_iter_progress(
+            eval_single,
+            samples,
+            nproc=nproc,
+            backend=backend,
+            pool=pool,
+        )
+        return
+
+    shared, chunks = make_chunks(samples, num_chunks=nproc * chunks_per_proc)
+
+    # progress of the samples (not the chunks)
+    prog_bar = ProgressBar(len(samples))
+    for _, (indices, results) in track_parallel_iter_progress(
+        _ChunkEvalSingle(
+            eval_single, shared=shared if pool is not None else None
+        ),
+        chunks,
+        nproc=nproc,
+        initializer=_init_worker,
+        initargs=(shared,),
+        no_bar=True,
+        backend=backend,
+        pool=pool,
+    ):
+        for index, result in zip(indices, results):
+            yield index, tuple(result)
+        prog_bar.update(len(indices))
+    prog_bar.file.write("\n")
@@ -2,8 +2,12 @@
 
 import numpy as np
 
-from pyEdgeEval._lib import correspond_pixels
-from pyEdgeEval.preprocess import binary_thin, fast_nms
+from pyEdgeEval._lib import (
+    correspond_pixels,
+    correspond_pixels_multi,
+    correspond_pixels_sweep,
+)
+from pyEdgeEval.preprocess import binary_thin_sweep, fast_nms
 
 
 def evaluate_boundaries_threshold(
@@ -61,27 +65,35 @@ def evaluate_boundaries_threshold(
             **nms_kwargs,
         )
 
-    for i_t, thresh in enumerate(list(thresholds)):
+    if not apply_thinning:
+        # without thinning, the thresholded predictions are nested and
+        # the matching can be swept over all thresholds at once
+        for i_t, thresh in enumerate(list(thresholds)):
+            sum_p[i_t] = (pred >= thresh).sum()
+        if gt.any():
+            count_p[:], count_r[:] = correspond_pixels_sweep(
+                pred, gt, thresholds, max_dist=max_dist
+            )
+            sum_r[:] = gt.sum()
+        return count_r, sum_r, count_p, sum_p
 
-        _pred = pred >= thresh
+    # thinned predictions for all thresholds
+    preds = binary_thin_sweep(pred, thresholds)
 
-        if apply_thinning:
-            _pred = binary_thin(_pred)
+    for i_t, _pred in enumerate(preds):
 
         if gt.any():
-            match1, match2, cost, oc = correspond_pixels(
-                _pred, gt, max_dist=max_dist
+            n_match1, n_match2, cost, oc = correspond_pixels(
+                _pred, gt, max_dist=max_dist, return_maps=False
             )
-            match1 = match1 > 0
-            match2 = match2 > 0
 
             # Recall
             sum_r[i_t] = gt.sum()
-            count_r[i_t] = match2.sum()
+            count_r[i_t] = n_match2
 
             # Precision
             sum_p[i_t] = _pred.sum()
-            count_p[i_t] = match1.sum()
+            count_p[i_t] = n_match1
         else:
             sum_r[i_t] = 0
             count_r[i_t] = 0
@@ -146,29 +158,29 @@ def evaluate_boundaries_threshold_multiple_gts(
             **nms_kwargs,
         )
 
-    for i_t, thresh in enumerate(list(thresholds)):
+    if apply_thinning:
+        preds = binary_thin_sweep(pred, thresholds)
+    else:
+        preds = (pred >= thresh for thresh in thresholds)
 
-        _pred = pred >= thresh
+    # (N,H,W) stack of the GTs (passed to the native code without copying)
+    if not isinstance(gts, np.ndarray):
+        gts = np.stack(gts)
 
-        acc_prec = np.zeros(_pred.shape, dtype=bool)
+    # the number of GT pixels doesn't depend on the threshold
+    num_gt_pixels = sum(gt.sum() for gt in gts)
 
-        if apply_thinning:
-            _pred = binary_thin(_pred)
+    for i_t, _pred in enumerate(preds):
 
-        for gt in gts:
-
-            match1, match2, cost, oc = correspond_pixels(
-                _pred, gt, max_dist=max_dist
-            )
-            match1 = match1 > 0
-            match2 = match2 > 0
-
-            # Precision accumulator
-            acc_prec = acc_prec | match1
+        # match against all the GTs at once; `acc_prec` marks the predicted
+        # pixels that are matched to any of the GTs
+        n_match_gt, acc_prec = correspond_pixels_multi(
+            _pred, gts, max_dist=max_dist
+        )
 
-            # Recall
-            sum_r[i_t] += gt.sum()
-            count_r[i_t] += match2.sum()
+        # Recall
+        sum_r[i_t] = num_gt_pixels
+        count_r[i_t] = n_match_gt
 
         # Precision
         sum_p[i_t] = _pred.sum()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+"""Caches of the evaluation
+
+`CachedEvalSingle` is a content-addressed on-disk cache of per-sample
+evaluation results, and `MemoryLRU` is a per-process in-memory cache of
+decoded GTs.
+
+The results of `eval_single` (e.g. `(count_r, sum_r, count_p, sum_p)`) only
+depend on the files of the sample (GT, segmentation, prediction) and the
+evaluation parameters. The key of a sample is a hash of the contents of these
+files and of the other entries of the sample dict (thresholds, max_dist, ...),
+so that the cache stays valid when files are moved and is invalidated when a
+prediction is overwritten.
+
+The on-disk cache is bounded in size; the least recently used entries are
+removed first (the modification time of an entry is updated on every hit).
+"""
+
+import hashlib
+import os
+import os.path as osp
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from pyEdgeEval.utils import atomic_write, mkdir_or_exist
+
+__all__ = ["CachedEvalSingle", "MemoryLRU"]
+
+# NOTE: bump when the evaluation results change for the same inputs
+CACHE_VERSION = 5
+
+_CHUNK_SIZE = 1 << 20
+
+
+def _update_hash(h, value):
+    """Recursively hash a value of a sample dict"""
+    if isinstance(value, str) and osp.isfile(value):
+        # hash file contents instead of the path
+        h.update(b"file:")
+        with open(value, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                h.update(chunk)
+    elif isinstance(value, np.ndarray):
+        h.update(f"ndarray:{value.dtype.str}:{value.shape}:".encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}:{len(value)}:".encode())
+        for v in value:
+            _update_hash(h, v)
+    elif isinstance(value, dict):
+        h.update(f"dict:{len(value)}:".encode())
+        for k in sorted(value.keys()):
+            h.update(f"{k}=".encode())
+            _update_hash(h, value[k])
+    else:
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+
+
+class CachedEvalSingle(object):
+    """Wraps `eval_single` with an on-disk cache
+
+    The wrapper can be pickled (as long as `eval_single` can), so it can be
+    used with process pools. Eviction is not done by the workers; call
+    `evict()` after the evaluation.
+
+    Args:
+        eval_single (Callable): function that takes a sample (dict) as input
+            and returns an array or a tuple of arrays
+        cache_dir (str): directory where the results are stored
+        max_size (int): maximum size of the cache in bytes (None for no limit)
+    """
+
+    def __init__(self, eval_single, cache_dir, max_size=2**30):
+        assert cache_dir, "ERR: `cache_dir` is not set"
+        assert (
+            max_size is None or max_size > 0
+        ), f"ERR: `max_size` should be positive, but got {max_size}"
+        self.eval_single = eval_single
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        mkdir_or_exist(cache_dir)
+
+    def key(self, sample):
+        """Content hash of a sample"""
+        h = hashlib.sha256()
+        func = self.eval_single
+        h.update(
+            f"v{CACHE_VERSION}:{func.__module__}.{func.__qualname__}:".encode()
+        )
+        _update_hash(h, sample)
+        return h.hexdigest()
+
+    def path(self, key):
+        return osp.join(self.cache_dir, key[:2], f"{key}.npz")
+
+    def load(self, key):
+        """Load a cached result (None if missing or unreadable)"""
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                is_tuple = "is_tuple" in data.files
+                n = len(data.files) - int(is_tuple)
+                arrays = [data[f"arr_{i}"] for i in range(n)]
+        except Exception:
+            # missing or broken entry
+            return None
+        # mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        if is_tuple:
+            return tuple(arrays)
+        return arrays[0]
+
+    def save(self, key, result):
+        """Atomically store a result"""
+        path = self.path(key)
+        mkdir_or_exist(osp.dirname(path))
+        if isinstance(result, tuple):
+            arrays = [np.asarray(r) for r in result] + [np.array(True)]
+            names = [f"arr_{i}" for i in range(len(result))] + ["is_tuple"]
+        else:
+            arrays = [np.asarray(result)]
+            names = ["arr_0"]
+        atomic_write(
+            path,
+            lambda f: np.savez_compressed(f, **dict(zip(names, arrays))),
+            suffix=".npz.tmp",
+        )
+
+    def evict(self):
+        """Remove the least recently used entries until under `max_size`"""
+        if self.max_size is None:
+            return
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".npz"):
+                    continue
+                path = osp.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def __call__(self, sample):
+        key = self.key(sample)
+        result = self.load(key)
+        if result is None:
+            result = self.eval_single(sample)
+            self.save(key, result)
+        return result
+
+
+class MemoryLRU(object):
+    """Per-process LRU bounded in bytes
+
+    The values need an `nbytes` attribute (e.g. `PackedEdge`).
+
+    NOTE: the workers of the thread backend share the cache, so the entries
+    are only accessed while holding the lock
+
+    Args:
+        max_bytes (int): maximum size of the values in bytes (the most recent
+            value is kept even if it is larger)
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key).nbytes
+            self._entries[key] = value
+            self.nbytes += value.nbytes
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                _, old = self._entries.popitem(last=False)
+                self.nbytes -= old.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
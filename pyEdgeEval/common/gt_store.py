@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+
+"""Pre-decoded ground truth store
+
+Every evaluation run re-reads, resizes, and decodes the same GT files (edge
+PNGs, segmentation maps, BSDS `.mat` files). The GT store does this once: the
+decoded (and scaled) GTs are written to memory-mappable shards (`.npy` files
+holding a flat byte buffer) together with an index (`index.json`) that maps a
+GT file (and scale) to the arrays in the shards.
+
+Loading from the store is only a lookup in the index and a view into a
+memory-mapped shard, so the workers of a pool share the GTs through the page
+cache instead of decoding them in every process.
+
+Entries are keyed by the absolute path of the source file (and the scale). The
+modification time and size of the source file are recorded, and stale entries
+are rejected when loading and recompiled by `build_gt_store`.
+"""
+
+import json
+import os
+import os.path as osp
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+from pyEdgeEval.utils import (
+    atomic_write,
+    load_versioned_json,
+    mkdir_or_exist,
+    track_iter_progress,
+    track_parallel_iter_progress,
+)
+
+from .multi_label.packed_edge import PackedEdge, load_packed_edge
+
+__all__ = [
+    "GTStore",
+    "GTStoreWriter",
+    "open_gt_store",
+    "build_gt_store",
+    "gt_store_key",
+]
+
+# NOTE: bump when the layout of the entries changes
+STORE_VERSION = 1
+
+INDEX_FILE = "index.json"
+
+# arrays are aligned in the shards so that the views are aligned too
+_ALIGN = 64
+
+
+def gt_store_key(path, scale=None):
+    """Key of a GT file (and scale) in the store"""
+    path = osp.abspath(path)
+    if scale is None:
+        return path
+    return f"{path}@{float(scale)!r}"
+
+
+def _source_stat(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+class GTStoreWriter(object):
+    """Writes entries to a GT store
+
+    Entries are buffered until `shard_size` bytes, then written as a new shard.
+    The index is written when the writer is closed, so an interrupted compile
+    leaves the previous index intact. Opening an existing store appends to it.
+
+    Args:
+        root (str): directory of the store
+        shard_size (int): approximate size of a shard in bytes
+    """
+
+    def __init__(self, root, shard_size=2**28):
+        assert shard_size > 0, "ERR: `shard_size` should be positive"
+        self.root = root
+        self.shard_size = shard_size
+        mkdir_or_exist(root)
+        if osp.exists(osp.join(root, INDEX_FILE)):
+            index = load_versioned_json(
+                osp.join(root, INDEX_FILE), STORE_VERSION
+            )
+            self.shards = index["shards"]
+            self.entries = index["entries"]
+        else:
+            self.shards = []
+            self.entries = {}
+        self._buffer = []
+        self._nbytes = 0
+        self._pending = {}
+
+    def is_current(self, key, source):
+        """Whether `key` is stored and `source` didn't change since"""
+        entry = self._pending.get(key, self.entries.get(key))
+        if entry is None or entry["source"] != osp.abspath(source):
+            return False
+        try:
+            return entry["stat"] == _source_stat(source)
+        except OSError:
+            return False
+
+    def add(self, key, source, arrays, attrs=None):
+        """Add an entry
+
+        Args:
+            key (str): key of the entry (see `gt_store_key`)
+            source (str): source file of the entry (for staleness checks)
+            arrays (dict): named arrays of the entry
+            attrs (dict): other (json serializable) attributes
+        """
+        layout = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            pad = -self._nbytes % _ALIGN
+            if pad:
+                self._buffer.append(np.zeros(pad, dtype=np.uint8))
+                self._nbytes += pad
+            layout[name] = [self._nbytes, array.dtype.str, list(array.shape)]
+            self._buffer.append(array.reshape(-1).view(np.uint8))
+            self._nbytes += array.nbytes
+        self._pending[key] = dict(
+            source=osp.abspath(source),
+            stat=_source_stat(source),
+            arrays=layout,
+            attrs=attrs or {},
+        )
+        if self._nbytes >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered entries to a new shard"""
+        if not self._pending:
+            return
+        name = f"shard_{len(self.shards):05d}.npy"
+        buffer = np.concatenate(self._buffer)
+        atomic_write(
+            osp.join(self.root, name),
+            lambda f: np.save(f, buffer),
+            suffix=".npy.tmp",
+        )
+        self.shards.append(name)
+        for key, entry in self._pending.items():
+            entry["shard"] = name
+            self.entries[key] = entry
+        self._buffer = []
+        self._nbytes = 0
+        self._pending = {}
+
+    def close(self):
+        """Flush and write the index"""
+        self.flush()
+        index = dict(
+            version=STORE_VERSION,
+            shards=self.shards,
+            entries=self.entries,
+        )
+        atomic_write(
+            osp.join(self.root, INDEX_FILE),
+            lambda f: f.write(json.dumps(index).encode()),
+            suffix=".json.tmp",
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+
+class GTStore(object):
+    """Read-only view of a GT store
+
+    Use `open_gt_store` to share the instance (and the memory maps) within a
+    process.
+
+    Args:
+        root (str): directory of the store
+    """
+
+    def __init__(self, root):
+        self.root = root
+        index = load_versioned_json(osp.join(root, INDEX_FILE), STORE_VERSION)
+        self.entries = index["entries"]
+        self._shards = {}
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _shard(self, name):
+        shard = self._shards.get(name)
+        if shard is None:
+            shard = np.load(osp.join(self.root, name), mmap_mode="r")
+            self._shards[name] = shard
+        return shard
+
+    def get(self, key):
+        """Arrays (read-only views) and attributes of an entry"""
+        entry = self.entries.get(key)
+        assert (
+            entry is not None
+        ), f"ERR: {key} is not in the GT store {self.root} (compile it first)"
+        assert entry["stat"] == _source_stat(
+            entry["source"]
+        ), f"ERR: {entry['source']} changed after compiling the GT store {self.root}"
+        shard = self._shard(entry["shard"])
+        arrays = {}
+        for name, (offset, dtype, shape) in entry["arrays"].items():
+            dtype = np.dtype(dtype)
+            size = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+            arrays[name] = (
+                shard[offset : offset + size].view(dtype).reshape(shape)
+            )
+        return arrays, entry["attrs"]
+
+    def load_multilabel_edge(self, edge_path, scale, num_classes):
+        """Packed multi-label edge (same as `load_packed_edge`)"""
+        arrays, attrs = self.get(gt_store_key(edge_path, scale))
+        assert (
+            attrs["num_classes"] == num_classes
+        ), f"ERR: {edge_path} was stored with {attrs['num_classes']} classes"
+        return PackedEdge(
+            indices=arrays["indices"],
+            labels=arrays["labels"],
+            height=attrs["height"],
+            width=attrs["width"],
+            num_classes=num_classes,
+        )
+
+    def load_seg(self, seg_path, scale):
+        """Segmentation map resized to the scaled GT edge"""
+        arrays, _ = self.get(gt_store_key(seg_path, scale))
+        return arrays["seg"]
+
+    def load_bsds_gt(self, gt_path):
+        """BSDS boundaries (same as `load_bsds_gt_boundaries`)"""
+        arrays, attrs = self.get(gt_store_key(gt_path))
+        gts = np.unpackbits(arrays["boundaries"], axis=-1, count=attrs["width"])
+        return [gt for gt in gts]
+
+
+@lru_cache(maxsize=None)
+def _open_gt_store(root, mtime_ns):
+    return GTStore(root)
+
+
+def open_gt_store(root):
+    """Open a GT store (once per process and index version)"""
+    root = osp.abspath(root)
+    mtime_ns = os.stat(osp.join(root, INDEX_FILE)).st_mtime_ns
+    return _open_gt_store(root, mtime_ns)
+
+
+def _pack_multilabel(job):
+    edge_path = job["edge_path"]
+    scale = job["scale"]
+    num_classes = job["num_classes"]
+    edge = load_packed_edge(edge_path, scale, num_classes, use_cache=False)
+    entries = [
+        (
+            gt_store_key(edge_path, scale),
+            edge_path,
+            dict(indices=edge.indices, labels=edge.labels),
+            dict(
+                height=edge.height,
+                width=edge.width,
+                num_classes=num_classes,
+            ),
+        )
+    ]
+    seg_path = job.get("seg_path")
+    if seg_path is not None:
+        seg = Image.open(seg_path)
+        seg = seg.resize((edge.width, edge.height), Image.Resampling.NEAREST)
+        entries.append(
+            (
+                gt_store_key(seg_path, scale),
+                seg_path,
+                dict(seg=np.array(seg)),
+                {},
+            )
+        )
+    return entries
+
+
+def _pack_bsds(job):
+    from pyEdgeEval.datasets.bsds import load_bsds_gt_boundaries
+
+    gt_path = job["gt_path"]
+    gts = np.stack(load_bsds_gt_boundaries(gt_path)).astype(bool)
+    _, height, width = gts.shape
+    return [
+        (
+            gt_store_key(gt_path),
+            gt_path,
+            dict(boundaries=np.packbits(gts, axis=-1)),
+            dict(height=height, width=width),
+        )
+    ]
+
+
+_PACKERS = dict(
+    multilabel=_pack_multilabel,
+    bsds=_pack_bsds,
+)
+
+
+def _pack_job(job):
+    return _PACKERS[job["kind"]](job)
+
+
+def _job_sources(job):
+    if job["kind"] == "multilabel":
+        sources = [
+            (gt_store_key(job["edge_path"], job["scale"]), job["edge_path"])
+        ]
+        if job.get("seg_path") is not None:
+            sources.append(
+                (gt_store_key(job["seg_path"], job["scale"]), job["seg_path"])
+            )
+        return sources
+    elif job["kind"] == "bsds":
+        return [(gt_store_key(job["gt_path"]), job["gt_path"])]
+    raise ValueError(f"unknown GT store job: {job['kind']}")
+
+
+def build_gt_store(root, jobs, nproc=1, shard_size=2**28, pool=None):
+    """Compile GTs into a store
+
+    Entries that are already in the store (and up to date) are skipped, so
+    the same store can be extended with other scales, modes, or splits.
+
+    Args:
+        root (str): directory of the store
+        jobs (list): list of dicts; `kind="multilabel"` with `edge_path`,
+            `scale`, `num_classes` (and optionally `seg_path`) or
+            `kind="bsds"` with `gt_path`
+        nproc (int): number of processes for decoding
+        shard_size (int): approximate size of a shard in bytes
+        pool (WorkerPool): reuse a pool of workers
+
+    Returns:
+        int: number of compiled jobs
+    """
+    with GTStoreWriter(root, shard_size=shard_size) as writer:
+        jobs = [
+            job
+            for job in jobs
+            if not all(
+                writer.is_current(key, source)
+                for key, source in _job_sources(job)
+            )
+        ]
+        if len(jobs) == 0:
+            return 0
+
+        if nproc > 1 or pool is not None:
+            results = (
+                entries
+                for _, entries in track_parallel_iter_progress(
+                    _pack_job, jobs, nproc, pool=pool
+                )
+            )
+        else:
+            results = (_pack_job(job) for job in track_iter_progress(jobs))
+
+        for entries in results:
+            for key, source, arrays, attrs in entries:
+                writer.add(key, source, arrays, attrs)
+    return len(jobs)
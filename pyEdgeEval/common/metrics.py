@@ -9,6 +9,12 @@ __all__ = [
     "precision",
     "f1",
     "compute_rec_prec_f1",
+    "interpolated_max_scores",
+    "interpolated_max_scores_batch",
+    "average_precision",
+    "area_under_curve",
+    "compute_pr_metrics",
+    "PRMetricsAccumulator",
 ]
 
 
@@ -54,21 +60,316 @@ def interpolated_max_scores(
     rec,
     prec,
 ):
-    best_threshold = thresholds[0]
-    best_rec = rec[0]
-    best_prec = prec[0]
-    best_f1 = f1(best_prec, best_rec)
-
-    for i in range(1, len(thresholds)):
-        for d in np.linspace(0, 1, num=101):
-            t = thresholds[i] * d + thresholds[i - 1] * (1 - d)
-            r = rec[i] * d + rec[i - 1] * (1 - d)
-            p = prec[i] * d + prec[i - 1] * (1 - d)
-            f = f1(p, r)
-            if f > best_f1:
-                best_threshold = t
-                best_rec = r
-                best_prec = p
-                best_f1 = f
-
-    return best_threshold, best_rec, best_prec, best_f1
+    """Find the best F1 score along the (linearly interpolated) PR curve"""
+    best_threshold, best_rec, best_prec, best_f1 = (
+        interpolated_max_scores_batch(
+            thresholds, np.asarray(rec)[None], np.asarray(prec)[None]
+        )
+    )
+    return best_threshold[0], best_rec[0], best_prec[0], best_f1[0]
+
+
+def interpolated_max_scores_batch(
+    thresholds: np.ndarray,
+    rec: np.ndarray,
+    prec: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized `interpolated_max_scores` for a batch of PR curves
+
+    Each pair of consecutive thresholds is interpolated in 101 steps and the
+    first point with the highest F1 score is kept.
+
+    Args:
+        thresholds (np.ndarray): thresholds of shape `(n_thresholds,)`
+        rec (np.ndarray): recall of shape `(..., n_thresholds)`
+        prec (np.ndarray): precision of shape `(..., n_thresholds)`
+
+    Returns:
+        tuple `(threshold, rec, prec, f1)` of arrays of shape `(...)`
+    """
+    thresholds = np.asarray(thresholds)
+    rec = np.asarray(rec)
+    prec = np.asarray(prec)
+    d = np.linspace(0, 1, num=101)
+
+    def _interp(x):
+        # the first point followed by the interpolated points (same order
+        # as scanning the thresholds)
+        steps = x[..., 1:, None] * d + x[..., :-1, None] * (1 - d)
+        steps = steps.reshape(x.shape[:-1] + (-1,))
+        return np.concatenate([x[..., :1], steps], axis=-1)
+
+    t = _interp(thresholds)
+    r = _interp(rec)
+    p = _interp(prec)
+    f = f1(p, r)
+
+    # `argmax` returns the first occurrence of the highest score
+    best = np.argmax(f, axis=-1)[..., None]
+    return (
+        t[best[..., 0]],
+        np.take_along_axis(r, best, axis=-1)[..., 0],
+        np.take_along_axis(p, best, axis=-1)[..., 0],
+        np.take_along_axis(f, best, axis=-1)[..., 0],
+    )
+
+
+def average_precision(
+    rec: np.ndarray,
+    prec: np.ndarray,
+) -> np.ndarray:
+    """Average precision over 100 recall levels
+
+    Args:
+        rec (np.ndarray): recall of shape `(..., n_thresholds)`
+        prec (np.ndarray): precision of shape `(..., n_thresholds)`
+
+    Returns:
+        AP of shape `(...)`
+    """
+    rec = np.asarray(rec)
+    prec = np.asarray(prec)
+    levels = np.arange(0, 1, 0.01)
+
+    # best precision with a recall above each level
+    p = np.max(
+        np.broadcast_to(
+            prec[..., None, :], rec.shape[:-1] + levels.shape + rec.shape[-1:]
+        ),
+        axis=-1,
+        where=rec[..., None, :] >= levels[:, None],
+        initial=0,
+    )
+
+    # NOTE: `cumsum` adds the levels in order (same rounding as a loop)
+    return np.cumsum(p / 101, axis=-1)[..., -1]
+
+
+def area_under_curve(
+    rec: np.ndarray,
+    prec: np.ndarray,
+    prec_inc: float = 0.01,
+) -> np.ndarray:
+    """Area under the PR curve
+
+    Args:
+        rec (np.ndarray): recall of shape `(..., n_thresholds)`
+        prec (np.ndarray): precision of shape `(..., n_thresholds)`
+        prec_inc (float): step of the recall levels
+
+    Returns:
+        AUC of shape `(...)`
+    """
+    rec = np.asarray(rec, dtype=float)
+    prec = np.asarray(prec, dtype=float)
+    levels = np.arange(0, 1, prec_inc)
+    n = rec.shape[-1]
+    if n == 0:
+        return np.zeros(rec.shape[:-1])
+
+    # sorted recalls; the precision of a recall value is the one of its first
+    # occurrence (same as `np.unique`)
+    order = np.argsort(rec, axis=-1, kind="stable")
+    rec_s = np.take_along_axis(rec, order, axis=-1)
+    prec_s = np.take_along_axis(prec, order, axis=-1)
+    is_first = np.ones(rec_s.shape, dtype=bool)
+    is_first[..., 1:] = rec_s[..., 1:] != rec_s[..., :-1]
+    first = np.maximum.accumulate(np.where(is_first, np.arange(n), 0), axis=-1)
+
+    # last sorted recall <= each level (-1 if none): count the recalls by the
+    # first level that is not below them
+    n_levels = levels.shape[0]
+    pos = np.searchsorted(levels, rec_s, side="left").reshape(-1, n)
+    pos += np.arange(pos.shape[0])[:, None] * (n_levels + 1)
+    counts = np.bincount(pos.ravel(), minlength=pos.shape[0] * (n_levels + 1))
+    counts = counts.reshape(rec.shape[:-1] + (n_levels + 1,))
+    last = np.cumsum(counts[..., :-1], axis=-1) - 1
+    inside = last >= 0
+    lo = np.take_along_axis(first, np.maximum(last, 0), axis=-1)
+    hi = np.minimum(last + 1, n - 1)
+
+    # linear interpolation between the unique recalls (same as `np.interp`)
+    x0 = np.take_along_axis(rec_s, lo, axis=-1)
+    x1 = np.take_along_axis(rec_s, hi, axis=-1)
+    y0 = np.take_along_axis(prec_s, lo, axis=-1)
+    y1 = np.take_along_axis(prec_s, hi, axis=-1)
+    inner = inside & (last < n - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (y1 - y0) / (x1 - x0)
+        prec_interp = np.where(inner, slope * (levels - x0) + y0, 0.0)
+    # the largest recall itself (`right=0.0` above it)
+    prec_interp = np.where(
+        inside & ~inner & (levels == rec_s[..., -1:]), y0, prec_interp
+    )
+
+    # NOTE: the unique recall values differ between curves
+    n_unique = is_first.sum(axis=-1)
+    return np.where(n_unique > 1, prec_interp.sum(axis=-1) * prec_inc, 0.0)
+
+
+def _sum_samples(x):
+    """Sum over the samples (second to last axis) in order"""
+    if x.shape[-2] == 0:
+        return np.zeros(x.shape[:-2] + x.shape[-1:])
+    # NOTE: `cumsum` adds the samples in order (same rounding as a loop)
+    return np.cumsum(x, axis=-2)[..., -1, :]
+
+
+def _summarize(thresholds, counts, best_counts):
+    """Threshold and overall metrics from the summed counts
+
+    Args:
+        thresholds (np.ndarray): thresholds of shape `(n_thresholds,)`
+        counts: overall `(count_r, sum_r, count_p, sum_p)`, each of shape
+            `(..., n_thresholds)`
+        best_counts: `(count_r, sum_r, count_p, sum_p)` summed at the best
+            threshold of each sample, each of shape `(...)`
+    """
+    # OIS
+    rec_best, prec_best, f1_best = compute_rec_prec_f1(*best_counts)
+
+    # overall precision, recall and F1
+    rec_overall, prec_overall, f1_overall = compute_rec_prec_f1(*counts)
+    threshold_metrics = dict(
+        threshold=thresholds,
+        recall=rec_overall,
+        precision=prec_overall,
+        f1=f1_overall,
+    )
+
+    # ODS: interpolated best F1 score of the overall PR curve
+    (
+        best_threshold,
+        best_rec,
+        best_prec,
+        best_f1,
+    ) = interpolated_max_scores_batch(thresholds, rec_overall, prec_overall)
+
+    overall_metrics = dict(
+        ODS_threshold=best_threshold,
+        ODS_recall=best_rec,
+        ODS_precision=best_prec,
+        ODS_f1=best_f1,
+        OIS_recall=rec_best,
+        OIS_precision=prec_best,
+        OIS_f1=f1_best,
+        AUC=area_under_curve(rec_overall, prec_overall),
+        AP=average_precision(rec_overall, prec_overall),
+    )
+    return threshold_metrics, overall_metrics
+
+
+def compute_pr_metrics(
+    thresholds: np.ndarray,
+    count_r: np.ndarray,
+    sum_r: np.ndarray,
+    count_p: np.ndarray,
+    sum_p: np.ndarray,
+) -> Tuple[dict, dict, dict]:
+    """Compute the metrics of a batch of PR curves at once
+
+    Args:
+        thresholds (np.ndarray): thresholds of shape `(n_thresholds,)`
+        count_r, sum_r, count_p, sum_p (np.ndarray): per-sample counts of
+            shape `(..., n_samples, n_thresholds)` (e.g. `...` for categories)
+
+    Returns:
+        tuple `(sample_metrics, threshold_metrics, overall_metrics)` of dicts
+            of arrays with shapes `(..., n_samples)`, `(..., n_thresholds)`,
+            and `(...)`
+    """
+    thresholds = np.asarray(thresholds)
+    count_r = np.asarray(count_r, dtype=float)
+    sum_r = np.asarray(sum_r, dtype=float)
+    count_p = np.asarray(count_p, dtype=float)
+    sum_p = np.asarray(sum_p, dtype=float)
+
+    # best threshold of each sample
+    rec, prec, f = compute_rec_prec_f1(count_r, sum_r, count_p, sum_p)
+    best = np.argmax(f, axis=-1)[..., None]
+
+    def _best(x):
+        return np.take_along_axis(x, best, axis=-1)[..., 0]
+
+    sample_metrics = dict(
+        threshold=thresholds[best[..., 0]],
+        recall=_best(rec),
+        precision=_best(prec),
+        f1=_best(f),
+    )
+
+    # OIS: sum of the counts at the best threshold of each sample
+    best_counts = [
+        _sum_samples(_best(x)[..., None])[..., 0]
+        for x in (count_r, sum_r, count_p, sum_p)
+    ]
+
+    # overall counts
+    counts = [_sum_samples(x) for x in (count_r, sum_r, count_p, sum_p)]
+
+    threshold_metrics, overall_metrics = _summarize(
+        thresholds, counts, best_counts
+    )
+    return sample_metrics, threshold_metrics, overall_metrics
+
+
+class PRMetricsAccumulator(object):
+    """Running sums of the per-sample counts of (a batch of) PR curves
+
+    Samples can be added in any order (e.g. as they are evaluated), and the
+    metrics of the samples added so far can be computed at any time. Only
+    the sums are kept in memory. Since the counts are integers, the results
+    are the same as `compute_pr_metrics` on all the samples.
+
+    Args:
+        thresholds (np.ndarray): thresholds of shape `(n_thresholds,)`
+        shape (tuple): batch shape of the curves (e.g. `(n_categories,)`)
+    """
+
+    def __init__(self, thresholds, shape=()):
+        self.thresholds = np.asarray(thresholds)
+        self.shape = tuple(shape)
+        self.num_samples = 0
+        self.counts = np.zeros((4,) + self.shape + self.thresholds.shape)
+        self.best_counts = np.zeros((4,) + self.shape)
+
+    def update(self, count_r, sum_r, count_p, sum_p):
+        """Add the counts of a sample
+
+        Args:
+            count_r, sum_r, count_p, sum_p (np.ndarray): counts of the sample,
+                each of shape `shape + (n_thresholds,)`
+
+        Returns:
+            dict of the metrics of the sample at its best threshold (arrays of
+                shape `shape`)
+        """
+        counts = np.asarray(
+            [count_r, sum_r, count_p, sum_p], dtype=float
+        ).reshape(self.counts.shape)
+
+        rec, prec, f = compute_rec_prec_f1(*counts)
+        best = np.argmax(f, axis=-1)[..., None]
+
+        def _best(x):
+            return np.take_along_axis(x, best, axis=-1)[..., 0]
+
+        self.counts += counts
+        self.best_counts += np.stack([_best(x) for x in counts])
+        self.num_samples += 1
+
+        return dict(
+            threshold=self.thresholds[best[..., 0]],
+            recall=_best(rec),
+            precision=_best(prec),
+            f1=_best(f),
+        )
+
+    def compute(self):
+        """Threshold and overall metrics of the samples added so far
+
+        Returns:
+            tuple `(threshold_metrics, overall_metrics)` (same as
+                `compute_pr_metrics`)
+        """
+        return _summarize(self.thresholds, self.counts, self.best_counts)
@@ -1,9 +1,16 @@
 #!/usr/bin/env python
 
-from .calculate_metrics import calculate_metrics
+from .calculate_metrics import (
+    calculate_metrics,
+    calculate_metrics_all_categories,
+)
 from .evaluate_boundaries import (
     evaluate_boundaries_threshold,
 )
+from .evaluate_sample import (
+    evaluate_categories,
+    load_multilabel_gts,
+)
 from .edge_decoding import (
     binary_multilabel_decoding,
     load_scaled_edge,
@@ -14,6 +21,11 @@ from .edge_encoding import (
     default_multilabel_encoding,
     rgb_multilabel_encoding,
 )
+from .packed_edge import (
+    PackedEdge,
+    load_packed_edge,
+    clear_packed_edge_cache,
+)
 from .io import (
     save_category_results,
     save_sample_metrics,
@@ -28,11 +40,17 @@ from .utils import (
 
 __all__ = [
     "calculate_metrics",
+    "calculate_metrics_all_categories",
     "evaluate_boundaries_threshold",
+    "evaluate_categories",
+    "load_multilabel_gts",
     "binary_multilabel_decoding",
     "load_scaled_edge",
     "decode_png",
     "decode_tif",
+    "PackedEdge",
+    "load_packed_edge",
+    "clear_packed_edge_cache",
     "default_multilabel_encoding",
     "rgb_multilabel_encoding",
     "save_category_results",
@@ -1,18 +1,11 @@
 #!/usr/bin/env python3
 
-import numpy as np
+import functools
+from collections import OrderedDict
 
-from pyEdgeEval.common.metrics import (
-    compute_rec_prec_f1,
-    interpolated_max_scores,
-)
-from pyEdgeEval.common.utils import check_thresholds
-from pyEdgeEval.utils import (
-    track_parallel_progress,
-    track_progress,
-)
+from pyEdgeEval.common.stream_metrics import iter_eval_single, stream_metrics
 
-__all__ = ["calculate_metrics"]
+__all__ = ["calculate_metrics", "calculate_metrics_all_categories"]
 
 
 def calculate_metrics(
@@ -20,6 +13,11 @@ def calculate_metrics(
     thresholds,
     samples,
     nproc=8,
+    backend="process",
+    cache_dir=None,
+    cache_max_size=2**30,
+    callback=None,
+    pool=None,
 ):
     """Main function to calculate boundary metrics
 
@@ -28,141 +26,96 @@ def calculate_metrics(
         threhsolds (int, float, list, np.ndarray): thresholds used for evaluation
         samples (dict): list of dicts containing sample info
         nproc (int): integer that specifies the number of processes to spawn
+        backend (str): "process" (multiprocessing pool) or "thread" (thread
+            pool, no pickling of samples and results)
+        cache_dir (str): directory of the on-disk cache of per-sample results
+            (disabled if None)
+        cache_max_size (int): maximum size of the cache in bytes
+        callback (Callable): called with `(sample_result, accumulator)` as
+            soon as a sample is evaluated (e.g. to log partial metrics with
+            `accumulator.compute()`)
+        pool (WorkerPool): existing pool of workers (e.g. shared across
+            categories; `nproc` and `backend` are ignored)
 
     Returns:
         dict of metrics
     """
-
-    # initial run (process heavy)
-    if nproc > 1:
-        sample_metrics = track_parallel_progress(
-            eval_single,
-            samples,
-            nproc=nproc,
-            keep_order=True,
-        )
-    else:
-        sample_metrics = track_progress(
+    return stream_metrics(
+        iter_eval_single(
             eval_single,
             samples,
-        )
-
-    # check and convert
-    thresholds = check_thresholds(thresholds)
-
-    # initialize array
-    n_thresh = thresholds.shape[0]
-    count_r_overall = np.zeros((n_thresh,))
-    sum_r_overall = np.zeros((n_thresh,))
-    count_p_overall = np.zeros((n_thresh,))
-    sum_p_overall = np.zeros((n_thresh,))
-
-    # OIS scores
-    count_r_best = 0
-    sum_r_best = 0
-    count_p_best = 0
-    sum_p_best = 0
-
-    # calculate metrics
-    sample_results = []
-    for sample_index, sample_data in enumerate(samples):
-        count_r, sum_r, count_p, sum_p = sample_metrics[sample_index]
-
-        count_r_overall += count_r
-        sum_r_overall += sum_r
-        count_p_overall += count_p
-        sum_p_overall += sum_p
-
-        # Compute precision, recall and F1
-        rec, prec, f1 = compute_rec_prec_f1(count_r, sum_r, count_p, sum_p)
-
-        # best_thresh, best_rec, best_prec, best_f1 = interpolated_max_scores(thresholds, rec, prec)
-
-        # Find best F1 score
-        best_ndx = np.argmax(f1)
-
-        # Gather OIS metrics
-
-        count_r_best += count_r[best_ndx]
-        sum_r_best += sum_r[best_ndx]
-        count_p_best += count_p[best_ndx]
-        sum_p_best += sum_p[best_ndx]
-
-        sample_results.append(
-            dict(
-                name=sample_data["name"],
-                threshold=thresholds[best_ndx],
-                recall=rec[best_ndx],
-                precision=prec[best_ndx],
-                f1=f1[best_ndx],
-            )
-        )
-
-    # Computer overall precision, recall and F1
-    rec_overall, prec_overall, f1_overall = compute_rec_prec_f1(
-        count_r_overall, sum_r_overall, count_p_overall, sum_p_overall
-    )
-
-    # Interpolated way to find ODS scores
-    best_threshold, best_rec, best_prec, best_f1 = interpolated_max_scores(
-        thresholds, rec_overall, prec_overall
-    )
-
-    # Find best F1 score
-    # best_i_ovr = np.argmax(f1_overall)
-
-    threshold_results = []
-    for thresh_i in range(n_thresh):
-        threshold_results.append(
-            dict(
-                threshold=thresholds[thresh_i],
-                recall=rec_overall[thresh_i],
-                precision=prec_overall[thresh_i],
-                f1=f1_overall[thresh_i],
-            )
-        )
-
-    # Calculate AUC
-    prec_inc = 0.01  # hard-coded
-    rec_unique, rec_unique_ndx = np.unique(rec_overall, return_index=True)
-    prec_unique = prec_overall[rec_unique_ndx]
-    if rec_unique.shape[0] > 1:
-        prec_interp = np.interp(
-            np.arange(0, 1, prec_inc),
-            rec_unique,
-            prec_unique,
-            left=0.0,
-            right=0.0,
-        )
-        area_pr = prec_interp.sum() * prec_inc
-    else:
-        area_pr = 0.0
+            nproc,
+            backend,
+            cache_dir,
+            cache_max_size,
+            pool,
+        ),
+        thresholds=thresholds,
+        samples=samples,
+        shape=(),
+        callbacks=None if callback is None else [callback],
+    )[0]
+
+
+def calculate_metrics_all_categories(
+    eval_single,
+    thresholds,
+    samples,
+    categories,
+    nproc=8,
+    backend="process",
+    cache_dir=None,
+    cache_max_size=2**30,
+    callback=None,
+    pool=None,
+):
+    """Calculate boundary metrics for multiple categories in a single pass
 
-    # Calculate AP
-    ap = 0
-    for t in np.arange(0, 1, 0.01):
-        _r = rec_overall >= t
-        p = np.max(prec_overall[_r], initial=0)
-        ap = ap + p / 101
+    Each sample is evaluated once for all categories, so that the GT (and
+    segmentation map) only needs to be loaded and decoded once per sample.
 
-    # Calculate OIS metrics
-    rec_best, prec_best, f1_best = compute_rec_prec_f1(
-        float(count_r_best),
-        float(sum_r_best),
-        float(count_p_best),
-        float(sum_p_best),
-    )
+    Args:
+        eval_single (Callable): function that takes samples (dict) as input
+            and returns `(count_r, sum_r, count_p, sum_p)` where each entry
+            is an array of shape `(len(categories), n_thresholds)`
+        threhsolds (int, float, list, np.ndarray): thresholds used for evaluation
+        samples (dict): list of dicts containing sample info
+        categories (list): categories that are evaluated (same order as
+            the rows of the arrays returned by `eval_single`)
+        nproc (int): integer that specifies the number of processes to spawn
+        backend (str): "process" (multiprocessing pool) or "thread" (thread
+            pool, no pickling of samples and results)
+        cache_dir (str): directory of the on-disk cache of per-sample results
+            (disabled if None)
+        cache_max_size (int): maximum size of the cache in bytes
+        callback (Callable): called with `(category, sample_result,
+            accumulator)` as soon as a sample is evaluated
+        pool (WorkerPool): existing pool of workers (e.g. shared across
+            evaluations; `nproc` and `backend` are ignored)
 
-    overall_result = dict(
-        ODS_threshold=best_threshold,
-        ODS_recall=best_rec,
-        ODS_precision=best_prec,
-        ODS_f1=best_f1,
-        OIS_recall=rec_best,
-        OIS_precision=prec_best,
-        OIS_f1=f1_best,
-        AUC=area_pr,
-        AP=ap,
+    Returns:
+        dict of metrics for each category
+    """
+    callbacks = None
+    if callback is not None:
+        callbacks = [
+            functools.partial(callback, category) for category in categories
+        ]
+
+    # the metrics of all categories are computed at once
+    results = stream_metrics(
+        iter_eval_single(
+            eval_single,
+            samples,
+            nproc,
+            backend,
+            cache_dir,
+            cache_max_size,
+            pool,
+        ),
+        thresholds=thresholds,
+        samples=samples,
+        shape=(len(categories),),
+        callbacks=callbacks,
     )
-
-    return sample_results, threshold_results, overall_result
+    return OrderedDict(zip(categories, results))
@@ -4,10 +4,10 @@ from typing import Optional
 
 import numpy as np
 
-from pyEdgeEval._lib import correspond_pixels
-from pyEdgeEval.preprocess import binary_thin, fast_nms
+from pyEdgeEval._lib import correspond_pixels, correspond_pixels_sweep
+from pyEdgeEval.preprocess import binary_thin_sweep, fast_nms
 
-from .options import kill_internal_prediction
+from .options import get_kill_mask
 
 
 def evaluate_boundaries_threshold(
@@ -26,6 +26,7 @@ def evaluate_boundaries_threshold(
         m=1.01,
         half_prec=False,
     ),
+    kill_mask: Optional[np.ndarray] = None,
 ):
     """
     Evaluate the accuracy of a predicted boundary and a range of thresholds
@@ -49,6 +50,8 @@ def evaluate_boundaries_threshold(
             disregards all false positives if there are no boundaries in the GT
         apply_nms: (default=False) apply a fast nms preprocess
         nms_kwargs: arguments for nms process
+        kill_mask: precomputed mask from `get_kill_mask` for `kill_internal`
+            (computed from `gt` and `gt_seg` if None)
 
     Returns:
         tuple `(count_r, sum_r, count_p, sum_p, thresholds)` where each
@@ -78,39 +81,53 @@ def evaluate_boundaries_threshold(
             **nms_kwargs,
         )
 
-    for i_t, thresh in enumerate(list(thresholds)):
+    if kill_internal and gt.any():
+        # the kill mask doesn't depend on the threshold
+        if kill_mask is None:
+            assert isinstance(
+                gt_seg, np.ndarray
+            ), "ERR: `seg` is not np.ndarray"
+            kill_mask = get_kill_mask(gt=gt, seg=gt_seg, max_dist=max_dist)
+        assert kill_mask.shape == gt.shape
+    else:
+        kill_mask = None
+
+    if not apply_thinning:
+        # without thinning, the thresholded predictions are nested and the
+        # matching can be swept over all thresholds at once
+        if kill_mask is not None:
+            # killed pixels never pass a threshold
+            pred = np.where(kill_mask, pred, -np.inf)
+        for i_t, thresh in enumerate(list(thresholds)):
+            sum_p[i_t] = (pred >= thresh).sum()  # keep track of false positives
+        if gt.any():
+            count_p[:], count_r[:] = correspond_pixels_sweep(
+                pred, gt, thresholds, max_dist=max_dist
+            )
+            sum_r[:] = gt.sum()
+        return count_r, sum_r, count_p, sum_p
 
-        _pred = pred >= thresh
+    # thinned predictions for all thresholds
+    preds = binary_thin_sweep(pred, thresholds)
 
-        if apply_thinning:
-            _pred = binary_thin(_pred)
+    for i_t, _pred in enumerate(preds):
 
         # skip correspond pixels when gt is empty
         if gt.any():
-            if kill_internal:
-                assert isinstance(
-                    gt_seg, np.ndarray
-                ), "ERR: `seg` is not np.ndarray"
-                _pred = kill_internal_prediction(
-                    pred=_pred,
-                    gt=gt,
-                    seg=gt_seg,
-                    max_dist=max_dist,
-                )
-
-            match1, match2, cost, oc = correspond_pixels(
-                _pred, gt, max_dist=max_dist
+            if kill_mask is not None:
+                _pred = _pred & kill_mask
+
+            n_match1, n_match2, cost, oc = correspond_pixels(
+                _pred, gt, max_dist=max_dist, return_maps=False
             )
-            match1 = match1 > 0
-            match2 = match2 > 0
 
             # Recall
             sum_r[i_t] = gt.sum()
-            count_r[i_t] = match2.sum()
+            count_r[i_t] = n_match2
 
             # Precision
             sum_p[i_t] = _pred.sum()
-            count_p[i_t] = match1.sum()
+            count_p[i_t] = n_match1
         else:
             sum_r[i_t] = 0
             count_r[i_t] = 0
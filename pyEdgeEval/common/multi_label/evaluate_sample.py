@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+"""Per-sample evaluation shared by the multi-label datasets
+
+The datasets only differ in how the GTs and predictions are loaded; the GTs
+of a sample are loaded once and all the categories are evaluated from them.
+"""
+
+import numpy as np
+from PIL import Image
+
+from pyEdgeEval.common.utils import check_thresholds
+from pyEdgeEval.preprocess import fast_nms_batch
+
+from .evaluate_boundaries import evaluate_boundaries_threshold
+from .options import find_segments, get_kill_mask
+from .packed_edge import load_packed_edge
+
+__all__ = [
+    "NMS_KWARGS",
+    "load_seg",
+    "load_multilabel_gts",
+    "evaluate_categories",
+]
+
+# arguments of `fast_nms` used for the evaluation
+NMS_KWARGS = dict(
+    r=1,
+    s=5,
+    m=1.01,
+    half_prec=False,
+)
+
+
+def load_seg(seg_path, height, width):
+    """Load segmentation map and resize it to the GT's size"""
+    seg = Image.open(seg_path)
+    seg = seg.resize((width, height), Image.Resampling.NEAREST)
+    seg = np.array(seg)
+    return seg
+
+
+def load_multilabel_gts(
+    edge_path, seg_path, scale, num_classes, kill_internal, gt_store
+):
+    """Load the GT edge (bit-packed) and segmentation map of a sample
+
+    GTs are loaded from the GT store if given, otherwise decoded from the files
+    (and cached per process).
+    """
+    if gt_store:
+        # NOTE: imported here since the GT store depends on this package
+        from pyEdgeEval.common.gt_store import open_gt_store
+
+        store = open_gt_store(gt_store)
+        edge = store.load_multilabel_edge(edge_path, scale, num_classes)
+    else:
+        store = None
+        edge = load_packed_edge(edge_path, scale, num_classes)
+
+    seg = None
+    if kill_internal:
+        if store is not None:
+            seg = store.load_seg(seg_path, scale)
+        else:
+            _, height, width = edge.shape
+            seg = load_seg(seg_path, height, width)
+        assert edge.shape[1:] == seg.shape
+    return edge, seg
+
+
+def evaluate_categories(
+    edge,
+    seg,
+    pred_paths,
+    categories,
+    load_pred,
+    max_dist,
+    thresholds,
+    apply_thinning,
+    apply_nms,
+    kill_internal,
+    skip_if_nonexistent,
+):
+    """Evaluate the categories of a single sample
+
+    Args:
+        edge (PackedEdge): GT edges of the sample (all the classes)
+        seg (np.ndarray): segmentation map (class indices) or None
+        pred_paths (list): prediction of each category
+        categories (list): categories (indexed from 1)
+        load_pred (Callable): `load_pred(pred_path, height, width)` returns
+            the prediction resized to the GT's size
+
+    Returns:
+        tuple: `(count_r, sum_r, count_p, sum_p)` with a row per category
+    """
+    assert len(pred_paths) == len(categories)
+
+    # checks and converts thresholds
+    thresholds = check_thresholds(thresholds)
+
+    _, height, width = edge.shape
+
+    nms_preds = {}
+    if apply_nms:
+        # nms for all the categories at once (skipped categories don't need it)
+        present = edge.present()
+        nms_idx = [
+            i
+            for i, category in enumerate(categories)
+            if present[category - 1] or not skip_if_nonexistent
+        ]
+        preds = np.empty((len(nms_idx), height, width))
+        for j, i in enumerate(nms_idx):
+            preds[j] = load_pred(pred_paths[i], height, width)
+        fast_nms_batch(preds, out=preds, **NMS_KWARGS)
+        nms_preds = dict(zip(nms_idx, preds))
+
+    segments = None
+    if kill_internal:
+        # bounding boxes of the segments of all the categories (a single
+        # pass over the segmentation map for the whole sample)
+        segments = find_segments(seg, len(edge))
+
+    shape = (len(categories), thresholds.shape[0])
+    count_r = np.zeros(shape)
+    sum_r = np.zeros(shape)
+    count_p = np.zeros(shape)
+    sum_p = np.zeros(shape)
+
+    for i, (category, pred_path) in enumerate(zip(categories, pred_paths)):
+        cat_idx = category - 1
+        cat_edge = edge[cat_idx]  # decoded on demand
+
+        # load pred
+        pred = nms_preds.get(i)
+        if pred is None:
+            pred = load_pred(pred_path, height, width)
+
+        # need to be careful where the category starts
+        # some datasets will skip 0 and start from 1 (like sbd)
+        kill_mask = None
+        box = segments[cat_idx] if kill_internal else None
+        if box is not None and cat_edge.any():
+            # the distance transform is only computed around the segment
+            kill_mask = get_kill_mask(
+                gt=cat_edge,
+                seg=seg[box] == cat_idx,
+                max_dist=max_dist,
+                box=box,
+            )
+
+        # evaluate multi-label boundaries
+        (
+            count_r[i],
+            sum_r[i],
+            count_p[i],
+            sum_p[i],
+        ) = evaluate_boundaries_threshold(
+            thresholds=thresholds,
+            pred=pred,
+            gt=cat_edge,
+            max_dist=max_dist,
+            apply_thinning=apply_thinning,
+            # nothing is killed without the category's segment
+            kill_internal=kill_mask is not None,
+            skip_if_nonexistent=skip_if_nonexistent,
+            apply_nms=apply_nms and i not in nms_preds,
+            nms_kwargs=NMS_KWARGS,
+            kill_mask=kill_mask,
+        )
+
+    return count_r, sum_r, count_p, sum_p
@@ -1,7 +1,78 @@
 #!/usr/bin/env python3
 
 import numpy as np
-from scipy.ndimage import distance_transform_edt
+from scipy.ndimage import distance_transform_edt, find_objects
+
+
+def find_segments(seg: np.ndarray, num_labels: int):
+    """Bounding boxes of the segments of a segmentation map
+
+    All the labels are found in a single pass over `seg`.
+
+    Returns:
+        list of the bounding box (tuple of slices) of each label in
+            `range(num_labels)`, None if the label is not in `seg`
+    """
+    # labels outside of `range(num_labels)` (e.g. ignore) are skipped
+    return find_objects(seg.astype(np.int64) + 1, max_label=num_labels)
+
+
+def get_kill_mask(
+    gt: np.ndarray,
+    seg: np.ndarray,
+    max_dist: float = 0.02,
+    box=None,
+) -> np.ndarray:
+    """Mask of the pixels that are kept by `kill_internal_prediction`
+
+    The mask only depends on `gt`, `seg` (binary mask) and `max_dist`, so it
+    can be computed once per sample and category and applied to the
+    predictions of every threshold.
+
+    The distance transform is only computed around `seg` (the bounding box
+    of `seg` padded by the matching distance), which gives the same mask as
+    the distance transform of the whole image.
+
+    If the bounding box of `seg` is known (e.g. from `find_segments` for all
+    the categories of a sample), `box` is the bounding box and `seg` is only
+    the part of the mask inside of it (`seg[box]`).
+    """
+    diag = np.sqrt(gt.shape[0] ** 2 + gt.shape[1] ** 2)
+    buffer = diag * max_dist
+
+    keep = np.ones(gt.shape, dtype=bool)
+    seg = seg.astype(bool)
+    if box is None:
+        ys, xs = np.nonzero(seg)
+        if len(ys) == 0:
+            return keep
+        box = (
+            slice(ys.min(), ys.max() + 1),
+            slice(xs.min(), xs.max() + 1),
+        )
+        seg = seg[box]
+    assert seg.shape == gt[box].shape
+
+    # only GT pixels within `buffer` of `seg` affect the mask
+    pad = int(np.ceil(buffer)) + 1
+    y0, y1 = max(box[0].start - pad, 0), min(box[0].stop + pad, gt.shape[0])
+    x0, x1 = max(box[1].start - pad, 0), min(box[1].stop + pad, gt.shape[1])
+    _gt = gt[y0:y1, x0:x1]
+    _seg = np.zeros(_gt.shape, dtype=bool)
+    _seg[
+        box[0].start - y0 : box[0].stop - y0,
+        box[1].start - x0 : box[1].stop - x0,
+    ] = seg
+
+    if _gt.any():
+        # buggy output when input is only 0s or 1s
+        distmap = distance_transform_edt(1 - _gt)
+        far = distmap > buffer
+    else:
+        # no GT pixels near `seg`
+        far = np.ones(_gt.shape, dtype=bool)
+    keep[y0:y1, x0:x1] = np.invert(far * _seg)
+    return keep
 
 
 def kill_internal_prediction(
@@ -15,11 +86,6 @@ def kill_internal_prediction(
     NOTE: the distance transform may differ from MATLAB implementation
     NOTE: might not work correctly when using instance sensitive boundaries
     """
-    diag = np.sqrt(pred.shape[0] ** 2 + pred.shape[1] ** 2)
-    buffer = diag * max_dist
-
-    # buggy output when input is only 0s or 1s
-    distmap = distance_transform_edt(1 - gt)
-    killmask = np.invert((distmap > buffer) * seg)
+    killmask = get_kill_mask(gt=gt, seg=seg, max_dist=max_dist)
     assert killmask.shape == pred.shape
     return pred * killmask
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+"""Compact in-memory representation of multi-label edges
+
+`decode_png` expands the 24-bit RGB edge image into a `(num_classes, H, W)`
+uint8 array, which is much larger than the information it holds (most of the
+pixels are not edges). `PackedEdge` only stores the edge pixels together with
+their bit-encoded labels, and decodes the map of a class on demand.
+"""
+
+import os
+
+import numpy as np
+from PIL import Image
+
+from pyEdgeEval.common.cache import MemoryLRU
+
+from .edge_decoding import load_scaled_edge
+
+__all__ = ["PackedEdge", "load_packed_edge", "clear_packed_edge_cache"]
+
+
+def _label_dtype(num_classes):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if num_classes <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"num_classes={num_classes} doesn't fit in 32 bits")
+
+
+class PackedEdge(object):
+    """Sparse, bit-packed multi-label edge
+
+    Bit `k` of the label of a pixel is the edge of class `k` (same as
+    `rgb_multilabel_encoding`).
+
+    Args:
+        indices (np.ndarray): flat indices of the pixels with at least one label
+        labels (np.ndarray): bit-encoded labels of these pixels
+        height (int): height of the edge map
+        width (int): width of the edge map
+        num_classes (int): number of classes
+    """
+
+    def __init__(self, indices, labels, height, width, num_classes):
+        assert indices.shape == labels.shape
+        self.indices = indices
+        self.labels = labels
+        self.height = height
+        self.width = width
+        self.num_classes = num_classes
+
+    @classmethod
+    def from_words(cls, words, num_classes):
+        """Pack a `(H, W)` array of bit-encoded labels"""
+        height, width = words.shape
+        mask = (1 << num_classes) - 1
+        words = words.astype(np.uint32).ravel() & np.uint32(mask)
+        indices = np.flatnonzero(words)
+        index_dtype = np.uint32 if words.size <= 2**32 else np.int64
+        return cls(
+            indices=indices.astype(index_dtype),
+            labels=words[indices].astype(_label_dtype(num_classes)),
+            height=height,
+            width=width,
+            num_classes=num_classes,
+        )
+
+    @classmethod
+    def from_png(cls, edge, num_classes):
+        """Pack an RGB encoded edge (same classes as `decode_png`)"""
+        edge = np.asarray(edge, dtype=np.uint8)
+        if edge.ndim == 2:
+            edge = edge[:, :, None]
+        # the first channel holds the most significant bits
+        words = np.zeros(edge.shape[:2], dtype=np.uint32)
+        for c in range(edge.shape[2]):
+            words = (words << np.uint32(8)) | edge[:, :, c]
+        return cls.from_words(words, num_classes)
+
+    @classmethod
+    def from_tif(cls, edge, num_classes):
+        """Pack a 32-bit encoded edge (same classes as `decode_tif`)"""
+        words = np.asarray(edge).astype(np.uint32)  # int32 -> uint32
+        return cls.from_words(words, num_classes)
+
+    @property
+    def shape(self):
+        """Shape of the decoded edge `(num_classes, H, W)`"""
+        return (self.num_classes, self.height, self.width)
+
+    @property
+    def nbytes(self):
+        return self.indices.nbytes + self.labels.nbytes
+
+    def __len__(self):
+        return self.num_classes
+
+    def __getitem__(self, cat_idx):
+        """Edge map of a class as a `(H, W)` uint8 array"""
+        if not 0 <= cat_idx < self.num_classes:
+            raise IndexError(
+                f"class index {cat_idx} is out of range ({self.num_classes})"
+            )
+        edge = np.zeros(self.height * self.width, dtype=np.uint8)
+        on = (self.labels >> cat_idx) & 1
+        edge[self.indices[on.astype(bool)]] = 1
+        return edge.reshape(self.height, self.width)
+
+    def present(self):
+        """Whether each class has edge pixels, as a `(num_classes,)` bool array"""
+        words = int(np.bitwise_or.reduce(self.labels))
+        return (words >> np.arange(self.num_classes)) & 1 == 1
+
+    def decode(self):
+        """Decode all the classes (same as `decode_png`)"""
+        return np.stack([self[i] for i in range(self.num_classes)])
+
+
+# NOTE: each worker process has its own cache
+_CACHE = MemoryLRU(max_bytes=2**29)
+
+
+def load_packed_edge(edge_path, scale, num_classes, use_cache=True):
+    """Load, scale, and pack a multi-label edge PNG
+
+    The packed edges are kept in a per-process LRU keyed by the path (and
+    modification time) and the scale, so the GTs only need to be decoded once
+    per worker.
+
+    Args:
+        edge_path (str): path to the RGB encoded edge
+        scale (float): scale of the edge (nearest neighbour resize)
+        num_classes (int): number of classes
+        use_cache (bool): use the per-process LRU
+
+    Returns:
+        PackedEdge
+    """
+    key = (edge_path, os.stat(edge_path).st_mtime_ns, scale, num_classes)
+    if use_cache:
+        edge = _CACHE.get(key)
+        if edge is not None:
+            return edge
+
+    edge, _ = load_scaled_edge(edge_path, scale)
+    if isinstance(edge, Image.Image):
+        edge = np.array(edge, dtype=np.uint8)
+    edge = PackedEdge.from_png(edge, num_classes)
+
+    if use_cache:
+        _CACHE.put(key, edge)
+    return edge
+
+
+def clear_packed_edge_cache():
+    """Clear the per-process LRU of `load_packed_edge`"""
+    _CACHE.clear()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+"""Streaming reduction of the per-sample counts
+
+Shared by the binary and multi-label `calculate_metrics`: the samples are
+evaluated (possibly in parallel and cached) and their counts are reduced into
+sample, threshold, and overall metrics as soon as they arrive.
+"""
+
+import numpy as np
+
+from pyEdgeEval.common.batching import track_eval_progress
+from pyEdgeEval.common.cache import CachedEvalSingle
+from pyEdgeEval.common.metrics import PRMetricsAccumulator
+from pyEdgeEval.common.utils import check_thresholds
+
+__all__ = ["iter_eval_single", "stream_metrics"]
+
+
+def iter_eval_single(
+    eval_single,
+    samples,
+    nproc,
+    backend="process",
+    cache_dir=None,
+    cache_max_size=2**30,
+    pool=None,
+):
+    """Run `eval_single` on every sample and yield `(index, counts)` as soon
+    as each sample is evaluated"""
+    if cache_dir is not None:
+        # skip `eval_single` for samples that were already evaluated
+        eval_single = CachedEvalSingle(
+            eval_single, cache_dir, max_size=cache_max_size
+        )
+
+    # initial run (process heavy)
+    yield from track_eval_progress(
+        eval_single,
+        samples,
+        nproc=nproc,
+        backend=backend,
+        pool=pool,
+    )
+
+    if cache_dir is not None:
+        eval_single.evict()
+
+
+class _CurveAccumulator(object):
+    """View of a single curve of a `PRMetricsAccumulator` (for callbacks)"""
+
+    def __init__(self, accumulator, index):
+        self.accumulator = accumulator
+        self.index = index
+
+    @property
+    def num_samples(self):
+        return self.accumulator.num_samples
+
+    def compute(self):
+        threshold_metrics, overall_metrics = self.accumulator.compute()
+        return (
+            {
+                k: v if k == "threshold" else v[self.index]
+                for k, v in threshold_metrics.items()
+            },
+            {k: v[self.index] for k, v in overall_metrics.items()},
+        )
+
+
+def stream_metrics(
+    results,
+    thresholds,
+    samples,
+    shape,
+    callbacks=None,
+):
+    """Reduce the per-sample counts into sample, threshold, and overall metrics
+
+    The counts are consumed as they arrive and only their running sums are
+    kept in memory.
+
+    Args:
+        results (Iterable): `(index, (count_r, sum_r, count_p, sum_p))` of each
+            sample (in any order) where each entry has shape
+            `shape + (n_thresholds,)`
+        thresholds (int, float, list, np.ndarray): thresholds used for evaluation
+        samples (list): list of dicts containing sample info
+        shape (tuple): batch shape of the PR curves (e.g. `(n_categories,)`)
+        callbacks (list): callback of each curve, called with
+            `(sample_result, accumulator)` (the `PRMetricsAccumulator` itself
+            for a single curve, a view of the curve otherwise)
+
+    Returns:
+        list of `(sample_results, threshold_results, overall_result)` for
+            each curve
+    """
+
+    # check and convert
+    thresholds = check_thresholds(thresholds)
+    n_thresh = thresholds.shape[0]
+    num_curves = int(np.prod(shape))
+
+    accumulator = PRMetricsAccumulator(thresholds, shape=shape)
+    if shape == ():
+        curve_accumulators = [accumulator]
+    else:
+        curve_accumulators = [
+            _CurveAccumulator(accumulator, np.unravel_index(i, shape))
+            for i in range(num_curves)
+        ]
+
+    # keep the order of the samples
+    sample_results = [[None] * len(samples) for _ in range(num_curves)]
+    for sample_index, metrics in results:
+        metrics = accumulator.update(*metrics)
+        for i in range(num_curves):
+            idx = np.unravel_index(i, shape)
+            sample_result = dict(
+                name=samples[sample_index]["name"],
+                threshold=metrics["threshold"][idx],
+                recall=metrics["recall"][idx],
+                precision=metrics["precision"][idx],
+                f1=metrics["f1"][idx],
+            )
+            sample_results[i][sample_index] = sample_result
+            if callbacks is not None:
+                callbacks[i](sample_result, curve_accumulators[i])
+
+    threshold_metrics, overall_metrics = accumulator.compute()
+
+    outputs = []
+    for i in range(num_curves):
+        idx = np.unravel_index(i, shape)
+        threshold_results = []
+        for thresh_i in range(n_thresh):
+            threshold_results.append(
+                dict(
+                    threshold=thresholds[thresh_i],
+                    recall=threshold_metrics["recall"][idx][thresh_i],
+                    precision=threshold_metrics["precision"][idx][thresh_i],
+                    f1=threshold_metrics["f1"][idx][thresh_i],
+                )
+            )
+
+        overall_result = {k: v[idx] for k, v in overall_metrics.items()}
+
+        outputs.append((sample_results[i], threshold_results, overall_result))
+
+    return outputs
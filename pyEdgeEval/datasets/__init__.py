@@ -4,13 +4,19 @@
 from .bsds import bsds_eval_single
 
 # multilabel edge
-from .cityscapes import cityscapes_eval_single
-from .sbd import sbd_eval_single
-from .otf_cityscapes import otf_cityscapes_eval_single
+from .cityscapes import cityscapes_eval_single, cityscapes_eval_single_all
+from .sbd import sbd_eval_single, sbd_eval_single_all
+from .otf_cityscapes import (
+    otf_cityscapes_eval_single,
+    otf_cityscapes_eval_single_all,
+)
 
 __all__ = [
     "bsds_eval_single",
     "cityscapes_eval_single",
+    "cityscapes_eval_single_all",
     "sbd_eval_single",
+    "sbd_eval_single_all",
     "otf_cityscapes_eval_single",
+    "otf_cityscapes_eval_single_all",
 ]
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 
+import os.path as osp
+
 import numpy as np
 from skimage.util import img_as_float
 from skimage.io import imread
@@ -7,17 +9,70 @@ from skimage.io import imread
 from pyEdgeEval.common.binary_label.evaluate_boundaries import (
     evaluate_boundaries_threshold_multiple_gts,
 )
+from pyEdgeEval.common.gt_store import open_gt_store
 from pyEdgeEval.common.utils import check_thresholds
-from pyEdgeEval.utils import loadmat
+from pyEdgeEval.utils import atomic_write, loadmat, mkdir_or_exist
+
+# packed GT files: fixed-size header (magic, n_annotators, height, width)
+# followed by the boundaries of all the annotators packed along the width
+PACKED_GT_SUFFIX = ".bin"
+_PACKED_GT_MAGIC = b"BSDSGT01"
+_PACKED_GT_HEADER_SIZE = 64
+
+
+def save_bsds_gt_packed(path: str, gts):
+    """Save the boundaries of all the annotators in a single packed file
+
+    The boundaries are stacked and bit-packed, so that the file is small and
+    can be memory mapped by `load_bsds_gt_packed`.
+    """
+    gts = np.stack([np.asarray(gt) != 0 for gt in gts])
+    n, h, w = gts.shape
+    header = np.zeros(_PACKED_GT_HEADER_SIZE, dtype=np.uint8)
+    header[: len(_PACKED_GT_MAGIC)] = np.frombuffer(
+        _PACKED_GT_MAGIC, dtype=np.uint8
+    )
+    header[8:20] = np.array([n, h, w], dtype="<u4").view(np.uint8)
+
+    def _write(f):
+        f.write(header.tobytes())
+        f.write(np.packbits(gts, axis=-1).tobytes())
+
+    mkdir_or_exist(osp.dirname(osp.abspath(path)))
+    atomic_write(path, _write, suffix=f"{PACKED_GT_SUFFIX}.tmp")
+
+
+def load_bsds_gt_packed(path: str):
+    """Load the boundaries saved by `save_bsds_gt_packed`
+
+    Returns:
+        np.ndarray: (n_annotators, H, W) bool array
+    """
+    buf = np.memmap(path, dtype=np.uint8, mode="r")
+    header = buf[:_PACKED_GT_HEADER_SIZE]
+    assert (
+        header[: len(_PACKED_GT_MAGIC)].tobytes() == _PACKED_GT_MAGIC
+    ), f"ERR: {path} is not a packed BSDS GT"
+    n, h, w = (int(v) for v in np.asarray(header[8:20]).view("<u4"))
+    packed = buf[_PACKED_GT_HEADER_SIZE:].reshape(n, h, (w + 7) // 8)
+    return np.unpackbits(packed, axis=-1, count=w).view(bool)
+
+
+def convert_bsds_gt(mat_path: str, save_path: str):
+    """Convert a `.mat` GT to a packed GT"""
+    save_bsds_gt_packed(save_path, load_bsds_gt_boundaries(mat_path))
 
 
 def load_bsds_gt_boundaries(path: str, new_loader: bool = False):
     """BSDS GT Boundaries
 
     - there are multiple boundaries because there are multiple annotators
-    - uint8
+    - uint8 (bool for packed GTs)
     """
-    if new_loader:
+    if path.endswith(PACKED_GT_SUFFIX):
+        # (n_annotators, H, W); iterating gives the boundaries of each annotator
+        return load_bsds_gt_packed(path)
+    elif new_loader:
         from pymatreader import read_mat
 
         gt = read_mat(path)["groundTruth"]  # list
@@ -46,6 +101,7 @@ def _evaluate_single(
     thresholds,
     apply_thinning,
     apply_nms,
+    gt_store=None,
     **kwargs,
 ):
     """Evaluate a single sample (sub-routine)
@@ -56,7 +112,10 @@ def _evaluate_single(
     thresholds = check_thresholds(thresholds)
 
     pred = load_predictions(pred_path)
-    gts = load_bsds_gt_boundaries(gt_path)
+    if gt_store:
+        gts = open_gt_store(gt_store).load_bsds_gt(gt_path)
+    else:
+        gts = load_bsds_gt_boundaries(gt_path)
 
     # TODO: scale inputs
 
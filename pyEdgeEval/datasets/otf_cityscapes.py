@@ -1,20 +1,21 @@
 #!/usr/bin/env python3
 
+import os
+
 import numpy as np
 from PIL import Image
 
-from pyEdgeEval.common.multi_label.evaluate_boundaries import (
-    evaluate_boundaries_threshold,
-)
+from pyEdgeEval.common.cache import MemoryLRU
+from pyEdgeEval.common.multi_label import PackedEdge
+from pyEdgeEval.common.multi_label.evaluate_sample import evaluate_categories
 from pyEdgeEval.datasets.cityscapes_attributes import (
     CITYSCAPES_labelIds,
     CITYSCAPES_label2trainId,
     CITYSCAPES_inst_labelIds,
 )
-from pyEdgeEval.common.utils import check_thresholds
+from pyEdgeEval.datasets.cityscapes import load_pred
 from pyEdgeEval.utils import (
     mask2bdry,
-    mask2onehot,
     mask_label2trainId,
     # edge_label2trainId,
 )
@@ -119,114 +120,232 @@ def one_label_instance_mask2edge(
     return edge
 
 
-def _evaluate_single(
+def label_instances(inst_mask, inst_labelIds):
+    """Lookup dictionary `{label: [instance ids]}` of an instance map
+
+    Instance ids are `label * 1000 + instance` (e.g. 26001 for a car).
+    """
+    ids = np.unique(inst_mask)
+    ids = ids[ids >= min(inst_labelIds) * 1000]  # 24000
+    label_inst = {}
+    for iid in ids.tolist():
+        label_inst.setdefault(iid // 1000, []).append(iid)
+    return label_inst
+
+
+def all_labels_mask2edge(
+    seg_label,
+    label2trainId,
+    ignore_indices,
+    radius,
+    inst_mask=None,
+    inst_labelIds=None,
+    use_cv2=True,
+    quality=0,
+):
+    """Edges of all the classes from a single label (and instance) map
+
+    Same edges as `one_label_mask2edge` (or `one_label_instance_mask2edge` if
+    `inst_mask` is given) for each label, but the ignore mask and the instance
+    lookup are only computed once.
+
+    Returns:
+        PackedEdge: edges indexed by trainIds
+    """
+    h, w = seg_label.shape
+    ignore_mask = np.zeros((h, w), dtype=np.uint8)
+    for i in ignore_indices:
+        ignore_mask += (seg_label == i).astype(np.uint8)
+
+    label_inst = {}
+    if inst_mask is not None:
+        label_inst = label_instances(inst_mask, inst_labelIds)
+
+    args = dict(
+        ignore_mask=ignore_mask,
+        radius=radius,
+        use_cv2=use_cv2,
+        quality=quality,
+    )
+
+    words = np.zeros((h, w), dtype=np.uint32)
+    for label, trainId in label2trainId.items():
+        if label in ignore_indices:
+            continue
+        m = (seg_label == label).astype(np.uint8)
+        if not np.count_nonzero(m):
+            continue
+
+        edge = mask2bdry(mask=m, **args)
+
+        # per instance boundaries
+        for iid in label_inst.get(label, []):
+            edge = edge | mask2bdry(mask=inst_mask == iid, **args)
+
+        words |= edge.astype(np.uint32) << np.uint32(trainId)
+
+    return PackedEdge.from_words(words, num_classes=len(label2trainId))
+
+
+class OTFSample(object):
+    """GT edges (all the classes) and segmentation map (trainIds) of a sample"""
+
+    def __init__(self, edge, seg):
+        self.edge = edge
+        self.seg = seg
+
+    @property
+    def nbytes(self):
+        return self.edge.nbytes + self.seg.nbytes
+
+
+# NOTE: each worker process has its own cache
+_CACHE = MemoryLRU(max_bytes=2**29)
+
+
+def load_otf_sample(
     seg_path,
     inst_path,
-    pred_path,
-    category,
     scale,
-    max_dist,
-    thresholds,
-    apply_thinning,
-    apply_nms,
-    kill_internal,
-    skip_if_nonexistent,
     radius,
-    labels=CITYSCAPES_labelIds,
     ignore_indices=[2, 3],
-    **kwargs,
+    use_cache=True,
 ):
-    """Evaluate a single sample (sub-routine)
-
-    NOTE: don't set defaults for easier debugging
+    """Generate the GTs of a sample (all the classes at once)
+
+    The label (and instance) maps are loaded and rescaled once, and the edges
+    of all the classes are generated from them. The GTs are kept in a
+    per-process LRU, so evaluating the categories one by one only generates
+    them once per worker.
+
+    Args:
+        seg_path (str): path to the label map (labelIds)
+        inst_path (str): path to the instance map (None for
+            instance-insensitive edges)
+        scale (float): scale of the GTs (the maps are rescaled first)
+        radius (int): radius of the edges
+        ignore_indices (list): labelIds that are ignored
+        use_cache (bool): use the per-process LRU
+
+    Returns:
+        OTFSample
     """
-    # checks and converts thresholds
-    thresholds = check_thresholds(thresholds)
-
-    cat_idx = category - 1  # category is indexed from 1
-
-    # get corresponding label
-    label = CITYSCAPES_trainId2label[cat_idx]
+    key = (
+        seg_path,
+        os.stat(seg_path).st_mtime_ns,
+        inst_path,
+        os.stat(inst_path).st_mtime_ns if inst_path else None,
+        scale,
+        radius,
+        tuple(ignore_indices),
+    )
+    if use_cache:
+        sample = _CACHE.get(key)
+        if sample is not None:
+            return sample
 
     # load everything (not trainIds)
     seg_label = Image.open(seg_path)
-    # _seg = np.array(seg_label)
-    # h, w = _seg.shape
     w, h = seg_label.size
     height, width = int(h * scale + 0.5), int(w * scale + 0.5)
-    pred = Image.open(pred_path)
 
     # rescale
     seg_label = seg_label.resize((width, height), Image.Resampling.NEAREST)
-    pred = pred.resize((width, height), Image.Resampling.NEAREST)
-
     seg_label = np.array(seg_label)
-    pred = np.array(pred)
-    pred = (pred / 255).astype(float)
 
-    # convert to onehot
-    onehot_mask = mask2onehot(seg_label, labels=labels)
-
-    # generate edge
+    inst_mask = None
     if inst_path:
         inst_mask = Image.open(inst_path)
         inst_mask = inst_mask.resize((width, height), Image.Resampling.NEAREST)
         inst_mask = np.array(inst_mask)
-        edge = one_label_instance_mask2edge(
-            label=label,
-            mask=onehot_mask,
-            inst_mask=inst_mask,
-            inst_labelIds=CITYSCAPES_inst_labelIds,
-            ignore_indices=ignore_indices,
-            radius=radius,
-        )
-    else:
-        edge = one_label_mask2edge(
-            label=label,
-            mask=onehot_mask,
-            ignore_indices=ignore_indices,
-            radius=radius,
-        )
-
-    # convert to trainIds (edge and segmentation)
-    # edge = edge_label2trainId(edge=edge_label, label2trainId=label2trainId)
+
+    # generate edges
+    edge = all_labels_mask2edge(
+        seg_label=seg_label,
+        label2trainId=CITYSCAPES_label2trainId,
+        ignore_indices=ignore_indices,
+        radius=radius,
+        inst_mask=inst_mask,
+        inst_labelIds=CITYSCAPES_inst_labelIds,
+    )
+
+    # convert to trainIds (segmentation)
     seg = mask_label2trainId(
         mask=seg_label, label2trainId=CITYSCAPES_label2trainId
     )
 
-    # cat_edge = edge[cat_idx, :, :]
-    if kill_internal:
-        # load segmentation map
-        assert edge.shape == seg.shape
-        # obtain binary map
-        # need to be careful where the category starts
-        # some datasets will skip 0 and start from 1 (like sbd)
-        cat_seg = seg == cat_idx
-    else:
-        cat_seg = None
-
-    # evaluate multi-label boundaries
-    count_r, sum_r, count_p, sum_p = evaluate_boundaries_threshold(
-        thresholds=thresholds,
-        pred=pred,
-        gt=edge,
-        gt_seg=cat_seg,
+    sample = OTFSample(edge=edge, seg=seg)
+    if use_cache:
+        _CACHE.put(key, sample)
+    return sample
+
+
+def clear_otf_sample_cache():
+    """Clear the per-process LRU of `load_otf_sample`"""
+    _CACHE.clear()
+
+
+def _evaluate_single(pred_path, category, **kwargs):
+    """Evaluate a single sample (sub-routine)
+
+    NOTE: don't set defaults for easier debugging
+    """
+    results = _evaluate_single_all(
+        pred_paths=[pred_path], categories=[category], **kwargs
+    )
+    return tuple(result[0] for result in results)
+
+
+def _evaluate_single_all(
+    seg_path,
+    inst_path,
+    pred_paths,
+    categories,
+    scale,
+    max_dist,
+    thresholds,
+    apply_thinning,
+    apply_nms,
+    kill_internal,
+    skip_if_nonexistent,
+    radius,
+    labels=CITYSCAPES_labelIds,  # not used
+    ignore_indices=[2, 3],
+    **kwargs,
+):
+    """Evaluate all categories of a single sample (sub-routine)
+
+    The GT edges of all the categories are generated only once.
+
+    NOTE: don't set defaults for easier debugging
+    """
+    sample = load_otf_sample(
+        seg_path=seg_path,
+        inst_path=inst_path,
+        scale=scale,
+        radius=radius,
+        ignore_indices=ignore_indices,
+    )
+    return evaluate_categories(
+        edge=sample.edge,
+        seg=sample.seg,
+        pred_paths=pred_paths,
+        categories=categories,
+        load_pred=load_pred,
         max_dist=max_dist,
+        thresholds=thresholds,
         apply_thinning=apply_thinning,
+        apply_nms=apply_nms,
         kill_internal=kill_internal,
         skip_if_nonexistent=skip_if_nonexistent,
-        apply_nms=apply_nms,
-        nms_kwargs=dict(
-            r=1,
-            s=5,
-            m=1.01,
-            half_prec=False,
-        ),
     )
 
-    return count_r, sum_r, count_p, sum_p
-
 
 def otf_cityscapes_eval_single(kwargs):
     """Wrapper function to unpack all the kwargs"""
     return _evaluate_single(**kwargs)
+
+
+def otf_cityscapes_eval_single_all(kwargs):
+    """Wrapper function to unpack all the kwargs (all categories)"""
+    return _evaluate_single_all(**kwargs)
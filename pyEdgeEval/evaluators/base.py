@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import json
+import os.path as osp
 from abc import ABCMeta, abstractmethod
 from collections import OrderedDict
 from copy import deepcopy
@@ -8,11 +9,15 @@ from copy import deepcopy
 import numpy as np
 from prettytable import PrettyTable
 
+from pyEdgeEval.common.gt_store import build_gt_store
 from pyEdgeEval.common.multi_label import (
+    calculate_metrics,
+    calculate_metrics_all_categories,
+    save_category_results,
     save_overall_metric,
     save_pretty_metrics,
 )
-from pyEdgeEval.utils import print_log
+from pyEdgeEval.utils import WorkerPool, print_log
 
 
 class BaseEvaluator(object, metaclass=ABCMeta):
@@ -22,6 +27,22 @@ class BaseEvaluator(object, metaclass=ABCMeta):
     pred_root = None
     split = None
 
+    # Parallel backend ("process" or "thread"); the native matching and nms
+    # release the GIL, so threads can share samples without pickling
+    backend = "process"
+
+    # On-disk cache of per-sample results (disabled if None)
+    cache_dir = None
+    cache_max_size = 2**30  # bytes
+
+    # Pre-decoded GT store (see `compile_gt_store`); if None, GTs are decoded
+    # from the files
+    gt_store = None
+
+    # Shared `WorkerPool` (e.g. across evaluators); if None, `evaluate`
+    # creates one for all the categories
+    pool = None
+
     # Hidden variables
     _sample_names = None  # don't make this mutable (e.g. [])
     _logger = "pyEdgeEval"
@@ -61,17 +82,255 @@ class BaseBinaryEvaluator(BaseEvaluator):
 
 
 class BaseMultilabelEvaluator(BaseEvaluator):
+    """Base multi-label evaluator
+
+    Subclasses supply the dataset specific parts:
+    - `EVAL_SINGLE` (and `EVAL_SINGLE_ALL` for single-pass evaluation) from
+      `pyEdgeEval.datasets`
+    - the file paths of a sample (`_get_gt_paths` and `_get_pred_path`)
+    """
 
     CLASSES = None
 
+    # Dataset specific attributes
+    EDGE_SUFFIX = None
+    ISEDGE_SUFFIX = None
+    SEG_SUFFIX = None
+    PRED_SUFFIX = None
+
+    # per-sample evaluation functions (wrapped with `staticmethod`); samples
+    # of `EVAL_SINGLE_ALL` hold all the categories
+    EVAL_SINGLE = None
+    EVAL_SINGLE_ALL = None
+
+    # Directory of the GTs
+    gtEval_root = None
+
     @abstractmethod
     def _before_evaluation(self):
         pass
 
-    @abstractmethod
-    def evaluate_category(self, **kwargs):
-        """Placeholder for the category evaluation function"""
-        pass
+    def _check_category(self, category):
+        assert (
+            0 < category < len(self.CLASSES) + 1
+        ), f"ERR: category={category} is not in range ({len(self.CLASSES) + 1})"
+
+    def _get_gt_paths(self, sample_name):
+        """GT file paths of a sample (passed to `EVAL_SINGLE` as is)"""
+        if self.instance_sensitive:
+            edge_path = osp.join(
+                self.gtEval_root,
+                f"{sample_name}{self.ISEDGE_SUFFIX}",
+            )
+        else:
+            edge_path = osp.join(
+                self.gtEval_root,
+                f"{sample_name}{self.EDGE_SUFFIX}",
+            )
+        seg_path = osp.join(
+            self.gtEval_root,
+            f"{sample_name}{self.SEG_SUFFIX}",
+        )
+        assert osp.exists(edge_path), f"ERR: {edge_path} is not valid"
+        assert osp.exists(seg_path), f"ERR: {seg_path} is not valid"
+        return dict(edge_path=edge_path, seg_path=seg_path)
+
+    def _get_pred_path(self, sample_name, category):
+        """Prediction file path of a sample for the category"""
+        # FIXME: naming scheme differs sometimes
+        category_dir = f"class_{str(category).zfill(3)}"
+        # sample_name = sample_name.split("/")[1]  # assert city/img
+        return osp.join(
+            self.pred_root,
+            category_dir,
+            f"{sample_name}{self.PRED_SUFFIX}",
+        )
+
+    def _save_category_results(
+        self,
+        save_dir,
+        category,
+        sample_metrics,
+        threshold_metrics,
+        overall_metric,
+    ):
+        if save_dir:
+            print_log("Saving category results", logger=self._logger)
+            save_category_results(
+                root=save_dir,
+                category=category,
+                sample_metrics=sample_metrics,
+                threshold_metrics=threshold_metrics,
+                overall_metric=overall_metric,
+            )
+
+    def compile_gt_store(self, store_root, nproc=1):
+        """Decode the GTs of the samples once into a GT store
+
+        The GTs are compiled for the current samples and evaluation parameters
+        (scale, instance sensitivity, ...); entries that are already in the
+        store are skipped. The evaluator reads the GTs from the store after.
+        """
+        assert (
+            self._sample_names is not None
+        ), "ERR: no samples yet. load them before compiling the GTs"
+        jobs = []
+        for sample_name in self.sample_names:
+            gt_paths = self._get_gt_paths(sample_name)
+            jobs.append(
+                dict(
+                    kind="multilabel",
+                    edge_path=gt_paths["edge_path"],
+                    # segmentation maps are only used to kill internal edges
+                    seg_path=(
+                        gt_paths["seg_path"] if self.kill_internal else None
+                    ),
+                    scale=self.scale,
+                    num_classes=len(self.CLASSES),
+                )
+            )
+        num_compiled = build_gt_store(
+            store_root, jobs, nproc=nproc, pool=self.pool
+        )
+        print_log(
+            f"Compiled {num_compiled}/{len(jobs)} GTs into {store_root}",
+            logger=self._logger,
+        )
+        self.gt_store = store_root
+
+    def evaluate_category(
+        self,
+        category,
+        thresholds,
+        nproc,
+        save_dir,
+    ):
+        self._before_evaluation()
+        self._check_category(category)
+
+        # populate data (samples)
+        data = []
+        for sample_name in self.sample_names:
+            data.append(
+                dict(
+                    name=sample_name,
+                    category=category,
+                    thresholds=thresholds,
+                    # file paths
+                    **self._get_gt_paths(sample_name),
+                    pred_path=self._get_pred_path(sample_name, category),
+                    gt_store=self.gt_store,
+                    **self.eval_params,
+                )
+            )
+
+        assert len(data) > 0, "ERR: no evaluation data"
+
+        # evaluate
+        sample_metrics, threshold_metrics, overall_metric = calculate_metrics(
+            eval_single=self.EVAL_SINGLE,
+            thresholds=thresholds,
+            samples=data,
+            nproc=nproc,
+            backend=self.backend,
+            cache_dir=self.cache_dir,
+            cache_max_size=self.cache_max_size,
+            pool=self.pool,
+        )
+
+        # save metrics
+        self._save_category_results(
+            save_dir,
+            category,
+            sample_metrics,
+            threshold_metrics,
+            overall_metric,
+        )
+
+        return overall_metric
+
+    def evaluate_all_categories(
+        self,
+        categories,
+        thresholds,
+        nproc,
+        save_dir,
+    ):
+        """Evaluate multiple categories in a single pass over the samples
+
+        Each sample is loaded once for all the categories (`EVAL_SINGLE_ALL`).
+        If the evaluator doesn't set `EVAL_SINGLE_ALL`, categories are
+        evaluated one by one.
+
+        Returns:
+            list of overall metrics (same order as `categories`)
+        """
+        if self.EVAL_SINGLE_ALL is None:
+            return [
+                self.evaluate_category(
+                    category=category,
+                    thresholds=thresholds,
+                    nproc=nproc,
+                    save_dir=save_dir,
+                )
+                for category in categories
+            ]
+
+        self._before_evaluation()
+        for category in categories:
+            self._check_category(category)
+
+        # populate data (samples); each sample holds all the categories
+        data = []
+        for sample_name in self.sample_names:
+            pred_paths = [
+                self._get_pred_path(sample_name, category)
+                for category in categories
+            ]
+            data.append(
+                dict(
+                    name=sample_name,
+                    categories=categories,
+                    thresholds=thresholds,
+                    # file paths
+                    **self._get_gt_paths(sample_name),
+                    pred_paths=pred_paths,
+                    gt_store=self.gt_store,
+                    **self.eval_params,
+                )
+            )
+
+        assert len(data) > 0, "ERR: no evaluation data"
+
+        # evaluate
+        category_metrics = calculate_metrics_all_categories(
+            eval_single=self.EVAL_SINGLE_ALL,
+            thresholds=thresholds,
+            samples=data,
+            categories=categories,
+            nproc=nproc,
+            backend=self.backend,
+            cache_dir=self.cache_dir,
+            cache_max_size=self.cache_max_size,
+            pool=self.pool,
+        )
+
+        overall_metrics = []
+        for category, metrics in category_metrics.items():
+            sample_metrics, threshold_metrics, overall_metric = metrics
+
+            # save metrics
+            self._save_category_results(
+                save_dir,
+                category,
+                sample_metrics,
+                threshold_metrics,
+                overall_metric,
+            )
+
+            overall_metrics.append(overall_metric)
+
+        return overall_metrics
 
     def evaluate(
         self,
@@ -86,6 +345,7 @@ class BaseMultilabelEvaluator(BaseEvaluator):
             "ODS_f1",
             "AUC",
         ),
+        single_pass=False,
     ):
         self._before_evaluation()
 
@@ -105,15 +365,37 @@ class BaseMultilabelEvaluator(BaseEvaluator):
         ), f"ERR: `categories` should be a list, but got {type(categories)}"
         assert len(categories) > 0, "ERR: 0 categories"
 
+        # reuse the same workers for all the categories
+        own_pool = self.pool is None and nproc > 1
+        if own_pool:
+            self.pool = WorkerPool(nproc, backend=self.backend)
+        try:
+            if single_pass:
+                # evaluate all categories at once (each sample is loaded once)
+                overall_metrics = self.evaluate_all_categories(
+                    categories=categories,
+                    thresholds=thresholds,
+                    nproc=nproc,
+                    save_dir=save_dir,
+                )
+            else:
+                # do a single category evaluation
+                overall_metrics = [
+                    self.evaluate_category(
+                        category=category,
+                        thresholds=thresholds,
+                        nproc=nproc,
+                        save_dir=save_dir,
+                    )
+                    for category in categories
+                ]
+        finally:
+            if own_pool:
+                self.pool.close()
+                self.pool = None
+
         ret_metrics = OrderedDict()
-        for category in categories:
-            # do a single category evaluation
-            overall_metric = self.evaluate_category(
-                category=category,
-                thresholds=thresholds,
-                nproc=nproc,
-                save_dir=save_dir,
-            )
+        for overall_metric in overall_metrics:
             for k, v in overall_metric.items():
                 if k in ret_metrics.keys():
                     ret_metrics[k].append(v)
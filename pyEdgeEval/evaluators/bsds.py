@@ -7,6 +7,7 @@ from pyEdgeEval.common.binary_label import (
     calculate_metrics,
     save_results,
 )
+from pyEdgeEval.common.gt_store import build_gt_store
 from pyEdgeEval.datasets import bsds_eval_single
 from pyEdgeEval.utils import print_log
 
@@ -18,6 +19,8 @@ class BSDS500Evaluator(BaseBinaryEvaluator):
     # Dataset specific attributes
     GT_DIR = "groundTruth"
     GT_SUFFIX = ".mat"
+    PACKED_GT_DIR = "groundTruthPacked"  # converted GTs
+    PACKED_GT_SUFFIX = ".bin"
     PRED_SUFFIX = ".png"
 
     def __init__(
@@ -25,6 +28,7 @@ class BSDS500Evaluator(BaseBinaryEvaluator):
         dataset_root: str,
         pred_root: str,
         split: str = "test",
+        packed_gt: bool = False,
     ):
         self.dataset_root = dataset_root
         self.pred_root = pred_root
@@ -32,6 +36,12 @@ class BSDS500Evaluator(BaseBinaryEvaluator):
         assert split in ("val", "test")
         self.split = split
 
+        if packed_gt:
+            # GTs converted by `convert_bsds_gt` (no need to parse .mat files)
+            print_log("Using packed GTs", logger=self._logger)
+            self.GT_DIR = self.PACKED_GT_DIR
+            self.GT_SUFFIX = self.PACKED_GT_SUFFIX
+
         self.GT_root = osp.join(
             self.dataset_root,
             self.GT_DIR,
@@ -62,7 +72,7 @@ class BSDS500Evaluator(BaseBinaryEvaluator):
             for fn in files:
                 dir, filename = osp.split(fn)
                 name, ext = osp.splitext(filename)
-                if ext.lower() == ".mat":
+                if ext.lower() == self.GT_SUFFIX:
                     # split/12345.mat
                     sample_names.append(osp.join(self.split, name))
 
@@ -105,6 +115,29 @@ class BSDS500Evaluator(BaseBinaryEvaluator):
             self.pred_root
         ), f"ERR: {self.pred_root} does not exist"
 
+    def compile_gt_store(self, store_root, nproc=1):
+        """Decode the GTs of the samples once into a GT store
+
+        Entries that are already in the store are skipped. The evaluator reads
+        the GTs from the store after.
+        """
+        assert (
+            self._sample_names is not None
+        ), "ERR: no samples yet. load them before compiling the GTs"
+        jobs = []
+        for sample_name in self.sample_names:
+            gt_path = osp.join(self.GT_root, f"{sample_name}{self.GT_SUFFIX}")
+            assert osp.exists(gt_path), f"ERR: {gt_path} is not valid"
+            jobs.append(dict(kind="bsds", gt_path=gt_path))
+        num_compiled = build_gt_store(
+            store_root, jobs, nproc=nproc, pool=self.pool
+        )
+        print_log(
+            f"Compiled {num_compiled}/{len(jobs)} GTs into {store_root}",
+            logger=self._logger,
+        )
+        self.gt_store = store_root
+
     def evaluate(
         self,
         thresholds,
@@ -138,6 +171,7 @@ class BSDS500Evaluator(BaseBinaryEvaluator):
                     thresholds=thresholds,
                     gt_path=gt_path,
                     pred_path=pred_path,
+                    gt_store=self.gt_store,
                     **self.eval_params,
                 )
             )
@@ -150,6 +184,10 @@ class BSDS500Evaluator(BaseBinaryEvaluator):
             thresholds=thresholds,
             samples=data,
             nproc=nproc,
+            backend=self.backend,
+            cache_dir=self.cache_dir,
+            cache_max_size=self.cache_max_size,
+            pool=self.pool,
         )
 
         # save metrics
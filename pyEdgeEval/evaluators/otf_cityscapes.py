@@ -2,18 +2,17 @@
 
 """On-The-Fly Evaluator
 
-- lazy generation of GTs
+- lazy generation of GTs (the edges of all the classes are generated at once
+  and cached per sample)
 - if the scale is half (0.5), the output is generally the same as `HalfCityscapesEvaluator`
 """
 
 import os.path as osp
 
-from pyEdgeEval.common.multi_label import (
-    calculate_metrics,
-    save_category_results,
+from pyEdgeEval.datasets import (
+    otf_cityscapes_eval_single,
+    otf_cityscapes_eval_single_all,
 )
-from pyEdgeEval.datasets import otf_cityscapes_eval_single
-from pyEdgeEval.utils import print_log
 
 from .cityscapes import CityscapesEvaluator
 
@@ -31,6 +30,9 @@ class OTFCityscapesEvaluator(CityscapesEvaluator):
     SEG_SUFFIX = "_gtFine_labelIds.png"
     INST_SUFFIX = "_gtFine_instanceIds.png"
 
+    EVAL_SINGLE = staticmethod(otf_cityscapes_eval_single)
+    EVAL_SINGLE_ALL = staticmethod(otf_cityscapes_eval_single_all)
+
     @property
     def eval_params(self):
 
@@ -53,80 +55,24 @@ class OTFCityscapesEvaluator(CityscapesEvaluator):
             num_classes=len(self.CLASSES),  # not used
         )
 
-    def evaluate_category(
-        self,
-        category,
-        thresholds,
-        nproc,
-        save_dir,
-    ):
-        self._before_evaluation()
-        assert (
-            0 < category < len(self.CLASSES) + 1
-        ), f"ERR: category={category} is not in range ({len(self.CLASSES) + 1})"
-
-        # create data
-        data = []
-        for sample_name in self.sample_names:
-
-            # FIXME: naming scheme differs sometimes
-            category_dir = f"class_{str(category).zfill(3)}"
-
-            # GT file paths
-            seg_path = osp.join(
+    def _get_gt_paths(self, sample_name):
+        """GT segmentation and instance file paths of a sample"""
+        seg_path = osp.join(
+            self.gtFine_root,
+            f"{sample_name}{self.SEG_SUFFIX}",
+        )
+        assert osp.exists(seg_path), f"ERR: {seg_path} is not valid"
+        if self.instance_sensitive:
+            inst_path = osp.join(
                 self.gtFine_root,
-                f"{sample_name}{self.SEG_SUFFIX}",
-            )
-            assert osp.exists(seg_path), f"ERR: {seg_path} is not valid"
-            if self.instance_sensitive:
-                inst_path = osp.join(
-                    self.gtFine_root,
-                    f"{sample_name}{self.INST_SUFFIX}",
-                )
-                assert osp.exists(inst_path), f"ERR: {inst_path} is not valid"
-            else:
-                inst_path = None
-
-            # prediction file path
-            # sample_name = sample_name.split("/")[1]  # assert city/img
-            pred_path = osp.join(
-                self.pred_root,
-                category_dir,
-                f"{sample_name}{self.PRED_SUFFIX}",
+                f"{sample_name}{self.INST_SUFFIX}",
             )
+            assert osp.exists(inst_path), f"ERR: {inst_path} is not valid"
+        else:
+            inst_path = None
+        return dict(seg_path=seg_path, inst_path=inst_path)
 
-            data.append(
-                dict(
-                    name=sample_name,
-                    category=category,
-                    thresholds=thresholds,
-                    # file paths
-                    seg_path=seg_path,
-                    inst_path=inst_path,
-                    pred_path=pred_path,
-                    **self.eval_params,
-                )
-            )
-
-        assert len(data) > 0, "ERR: no evaluation data"
-
-        # evaluate
-        (sample_metrics, threshold_metrics, overall_metric) = calculate_metrics(
-            eval_single=otf_cityscapes_eval_single,
-            thresholds=thresholds,
-            samples=data,
-            nproc=nproc,
+    def compile_gt_store(self, store_root, nproc=1):
+        raise NotImplementedError(
+            "GTs are generated on the fly (and cached per sample)"
         )
-
-        # save metrics
-        if save_dir:
-            print_log("Saving category results", logger=self._logger)
-            save_category_results(
-                root=save_dir,
-                category=category,
-                sample_metrics=sample_metrics,
-                threshold_metrics=threshold_metrics,
-                overall_metric=overall_metric,
-            )
-
-        return overall_metric
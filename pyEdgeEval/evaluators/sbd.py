@@ -3,11 +3,7 @@
 import os.path as osp
 from warnings import warn
 
-from pyEdgeEval.common.multi_label import (
-    calculate_metrics,
-    save_category_results,
-)
-from pyEdgeEval.datasets import sbd_eval_single
+from pyEdgeEval.datasets import sbd_eval_single, sbd_eval_single_all
 from pyEdgeEval.utils import print_log
 
 from .base import BaseMultilabelEvaluator
@@ -49,6 +45,9 @@ class SBDEvaluator(BaseMultilabelEvaluator):
     RAW_ISEDGE_SUFFIX = "_raw_isedge.png"
     THIN_ISEDGE_SUFFIX = "_thin_isedge.png"
 
+    EVAL_SINGLE = staticmethod(sbd_eval_single)
+    EVAL_SINGLE_ALL = staticmethod(sbd_eval_single_all)
+
     SEG_SUFFIX = "_labelIds.png"
     PRED_SUFFIX = ".png"
 
@@ -205,86 +204,6 @@ class SBDEvaluator(BaseMultilabelEvaluator):
             self.pred_root
         ), f"ERR: {self.pred_root} does not exist"
 
-    def evaluate_category(
-        self,
-        category,
-        thresholds,
-        nproc,
-        save_dir,
-    ):
-        self._before_evaluation()
-        assert (
-            0 < category < len(self.CLASSES) + 1
-        ), f"ERR: category={category} is not in range ({len(self.CLASSES) + 1})"
-
-        # populate data (samples)
-        data = []
-        for sample_name in self.sample_names:
-            # FIXME: naming scheme differs sometimes
-            category_dir = f"class_{str(category).zfill(3)}"
-
-            # GT file paths
-            if self.instance_sensitive:
-                edge_path = osp.join(
-                    self.gtEval_root,
-                    f"{sample_name}{self.ISEDGE_SUFFIX}",
-                )
-            else:
-                edge_path = osp.join(
-                    self.gtEval_root,
-                    f"{sample_name}{self.EDGE_SUFFIX}",
-                )
-            seg_path = osp.join(
-                self.gtEval_root,
-                f"{sample_name}{self.SEG_SUFFIX}",
-            )
-            assert osp.exists(edge_path), f"ERR: {edge_path} is not valid"
-            assert osp.exists(seg_path), f"ERR: {seg_path} is not valid"
-
-            # prediction file path
-            # sample_name = sample_name.split("/")[1]  # assert city/img
-            pred_path = osp.join(
-                self.pred_root,
-                category_dir,
-                f"{sample_name}{self.PRED_SUFFIX}",
-            )
-
-            data.append(
-                dict(
-                    name=sample_name,
-                    category=category,
-                    thresholds=thresholds,
-                    # file paths
-                    edge_path=edge_path,
-                    seg_path=seg_path,
-                    pred_path=pred_path,
-                    **self.eval_params,
-                )
-            )
-
-        assert len(data) > 0, "ERR: no evaluation data"
-
-        # evaluate
-        (sample_metrics, threshold_metrics, overall_metric) = calculate_metrics(
-            eval_single=sbd_eval_single,
-            thresholds=thresholds,
-            samples=data,
-            nproc=nproc,
-        )
-
-        # save metrics
-        if save_dir:
-            print_log("Saving category results", logger=self._logger)
-            save_category_results(
-                root=save_dir,
-                category=category,
-                sample_metrics=sample_metrics,
-                threshold_metrics=threshold_metrics,
-                overall_metric=overall_metric,
-            )
-
-        return overall_metric
-
 
 class ReannoSBDEvaluator(SBDEvaluator):
     """Reannotated SBD validation split evaluator."""
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+"""Convert BSDS500 GTs to packed GTs
+
+Parsing the `.mat` GTs (nested object arrays) takes a large part of the
+evaluation time. The boundaries of all the annotators of an image are
+converted to a single bit-packed file that is loaded without scipy (see
+`pyEdgeEval.datasets.bsds.load_bsds_gt_packed`).
+"""
+
+import os
+import os.path as osp
+from functools import partial
+
+from pyEdgeEval.datasets.bsds import PACKED_GT_SUFFIX, convert_bsds_gt
+from pyEdgeEval.utils import (
+    mkdir_or_exist,
+    track_parallel_progress,
+    track_progress,
+)
+
+__all__ = ["convert_bsds500"]
+
+
+def get_samples(gt_dir):
+    """Names of the `.mat` GTs in a directory"""
+    return sorted(
+        osp.splitext(fn)[0] for fn in os.listdir(gt_dir) if fn.endswith(".mat")
+    )
+
+
+def routine(sample_name, gt_dir, save_dir):
+    convert_bsds_gt(
+        mat_path=osp.join(gt_dir, f"{sample_name}.mat"),
+        save_path=osp.join(save_dir, f"{sample_name}{PACKED_GT_SUFFIX}"),
+    )
+
+
+def convert_bsds500(
+    root: str,
+    gt_dir: str = "groundTruth",
+    out_dir: str = "groundTruthPacked",
+    splits=("train", "val", "test"),
+    nproc: int = 4,
+):
+    """Convert the GTs of the splits (`<root>/<gt_dir>/<split>/*.mat`)"""
+    for split in splits:
+        split_dir = osp.join(root, gt_dir, split)
+        if not osp.exists(split_dir):
+            print(f">>> {split_dir} does not exist; skipping")
+            continue
+        save_dir = osp.join(root, out_dir, split)
+        mkdir_or_exist(save_dir)
+
+        sample_names = get_samples(split_dir)
+        assert len(sample_names) > 0, f"ERR: no .mat files in {split_dir}"
+
+        split_routine = partial(routine, gt_dir=split_dir, save_dir=save_dir)
+        print(">>> ", split)
+        if nproc > 1:
+            track_parallel_progress(split_routine, sample_names, nproc)
+        else:
+            track_progress(split_routine, sample_names)
@@ -3,6 +3,7 @@
 import argparse
 import os.path as osp
 import time
+from typing import Optional
 
 import pyEdgeEval
 from pyEdgeEval.evaluators.bsds import BSDS500Evaluator
@@ -55,6 +56,17 @@ def parse_args():
         action="store_true",
         help="applies NMS before evaluation",
     )
+    parser.add_argument(
+        "--packed-gt",
+        action="store_true",
+        help="use the converted GTs (`groundTruthPacked`) instead of .mat files",
+    )
+    parser.add_argument(
+        "--gt-store",
+        type=str,
+        default=None,
+        help="directory of the pre-decoded GTs (compiled on the first run)",
+    )
     parser.add_argument(
         "--nproc",
         type=int,
@@ -76,6 +88,8 @@ def evaluate(
     apply_nms: bool,
     nproc: int,
     no_split_dir: bool = False,
+    gt_store: Optional[str] = None,
+    packed_gt: bool = False,
 ):
     """Evaluate BSDS500"""
 
@@ -120,12 +134,14 @@ def evaluate(
     logger.info(f"max_dist:               \t{max_dist}")
     logger.info(f"thinning + thinned gts: \t{apply_thinning}")
     logger.info(f"nms:                    \t{apply_nms}")
+    logger.info(f"packed gts:             \t{packed_gt}")
     print("\n\n")
 
     evaluator = BSDS500Evaluator(
         dataset_root=bsds_path,
         pred_root=pred_path,
         split=split,
+        packed_gt=packed_gt,
     )
 
     evaluator.set_eval_params(
@@ -135,6 +151,10 @@ def evaluate(
         max_dist=max_dist,
     )
 
+    # decode the GTs only once (reused across runs)
+    if gt_store:
+        evaluator.compile_gt_store(gt_store, nproc=nproc)
+
     evaluator.evaluate(
         thresholds=thresholds,
         nproc=nproc,
@@ -159,4 +179,6 @@ def evaluate_bsds500(no_split_dir=False):
         apply_nms=args.apply_nms,
         nproc=args.nproc,
         no_split_dir=no_split_dir,
+        gt_store=args.gt_store,
+        packed_gt=args.packed_gt,
     )
@@ -13,6 +13,7 @@
 import argparse
 import os.path as osp
 import time
+from typing import Optional
 import warnings
 
 import pyEdgeEval
@@ -72,6 +73,23 @@ def _common_parser_args(
         action="store_true",
         help="applies NMS before evaluation",
     )
+    parser.add_argument(
+        "--single-pass",
+        action="store_true",
+        help="evaluate all categories while loading each sample only once",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="directory for caching per-sample results (reused across runs)",
+    )
+    parser.add_argument(
+        "--gt-store",
+        type=str,
+        default=None,
+        help="directory of the pre-decoded GTs (compiled on the first run)",
+    )
     parser.add_argument(
         "--nproc",
         type=int,
@@ -124,6 +142,9 @@ def evaluate(
     thresholds: str,
     half: bool,
     nproc: int,
+    single_pass: bool = False,
+    cache_dir: Optional[str] = None,
+    gt_store: Optional[str] = None,
 ):
     """Evaluate Cityscapes"""
 
@@ -243,12 +264,20 @@ def evaluate(
         instance_sensitive=instance_sensitive,
     )
 
+    # cache per-sample results
+    evaluator.cache_dir = cache_dir
+
+    # decode the GTs only once (reused across runs)
+    if gt_store:
+        evaluator.compile_gt_store(gt_store, nproc=nproc)
+
     # evaluate
     evaluator.evaluate(
         categories=categories,
         thresholds=thresholds,
         nproc=nproc,
         save_dir=output_path,
+        single_pass=single_pass,
     )
 
 
@@ -270,6 +299,9 @@ def evaluate_cityscapes_raw(gt_dir: str = "gtEval"):
         thresholds=args.thresholds,
         half=args.half,
         nproc=args.nproc,
+        single_pass=args.single_pass,
+        cache_dir=args.cache_dir,
+        gt_store=args.gt_store,
     )
 
 
@@ -291,4 +323,7 @@ def evaluate_cityscapes_thin(gt_dir: str = "gtEval"):
         thresholds=args.thresholds,
         half=True,  # use HalfCityscapesEvaluator
         nproc=args.nproc,
+        single_pass=args.single_pass,
+        cache_dir=args.cache_dir,
+        gt_store=args.gt_store,
     )
@@ -3,6 +3,7 @@
 import argparse
 import os.path as osp
 import time
+from typing import Optional
 
 import pyEdgeEval
 from pyEdgeEval.evaluators.sbd import SBDEvaluator, ReannoSBDEvaluator
@@ -71,6 +72,23 @@ def parse_args():
         action="store_true",
         help="applies NMS before evaluation",
     )
+    parser.add_argument(
+        "--single-pass",
+        action="store_true",
+        help="evaluate all categories while loading each sample only once",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="directory for caching per-sample results (reused across runs)",
+    )
+    parser.add_argument(
+        "--gt-store",
+        type=str,
+        default=None,
+        help="directory of the pre-decoded GTs (compiled on the first run)",
+    )
     parser.add_argument(
         "--nproc",
         type=int,
@@ -95,6 +113,9 @@ def evaluate(
     max_dist: float,
     thresholds: str,
     nproc: int,
+    single_pass: bool = False,
+    cache_dir: Optional[str] = None,
+    gt_store: Optional[str] = None,
 ):
     """Evaluate SBD"""
 
@@ -198,12 +219,20 @@ def evaluate(
         instance_sensitive=instance_sensitive,
     )
 
+    # cache per-sample results
+    evaluator.cache_dir = cache_dir
+
+    # decode the GTs only once (reused across runs)
+    if gt_store:
+        evaluator.compile_gt_store(gt_store, nproc=nproc)
+
     # evaluate
     evaluator.evaluate(
         categories=categories,
         thresholds=thresholds,
         nproc=nproc,
         save_dir=output_path,
+        single_pass=single_pass,
     )
 
 
@@ -227,6 +256,9 @@ def evaluate_sbd(gt_dir: str = "gtEval"):
         max_dist=args.max_dist,
         thresholds=args.thresholds,
         nproc=args.nproc,
+        single_pass=args.single_pass,
+        cache_dir=args.cache_dir,
+        gt_store=args.gt_store,
     )
 
 
@@ -242,6 +274,9 @@ def evaluate_reanno(
     nonIS: bool,
     thresholds: str,
     nproc: int,
+    single_pass: bool = False,
+    cache_dir: Optional[str] = None,
+    gt_store: Optional[str] = None,
 ):
     """Evaluate Re-annotated SBD"""
 
@@ -342,12 +377,20 @@ def evaluate_reanno(
         instance_sensitive=instance_sensitive,
     )
 
+    # cache per-sample results
+    evaluator.cache_dir = cache_dir
+
+    # decode the GTs only once (reused across runs)
+    if gt_store:
+        evaluator.compile_gt_store(gt_store, nproc=nproc)
+
     # evaluate
     evaluator.evaluate(
         categories=categories,
         thresholds=thresholds,
         nproc=nproc,
         save_dir=output_path,
+        single_pass=single_pass,
     )
 
 
@@ -370,4 +413,7 @@ def evaluate_reanno_sbd(gt_dir: str = "gtEval"):
         max_dist=args.max_dist,
         thresholds=args.thresholds,
         nproc=args.nproc,
+        single_pass=args.single_pass,
+        cache_dir=args.cache_dir,
+        gt_store=args.gt_store,
     )
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+
+"""Offline NMS of predictions
+
+Applying NMS while evaluating (`apply_nms=True`) repeats the same work for
+every evaluation. This stage suppresses a tree of predictions once:
+
+- the predictions (`.png`, `.mat` or `.npy`) are processed by a pool of
+  workers (processes or threads; the NMS releases the GIL)
+- the outputs are either PNGs (same tree as the predictions) or packed in
+  `.npz` shards with an index (`index.json`) that maps the name of a
+  prediction to its shard
+- the outputs are written atomically, so an interrupted run can be resumed:
+  existing PNGs are skipped, and the index lists the predictions that are in
+  the shards (the index is updated after each shard)
+"""
+
+import json
+import os.path as osp
+
+import numpy as np
+from PIL import Image
+
+from pyEdgeEval.preprocess import fast_nms
+from pyEdgeEval.utils import (
+    atomic_write,
+    load_versioned_json,
+    loadmat,
+    mkdir_or_exist,
+    scandir,
+    track_iter_progress,
+    track_parallel_iter_progress,
+)
+
+__all__ = [
+    "PackedPredictions",
+    "PackedPredictionWriter",
+    "load_prediction",
+    "nms_predictions",
+]
+
+# NOTE: bump when the layout of the shards changes
+PACKED_VERSION = 1
+
+INDEX_FILE = "index.json"
+
+
+def load_prediction(path, key=None):
+    """Load a prediction (`.png`, `.mat` with the variable `key`, or `.npy`)"""
+    ext = osp.splitext(path)[-1]
+    if ext == ".png":
+        return np.array(Image.open(path))
+    elif ext == ".mat":
+        assert key is not None, "ERR: `key` is needed for .mat predictions"
+        return loadmat(path)[key]
+    elif ext == ".npy":
+        return np.load(path)
+    raise ValueError(f"unsupported prediction format: {path}")
+
+
+def _save_png(path, img):
+    """Atomically save an image as png"""
+    atomic_write(
+        path,
+        lambda f: Image.fromarray(img).save(f, format="PNG"),
+        suffix=".png.tmp",
+    )
+
+
+class PackedPredictionWriter(object):
+    """Writes suppressed predictions to `.npz` shards
+
+    The predictions are buffered until `shard_size` of them are collected,
+    then written as a new shard together with the index. Opening an existing
+    directory appends to it (the predictions in the index are done).
+
+    Args:
+        root (str): directory of the shards
+        shard_size (int): number of predictions per shard
+        compress (bool): compress the shards (NMS outputs are sparse)
+    """
+
+    def __init__(self, root, shard_size=1000, compress=True):
+        assert shard_size > 0, "ERR: `shard_size` should be positive"
+        self.root = root
+        self.shard_size = shard_size
+        self.compress = compress
+        mkdir_or_exist(root)
+        if osp.exists(osp.join(root, INDEX_FILE)):
+            index = load_versioned_json(
+                osp.join(root, INDEX_FILE), PACKED_VERSION
+            )
+            self.shards = index["shards"]
+            self.entries = index["entries"]
+        else:
+            self.shards = []
+            self.entries = {}
+        self._buffer = {}
+
+    def __contains__(self, name):
+        return name in self.entries or name in self._buffer
+
+    def add(self, name, pred):
+        self._buffer[name] = pred
+        if len(self._buffer) >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered predictions to a new shard and update the index"""
+        if not self._buffer:
+            return
+        shard = f"shard_{len(self.shards):05d}.npz"
+        buffer = self._buffer
+        savez = np.savez_compressed if self.compress else np.savez
+        atomic_write(
+            osp.join(self.root, shard),
+            lambda f: savez(f, **buffer),
+            suffix=".npz.tmp",
+        )
+        self.shards.append(shard)
+        for name in buffer:
+            self.entries[name] = shard
+        self._buffer = {}
+        index = dict(
+            version=PACKED_VERSION,
+            shards=self.shards,
+            entries=self.entries,
+        )
+        atomic_write(
+            osp.join(self.root, INDEX_FILE),
+            lambda f: f.write(json.dumps(index).encode()),
+            suffix=".json.tmp",
+        )
+
+    def close(self):
+        self.flush()
+
+
+class PackedPredictions(object):
+    """Read-only view of packed predictions
+
+    Args:
+        root (str): directory of the shards
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.entries = load_versioned_json(
+            osp.join(root, INDEX_FILE), PACKED_VERSION
+        )["entries"]
+        self._shards = {}
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def keys(self):
+        return self.entries.keys()
+
+    def __getitem__(self, name):
+        shard = self.entries[name]
+        data = self._shards.get(shard)
+        if data is None:
+            data = np.load(osp.join(self.root, shard))
+            self._shards[shard] = data
+        return data[name]
+
+    def close(self):
+        for data in self._shards.values():
+            data.close()
+        self._shards = {}
+
+
+def _nms_task(task):
+    pred = load_prediction(task["pred_path"], task["key"])
+    out = fast_nms(pred, return_as_uint8=True, **task["nms_kwargs"])
+    if task["save_path"] is None:
+        return out
+    _save_png(task["save_path"], out)
+
+
+def nms_predictions(
+    pred_dir: str,
+    save_dir: str,
+    suffix: str = ".png",
+    key: str = None,
+    packed: bool = False,
+    shard_size: int = 1000,
+    nproc: int = 1,
+    backend: str = "process",
+    pool=None,
+    nms_kwargs=dict(
+        r=1,
+        s=5,
+        m=1.01,
+    ),
+):
+    """NMS all the predictions in a directory (recursively)
+
+    The name of a prediction is its path relative to `pred_dir` without the
+    extension; the output is `<save_dir>/<name>.png` or the entry `<name>` of
+    the packed predictions (see `PackedPredictions`).
+
+    Args:
+        pred_dir (str): directory of the predictions
+        save_dir (str): output directory
+        suffix (str): extension of the predictions (`.png`, `.mat`, `.npy`)
+        key (str): name of the variable in `.mat` predictions
+        packed (bool): save to `.npz` shards instead of PNGs
+        shard_size (int): number of predictions per shard
+        nproc (int): number of workers
+        backend (str): "process" or "thread"
+        pool (WorkerPool): reuse a pool of workers
+        nms_kwargs (dict): arguments of `fast_nms`
+
+    Returns:
+        int: number of suppressed predictions (the others were already done)
+    """
+    assert osp.isdir(pred_dir), f"ERR: {pred_dir} does not exist"
+    mkdir_or_exist(save_dir)
+
+    names = sorted(
+        osp.splitext(p)[0]
+        for p in scandir(pred_dir, suffix=suffix, recursive=True)
+    )
+
+    writer = None
+    if packed:
+        writer = PackedPredictionWriter(save_dir, shard_size=shard_size)
+        names = [name for name in names if name not in writer]
+    else:
+        names = [
+            name
+            for name in names
+            if not osp.exists(osp.join(save_dir, f"{name}.png"))
+        ]
+        for name in names:
+            mkdir_or_exist(osp.dirname(osp.join(save_dir, name)))
+    if len(names) == 0:
+        return 0
+
+    tasks = [
+        dict(
+            pred_path=osp.join(pred_dir, f"{name}{suffix}"),
+            key=key,
+            save_path=None if packed else osp.join(save_dir, f"{name}.png"),
+            nms_kwargs=nms_kwargs,
+        )
+        for name in names
+    ]
+    if nproc > 1 or pool is not None:
+        results = track_parallel_iter_progress(
+            _nms_task, tasks, nproc, backend=backend, pool=pool
+        )
+    else:
+        results = (
+            (i, _nms_task(task))
+            for i, task in enumerate(track_iter_progress(tasks))
+        )
+
+    try:
+        for i, out in results:
+            if writer is not None:
+                writer.add(names[i], out)
+    finally:
+        # keep the finished predictions when interrupted
+        if writer is not None:
+            writer.close()
+    return len(names)
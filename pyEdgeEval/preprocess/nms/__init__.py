@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
-from .fast_nms import fast_nms
+from .fast_nms import fast_nms, fast_nms_batch
 
 __all__ = [
     "fast_nms",
+    "fast_nms_batch",
 ]
@@ -9,6 +9,14 @@ from pyEdgeEval._lib import nms
 
 from .toolbox import conv_tri, grad2
 
+try:
+    from pyEdgeEval._lib.nms import fast_nms as _native_fast_nms
+    from pyEdgeEval._lib.nms import fast_nms_batch as _native_fast_nms_batch
+except ImportError:
+    # fallback to the NumPy implementation
+    _native_fast_nms = None
+    _native_fast_nms_batch = None
+
 
 # NOTE:
 #    In NMS, `if edge < interp: out = 0`, I found that sometimes edge is very close to interp.
@@ -33,6 +41,8 @@ def fast_nms(
         r (int): radius for nms supr
         s (int): radius for supr boundaries
         m (float): multiplier for conservative supr
+        half_prec (bool): compute the orientations in single precision to
+            save memory (NumPy implementation only, so it is slower)
 
     Returns:
         supressed edge
@@ -40,7 +50,8 @@ def fast_nms(
     References:
     - https://github.com/pdollar/edges/blob/master/private/edgesNmsMex.cpp
 
-    Current runtime is around 20ms
+    Current runtime is around 20ms; the fused kernel in `nms.pyx` (used when
+    compiled) is around 3x faster
     """
 
     if img.dtype == np.uint8:
@@ -51,6 +62,80 @@ def fast_nms(
         img.dtype == np.float32
     ), f"ERR: input dtype should be float64 or float32 but got {img.dtype}"
 
+    if _native_fast_nms is not None and not half_prec:
+        out = _native_fast_nms(img, r=r, s=s, m=m)
+    else:
+        out = _fast_nms(img, r=r, s=s, m=m, half_prec=half_prec)
+
+    if return_as_uint8:
+        out = np.clip(out, 0, 1)
+        # NOTE: in MATLAB, uint8(x) means round(x).astype(uint8) in numpy
+        out = np.round(out * 255).astype(np.uint8)
+
+    return out
+
+
+def fast_nms_batch(
+    preds: np.ndarray,
+    r: int = 1,
+    s: int = 5,
+    m: float = 1.01,
+    half_prec: bool = False,
+    return_as_uint8: bool = False,
+    out: np.ndarray = None,
+) -> np.ndarray:
+    """NMS for a stack of edges (e.g. all the classes of a prediction)
+
+    Same as `fast_nms` for each edge, but the edges are processed together
+    (a single native call, or vectorized over the stack for NumPy).
+
+    Args:
+        preds (np.ndarray): `(C, H, W)` edges (np.uint8 or float)
+        r (int): radius for nms supr
+        s (int): radius for supr boundaries
+        m (float): multiplier for conservative supr
+        half_prec (bool): same as `fast_nms`
+        out (np.ndarray): float64 array for the output; can be `preds` to
+            suppress in place (needs a C-contiguous float64 `preds`)
+
+    Returns:
+        supressed edges `(C, H, W)`
+    """
+    assert preds.ndim == 3, f"ERR: preds should be (C, H, W), not {preds.shape}"
+    assert not (
+        return_as_uint8 and out is not None
+    ), "ERR: `out` can't be used with `return_as_uint8`"
+
+    if preds.dtype == np.uint8:
+        # NOTE: input image must be normalized between 0~1
+        preds = (preds / 255.0).astype(np.float64)
+
+    assert (preds.dtype == np.float64) or (
+        preds.dtype == np.float32
+    ), f"ERR: input dtype should be float64 or float32 but got {preds.dtype}"
+
+    if _native_fast_nms_batch is not None and not half_prec:
+        out = _native_fast_nms_batch(preds, r=r, s=s, m=m, out=out)
+    else:
+        result = _fast_nms(preds, r=r, s=s, m=m, half_prec=half_prec)
+        if out is None:
+            out = result
+        else:
+            out[...] = result
+
+    if return_as_uint8:
+        out = np.clip(out, 0, 1)
+        # NOTE: in MATLAB, uint8(x) means round(x).astype(uint8) in numpy
+        out = np.round(out * 255).astype(np.uint8)
+
+    return out
+
+
+def _fast_nms(img, r, s, m, half_prec):
+    """NMS using NumPy (only the suppression is compiled)
+
+    `img` can be a `(H, W)` edge or a `(C, H, W)` stack of edges.
+    """
     edge = conv_tri(img, 1)
 
     if half_prec:
@@ -67,20 +152,18 @@ def fast_nms(
     val = oyy * np.sign(-oxy) / oxx
     ori = np.mod(np.arctan(val), np.pi)
     # r, s, m = 1, 5, float(1.01)
-    out = nms(edge, ori, r=r, s=s, m=m)
-
-    if return_as_uint8:
-        out = np.clip(out, 0, 1)
-        # NOTE: in MATLAB, uint8(x) means round(x).astype(uint8) in numpy
-        out = np.round(out * 255).astype(np.uint8)
-
-    return out
+    if edge.ndim == 2:
+        return nms(edge, ori, r=r, s=s, m=m)
+    return np.stack(
+        [nms(_edge, _ori, r=r, s=s, m=m) for _edge, _ori in zip(edge, ori)]
+    )
 
 
 """
 Helper Functions:
 
-Probably won't use...
+Probably won't use... (see `pyEdgeEval.helpers.nms_predictions` for a parallel
+and resumable version)
 """
 
 
@@ -113,9 +196,10 @@ def nms_results(result_dir, save_dir, loader):
         os.makedirs(save_dir)
 
     for file in os.listdir(result_dir):
-        save_name = os.path.join(save_dir, f"{os.path.splitext(file[0])}.png")
+        save_name = os.path.join(save_dir, f"{os.path.splitext(file)[0]}.png")
         if os.path.isfile(save_name):
             print(f"file: {save_name} exists... skipping")
+            continue
         img_path = os.path.join(result_dir, file)
         # load image
         img = loader(img_path)
@@ -3,50 +3,117 @@
 from typing import Tuple
 
 import numpy as np
-from scipy import signal
+
+
+def _take(image: np.ndarray, axis: int, start, stop) -> np.ndarray:
+    """Slice `image` along `axis`"""
+    index = [slice(None)] * image.ndim
+    index[axis] = slice(start, stop)
+    return image[tuple(index)]
+
+
+def _box_cumsum(image: np.ndarray, axis: int, k: int) -> np.ndarray:
+    """Sums over windows of size `k` along `axis` (O(1) per pixel)"""
+    shape = list(image.shape)
+    shape[axis] = 1
+    c = np.cumsum(image, axis=axis)
+    c = np.concatenate([np.zeros(shape, dtype=c.dtype), c], axis=axis)
+    return _take(c, axis, k, None) - _take(c, axis, 0, -k)
+
+
+def _conv_taps(x: np.ndarray, f: np.ndarray, axis: int, n: int, group: int):
+    """Convolution of the padded `x` with the taps `f` along `axis`
+
+    The products are added in the same order as `scipy.signal.convolve2d`
+    (from the last tap to the first one, `group` taps at a time and the
+    remaining taps one by one), so that the results are bit-identical.
+    """
+    k = len(f) - 1
+
+    def term(i):
+        return _take(x, axis, k - i, k - i + n) * f[i]
+
+    out = None
+    num_grouped = len(f) - len(f) % group
+    blocks = [range(i, i + group) for i in range(0, num_grouped, group)]
+    blocks += [[i] for i in range(num_grouped, len(f))]
+    for block in blocks:
+        partial = term(block[0])
+        for i in block[1:]:
+            partial += term(i)
+        if out is None:
+            # the sum starts from +0.0 like `signal.convolve2d`
+            partial += 0.0
+            out = partial
+        else:
+            out += partial
+    return out
 
 
 def conv_tri(
     image: np.ndarray,
     r: int,
     s: int = 1,
+    running_sums: bool = False,
 ) -> np.ndarray:
-    """2D image convolution with a triangle filter (no fast)
+    """2D image convolution with a triangle filter
     See https://github.com/pdollar/toolbox/blob/master/channels/convTri.m
-    Note: signal.convolve2d does not support float16('single' in MATLAB)
+    Note: the filter is applied to the last two axes, so a stack of images
+    (e.g. `(C, H, W)`) is filtered at once. The taps are added in the same
+    order as `signal.convolve2d`, so the results are bit-identical to the
+    original implementation (and the native NMS kernel).
+    Note: with `running_sums=True` and `r > 1`, the triangle filter is
+    computed as two box filters using cumulative sums (O(1) per pixel like
+    `convTri`, in float64). It is faster for large `r`, but the rounding
+    residues change the results slightly (e.g. the NMS of near ties).
     """
     if image.size == 0 or (r == 0 and s == 1):
         return image
+    assert (
+        image.ndim >= 2
+    ), f"ERR: image should be 2D or more, not {image.ndim}D"
+    dtype = image.dtype if np.issubdtype(image.dtype, np.floating) else float
     if r <= 1:
         p = 12 / r / (r + 2) - 2
-        f = np.array([[1, p, 1]]) / (2 + p)
+        f = np.array([1, p, 1]) / (2 + p)
         r = 1
     else:
         f = (
-            np.array([list(range(1, r + 1)) + [r + 1] + list(range(r, 0, -1))])
+            np.array(list(range(1, r + 1)) + [r + 1] + list(range(r, 0, -1)))
             / (r + 1) ** 2
         )
-    f = f.astype(image.dtype)
-    image = np.pad(image, ((r, r), (r, r)), mode="symmetric")
-
-    # FIXME: remove scipy dependencies
-    image = signal.convolve2d(
-        signal.convolve2d(image, f, "valid"), f.T, "valid"
-    )
+    f = f.astype(dtype)
+    out = image.astype(dtype, copy=False)
+    # NOTE: `signal.convolve2d` adds the taps of a row of the kernel four at
+    # a time, so the groups are different for the rows (1 x k kernel) and the
+    # columns (k x 1 kernel)
+    for axis, group in ((-1, 4), (-2, 1)):
+        width = [(0, 0)] * out.ndim
+        width[axis] = (r, r)
+        x = np.pad(out, width, mode="symmetric")
+        n = out.shape[axis]
+        if running_sums and r > 1:
+            x = x.astype(np.float64, copy=False)
+            out = _box_cumsum(_box_cumsum(x, axis, r + 1), axis, r + 1)
+            out = (out / (r + 1) ** 2).astype(dtype, copy=False)
+        else:
+            out = _conv_taps(x, f, axis, n, group)
     if s > 1:
         t = int(np.floor(s / 2) + 1)
-        image = image[
-            t - 1 : image.shape[0] - (s - t) + 1 : s,
-            t - 1 : image.shape[1] - (s - t) + 1 : s,
+        out = out[
+            ...,
+            t - 1 : out.shape[-2] - (s - t) + 1 : s,
+            t - 1 : out.shape[-1] - (s - t) + 1 : s,
         ]
-    return image
+    return out
 
 
 def grad2(image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
     """numerical gradients along x and y directions (no fast)
     See https://github.com/pdollar/toolbox/blob/master/channels/gradient2.m
     Note: np.gradient return [oy, ox], MATLAB version return [ox, oy]
+    Note: the gradients are computed over the last two axes (for stacks)
     """
-    assert image.ndim == 2
-    oy, ox = np.gradient(image)
+    assert image.ndim >= 2
+    oy, ox = np.gradient(image, axis=(-2, -1))
     return ox, oy
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
 from .bwmorph_thin import bwmorph_thin
-from .thin import binary_thin
+from .thin import binary_thin, binary_thin_sweep
 
 __all__ = [
     "bwmorph_thin",
     "binary_thin",
+    "binary_thin_sweep",
 ]
@@ -5,8 +5,15 @@
 https://github.com/Britefury/py-bsds500/blob/master/bsds/thin.py
 """
 
+import functools
+
 import numpy as np
 
+try:
+    from pyEdgeEval._lib.thin import binary_thin as _native_binary_thin
+except ImportError:
+    # fallback to the NumPy implementation
+    _native_binary_thin = None
 
 # Thinning morphological operation applied using lookup tables.
 # We convert the 3x3 neighbourhood surrounding a pixel to an index
@@ -239,10 +246,31 @@ def _thin_iter_2_lut():
     return lut
 
 
+@functools.lru_cache(maxsize=None)
+def get_thin_luts():
+    """
+    Lookup tables of the two sub-iterations (computed once per process)
+
+    Returns:
+        tuple `((thin1, thin1_mut), (thin2, thin2_mut))` of the lookup tables
+        and their mutate masks
+    """
+    thin1 = _thin_iter_1_lut()
+    thin2 = _thin_iter_2_lut()
+    luts = ((thin1, _lut_mutate_mask(thin1)), (thin2, _lut_mutate_mask(thin2)))
+    for lut in luts:
+        for x in lut:
+            # shared between calls
+            x.setflags(write=False)
+    return luts
+
+
 def binary_thin(x, max_iter=None):
     """
     Binary thinning morphological operation
 
+    Uses the compiled implementation (`pyEdgeEval._lib.thin`) when available.
+
     Args:
         x: a binary image, or an image that is to be converted to a binary image
         max_iter (Optional[int]): maximum number of iterations; default is ``None``
@@ -252,10 +280,14 @@ def binary_thin(x, max_iter=None):
     Returns:
         bool mask
     """
-    thin1 = _thin_iter_1_lut()
-    thin2 = _thin_iter_2_lut()
-    thin1_mut = _lut_mutate_mask(thin1)
-    thin2_mut = _lut_mutate_mask(thin2)
+    if _native_binary_thin is not None:
+        return _native_binary_thin(x, max_iter=max_iter)
+    return _binary_thin_lut(x, max_iter=max_iter)
+
+
+def _binary_thin_lut(x, max_iter=None):
+    """Binary thinning using lookup tables (NumPy implementation)"""
+    (thin1, thin1_mut), (thin2, thin2_mut) = get_thin_luts()
 
     iter_count = 0
     while max_iter is None or iter_count < max_iter:
@@ -279,3 +311,43 @@ def binary_thin(x, max_iter=None):
         iter_count += 1
 
     return x
+
+
+def _bounding_box(mask, pad=1):
+    """Slices of the bounding box of `mask` (None if empty)"""
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    return (
+        slice(max(rows[0] - pad, 0), rows[-1] + pad + 1),
+        slice(max(cols[0] - pad, 0), cols[-1] + pad + 1),
+    )
+
+
+def binary_thin_sweep(x, thresholds):
+    """
+    Binary thinning of `x >= t` for a range of thresholds `t`
+
+    Gives the same results as ``binary_thin(x >= t)`` for each threshold.
+    Only the bounding box of each thresholded map (with a margin of one
+    pixel) is thinned, which saves most of the work for high thresholds.
+
+    Args:
+        x: an image (e.g. predicted boundaries)
+        thresholds: a 1D array specifying the thresholds
+
+    Returns:
+        generator of bool masks (one for each threshold)
+    """
+    for thresh in thresholds:
+        mask = x >= thresh
+        box = _bounding_box(mask)
+        if box is not None:
+            if _native_binary_thin is not None:
+                # thin a C-contiguous copy of the box in place
+                crop = np.ascontiguousarray(mask[box])
+                mask[box] = _native_binary_thin(crop, inplace=True)
+            else:
+                mask[box] = _binary_thin_lut(mask[box])
+        yield mask
@@ -8,6 +8,7 @@ from .convert_formats import (
     edge_label2trainId,
 )
 from .distance_transforms import mask2bdry
+from .file_utils import atomic_write, load_versioned_json
 from .logger import (
     get_logger,
     get_root_logger,
@@ -23,8 +24,10 @@ from .path import (
     scandir,
     symlink,
 )
+from .pool import WorkerPool, preload_worker
 from .progressbar import (
     track_iter_progress,
+    track_parallel_iter_progress,
     track_parallel_progress,
     track_progress,
 )
@@ -36,6 +39,8 @@ __all__ = [
     "mask_label2trainId",
     "edge_label2trainId",
     "mask2bdry",
+    "atomic_write",
+    "load_versioned_json",
     "get_logger",
     "get_root_logger",
     "print_log",
@@ -45,7 +50,10 @@ __all__ = [
     "mkdir_or_exist",
     "scandir",
     "symlink",
+    "WorkerPool",
+    "preload_worker",
     "track_iter_progress",
+    "track_parallel_iter_progress",
     "track_parallel_progress",
     "track_progress",
 ]
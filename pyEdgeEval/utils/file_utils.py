@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import os.path as osp
+import tempfile
+
+
+def atomic_write(path, write_fn, suffix=".tmp"):
+    """Atomically write a file
+
+    `write_fn(f)` writes to a temporary file (binary mode) in the same
+    directory, which then replaces `path`. Readers never see a partially
+    written file, and the temporary file is removed on errors.
+
+    Args:
+        path (str): path of the file
+        write_fn (Callable): writes the contents to the file object
+        suffix (str): suffix of the temporary file
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=osp.dirname(path) or ".", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write_fn(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if osp.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_versioned_json(path, version):
+    """Load a JSON file (e.g. an index) and check its `version` entry"""
+    with open(path, "r") as f:
+        data = json.load(f)
+    assert (
+        data.get("version") == version
+    ), f"ERR: {path} has version {data.get('version')}, but {version} is needed (rebuild it)"
+    return data
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""Long-lived worker pool
+
+`track_parallel_progress` creates a new pool for every call, which means
+that the workers are spawned (and re-import cv2, scipy, etc...) for every
+category. A `WorkerPool` can be shared across categories and evaluators.
+"""
+
+from .progressbar import init_pool
+
+__all__ = ["WorkerPool", "preload_worker"]
+
+
+def preload_worker():
+    """Worker initializer that preloads the heavy modules and tables"""
+    # imported here to avoid circular imports
+    import pyEdgeEval._lib  # noqa: F401
+    import pyEdgeEval.datasets  # noqa: F401
+    from pyEdgeEval.preprocess.thin.thin import get_thin_luts
+
+    get_thin_luts()
+    try:
+        import pyEdgeEval._lib.thin  # noqa: F401
+    except ImportError:
+        pass
+
+
+class WorkerPool(object):
+    """Pool of workers that can be reused across evaluations
+
+    The pool is created on first use and must be closed with `close()` (or
+    used as a context manager)::
+
+        with WorkerPool(8) as pool:
+            evaluator.pool = pool
+            evaluator.evaluate(...)
+
+    Args:
+        nproc (int): number of workers
+        backend (str): "process" or "thread"
+        initializer (Callable): function called by each worker when it starts
+            (defaults to `preload_worker`)
+        initargs (tuple): arguments of `initializer`
+    """
+
+    def __init__(
+        self,
+        nproc,
+        backend="process",
+        initializer=preload_worker,
+        initargs=None,
+    ):
+        assert nproc > 0, f"ERR: `nproc` should be positive, but got {nproc}"
+        self.nproc = nproc
+        self.backend = backend
+        self.initializer = initializer
+        self.initargs = initargs
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = init_pool(
+                self.nproc, self.initializer, self.initargs, self.backend
+            )
+        return self._pool
+
+    def imap(self, func, iterable, chunksize=1):
+        return self.pool.imap(func, iterable, chunksize)
+
+    def imap_unordered(self, func, iterable, chunksize=1):
+        return self.pool.imap_unordered(func, iterable, chunksize)
+
+    def close(self):
+        """Wait for the workers to finish and release them"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def terminate(self):
+        """Stop the workers immediately"""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
@@ -9,6 +9,7 @@
 import sys
 from collections.abc import Iterable
 from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
 from shutil import get_terminal_size
 
 from .timer import Timer
@@ -115,15 +116,21 @@ def track_progress(
     return results
 
 
-def init_pool(process_num, initializer=None, initargs=None):
+def init_pool(process_num, initializer=None, initargs=None, backend="process"):
+    if backend == "process":
+        pool_cls = Pool
+    elif backend == "thread":
+        pool_cls = ThreadPool
+    else:
+        raise ValueError(f'"backend" must be "process" or "thread": {backend}')
     if initializer is None:
-        return Pool(process_num)
+        return pool_cls(process_num)
     elif initargs is None:
-        return Pool(process_num, initializer)
+        return pool_cls(process_num, initializer)
     else:
         if not isinstance(initargs, tuple):
             raise TypeError('"initargs" must be a tuple')
-        return Pool(process_num, initializer, initargs)
+        return pool_cls(process_num, initializer, initargs)
 
 
 def track_parallel_progress(
@@ -138,11 +145,16 @@ def track_parallel_progress(
     keep_order=True,
     file=sys.stdout,
     no_bar=False,
+    backend="process",
+    pool=None,
 ):
     """Track the progress of parallel task execution with a progress bar.
 
     The built-in :mod:`multiprocessing` module is used for process pools and
     tasks are done with :func:`Pool.map` or :func:`Pool.imap_unordered`.
+    With ``backend="thread"``, a :class:`multiprocessing.pool.ThreadPool` is
+    used instead, which avoids spawning processes and pickling the tasks and
+    results (useful when ``func`` releases the GIL).
 
     Args:
         func (callable): The function to be applied to each task.
@@ -160,6 +172,9 @@ def track_parallel_progress(
             longer.
         keep_order (bool): If True, :func:`Pool.imap` is used, otherwise
             :func:`Pool.imap_unordered` is used.
+        backend (str): "process" or "thread".
+        pool (WorkerPool): existing pool to use (not closed; ``nproc``,
+            ``initializer``, ``initargs`` and ``backend`` are ignored).
 
     Returns:
         list: The task results.
@@ -176,7 +191,9 @@ def track_parallel_progress(
         raise TypeError(
             '"tasks" must be an iterable object or a (iterator, int) tuple'
         )
-    pool = init_pool(nproc, initializer, initargs)
+    own_pool = pool is None
+    if own_pool:
+        pool = init_pool(nproc, initializer, initargs, backend)
     start = not skip_first
     task_num -= nproc * chunksize * int(skip_first)
     if not no_bar:
@@ -199,11 +216,101 @@ def track_parallel_progress(
             prog_bar.update()
     if not no_bar:
         prog_bar.file.write("\n")
-    pool.close()
-    pool.join()
+    if own_pool:
+        pool.close()
+        pool.join()
     return results
 
 
+class _IndexedFunc(object):
+    """Wraps `func` so that the results are returned with the task index"""
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, indexed_task):
+        index, task = indexed_task
+        return index, self.func(task)
+
+
+def track_parallel_iter_progress(
+    func,
+    tasks,
+    nproc,
+    initializer=None,
+    initargs=None,
+    bar_width=50,
+    chunksize=1,
+    file=sys.stdout,
+    no_bar=False,
+    backend="process",
+    pool=None,
+):
+    """Track the progress of parallel task execution and yield the results
+    as soon as they are ready.
+
+    Tasks are done with :func:`Pool.imap_unordered`, so the results are
+    yielded in the order of completion, together with the index of the task.
+    When ``nproc <= 1`` (and no ``pool`` is given), the tasks are done in the
+    main process.
+
+    Args:
+        func (callable): The function to be applied to each task.
+        tasks (list or tuple[Iterable, int]): A list of tasks or
+            (tasks, total num).
+        nproc (int): Process (worker) number.
+        initializer (None or callable): Refer to :class:`multiprocessing.Pool`
+            for details.
+        initargs (None or tuple): Refer to :class:`multiprocessing.Pool` for
+            details.
+        bar_width (int): Width of progress bar.
+        chunksize (int): Refer to :class:`multiprocessing.Pool` for details.
+        backend (str): "process" or "thread".
+        pool (WorkerPool): existing pool to use (not closed; ``nproc``,
+            ``initializer``, ``initargs`` and ``backend`` are ignored).
+
+    Yields:
+        tuple: `(index, result)` of each task.
+    """
+    if isinstance(tasks, tuple):
+        assert len(tasks) == 2
+        assert isinstance(tasks[0], Iterable)
+        assert isinstance(tasks[1], int)
+        task_num = tasks[1]
+        tasks = tasks[0]
+    elif isinstance(tasks, Iterable):
+        task_num = len(tasks)
+    else:
+        raise TypeError(
+            '"tasks" must be an iterable object or a (iterator, int) tuple'
+        )
+    if not no_bar:
+        prog_bar = ProgressBar(task_num, bar_width, file=file)
+    own_pool = pool is None and nproc > 1
+    if own_pool:
+        pool = init_pool(nproc, initializer, initargs, backend)
+    if pool is not None:
+        gen = pool.imap_unordered(
+            _IndexedFunc(func), enumerate(tasks), chunksize
+        )
+    else:
+        gen = (_IndexedFunc(func)(task) for task in enumerate(tasks))
+    try:
+        for result in gen:
+            yield result
+            if not no_bar:
+                prog_bar.update()
+        if not no_bar:
+            prog_bar.file.write("\n")
+        if own_pool:
+            pool.close()
+            pool.join()
+    finally:
+        if own_pool:
+            # stopped early (no-op when the pool is already closed)
+            pool.terminate()
+
+
 def track_iter_progress(tasks, bar_width=50, file=sys.stdout):
     """Track the progress of tasks iteration or enumeration with a progress
     bar.
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+"""Convert BSDS500 GTs
+
+- the boundaries of all the annotators are saved as a single bit-packed file
+  per image (`groundTruthPacked/<split>/<name>.bin`)
+- evaluate with `--packed-gt` to skip parsing the .mat files
+"""
+
+import argparse
+
+from pyEdgeEval.helpers.convert_bsds import convert_bsds500
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert BSDS500 GTs")
+    parser.add_argument(
+        "--root",
+        type=str,
+        default="data/BSDS500",
+        help="BSDS500 directory",
+    )
+    parser.add_argument(
+        "-o",
+        "--out-dir",
+        type=str,
+        default="groundTruthPacked",
+        help="where to save the packed gts (`groundTruthPacked`)",
+    )
+    parser.add_argument(
+        "--nproc",
+        default=4,
+        type=int,
+        help="number of processes",
+    )
+    args = parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    print(">>> root:  \t", args.root)
+    print(">>> save:  \t", args.out_dir)
+    print(">>> nproc: \t", args.nproc)
+
+    convert_bsds500(
+        root=args.root,
+        out_dir=args.out_dir,
+        nproc=args.nproc,
+    )
+
+    print(">>> done!")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""NMS predictions offline
+
+- suppresses all the predictions under a directory (recursively) once, so that
+  the evaluation doesn't need `--apply-nms`
+- outputs are PNGs (same tree as the predictions) or `.npz` shards with
+  `--packed` (see `pyEdgeEval.helpers.nms_predictions.PackedPredictions`)
+- interrupted runs are resumed by running the same command again
+"""
+
+import argparse
+
+from pyEdgeEval.helpers.nms_predictions import nms_predictions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="NMS predictions")
+    parser.add_argument(
+        "pred_dir",
+        type=str,
+        help="directory of the predictions",
+    )
+    parser.add_argument(
+        "save_dir",
+        type=str,
+        help="where to save the suppressed predictions",
+    )
+    parser.add_argument(
+        "--suffix",
+        type=str,
+        default=".png",
+        choices=[".png", ".mat", ".npy"],
+        help="format of the predictions",
+    )
+    parser.add_argument(
+        "--key",
+        type=str,
+        default=None,
+        help="name of the variable in .mat predictions",
+    )
+    parser.add_argument(
+        "--packed",
+        action="store_true",
+        help="save to .npz shards instead of PNGs",
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=1000,
+        help="number of predictions per shard (with --packed)",
+    )
+    parser.add_argument(
+        "--nproc",
+        default=4,
+        type=int,
+        help="number of workers",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default="process",
+        choices=["process", "thread"],
+        help="use processes or threads for the workers",
+    )
+    args = parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    print(">>> preds: \t", args.pred_dir)
+    print(">>> save:  \t", args.save_dir)
+    print(">>> nproc: \t", args.nproc)
+
+    num = nms_predictions(
+        pred_dir=args.pred_dir,
+        save_dir=args.save_dir,
+        suffix=args.suffix,
+        key=args.key,
+        packed=args.packed,
+        shard_size=args.shard_size,
+        nproc=args.nproc,
+        backend=args.backend,
+    )
+
+    print(f">>> done! ({num} predictions)")
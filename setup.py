@@ -62,6 +62,7 @@ def get_extentions():
 
     - `correspond_pixels.pyx`
     - `nms.pyx`
+    - `thin.pyx`
 
     # FIXME: need to compile sourcefiles everytime... but I guess -fPIC is working some magic
     """
@@ -102,6 +103,7 @@ def get_extentions():
     source_files = [
         "nms.pyx",
         "src/benms.cc",
+        "src/fast_nms.cc",
         "src/Exception.cc",
         "src/Matrix.cc",
         "src/Random.cc",
@@ -116,7 +118,25 @@ def get_extentions():
             sources=sources,
             include_dirs=[osp.join(ROOT, "include")],
             language="c++",
-            extra_compile_args=["-fPIC", "-DNOBLAS"],
+            # no fused multiply-adds, so that the sums are rounded the same
+            # way as the NumPy implementation
+            extra_compile_args=["-fPIC", "-DNOBLAS", "-ffp-contract=off"],
+        )
+    ]
+
+    source_files = [
+        "thin.pyx",
+        "src/thin.cc",
+    ]
+    sources = _add_sources(source_files)
+
+    extensions += [
+        Extension(
+            f"{PKG_NAME}._lib.thin",
+            sources=sources,
+            include_dirs=[osp.join(ROOT, "include")],
+            language="c++",
+            extra_compile_args=["-fPIC"],
         )
     ]
 
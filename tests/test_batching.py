@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pyEdgeEval.common.batching import (
+    estimate_cost,
+    make_chunks,
+    track_eval_progress,
+)
+from pyEdgeEval.utils import WorkerPool
+
+
+def test_make_chunks():
+    """Chunks should cover all samples in order with balanced costs"""
+    samples = [
+        dict(name=str(i), cost=c, thresholds=np.arange(3), max_dist=0.02)
+        for i, c in enumerate([1, 1, 1, 1, 8, 1, 1, 1, 1, 8, 4, 4])
+    ]
+    shared, chunks = make_chunks(
+        samples, num_chunks=4, cost_fn=lambda s: s["cost"]
+    )
+    assert len(chunks) <= 4
+
+    indices = [i for chunk_indices, _ in chunks for i in chunk_indices]
+    assert indices == list(range(len(samples)))
+
+    # the parameters shared by all the samples are not in the chunks
+    assert set(shared.keys()) == {"thresholds", "max_dist"}
+    for chunk_indices, items in chunks:
+        for i, item in zip(chunk_indices, items):
+            assert item == dict(name=str(i), cost=samples[i]["cost"])
+        assert sum(item["cost"] for item in items) <= 16
+
+
+def test_estimate_cost(tmp_path):
+    """The cost should only depend on the GT (predictions aren't opened)"""
+    edge_path = str(tmp_path / "edge.png")
+    Image.fromarray(np.zeros((30, 40), dtype=np.uint8)).save(edge_path)
+    sample = dict(
+        edge_path=edge_path,
+        pred_paths=[str(tmp_path / f"missing_{i}.png") for i in range(5)],
+        thresholds=np.arange(7),
+    )
+    assert estimate_cost(sample) == 30 * 40 * 5 * 7
+
+
+def _eval_sample(sample):
+    return np.full(3, sample["value"] * sample["scale"]), np.arange(3)
+
+
+@pytest.mark.parametrize("use_pool", [False, True])
+def test_track_eval_progress(use_pool):
+    """Chunked evaluation (shared entries installed in the workers) should
+    give the results of each sample"""
+    samples = [dict(value=i, scale=2.0, thresholds=3) for i in range(10)]
+    if use_pool:
+        with WorkerPool(2) as pool:
+            results = dict(
+                track_eval_progress(_eval_sample, samples, 1, pool=pool)
+            )
+    else:
+        results = dict(track_eval_progress(_eval_sample, samples, nproc=2))
+    assert sorted(results.keys()) == list(range(10))
+    for i, sample in enumerate(samples):
+        for result, expected in zip(results[i], _eval_sample(sample)):
+            np.testing.assert_array_equal(result, expected)
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pyEdgeEval.datasets.bsds import (
+    convert_bsds_gt,
+    load_bsds_gt_boundaries,
+)
+
+GT_PATH = "data/BSDS500_bench/groundTruth/3063.mat"
+
+
+def test_packed_bsds_gt(tmp_path):
+    """Packed GTs should hold the same boundaries as the .mat GTs"""
+    packed_path = str(tmp_path / "3063.bin")
+    convert_bsds_gt(GT_PATH, packed_path)
+
+    expected = load_bsds_gt_boundaries(GT_PATH)
+    gts = load_bsds_gt_boundaries(packed_path)
+    assert gts.dtype == bool
+    assert gts.shape == (len(expected),) + expected[0].shape
+    for gt, expected_gt in zip(gts, expected):
+        assert np.array_equal(gt, expected_gt != 0)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import os
+import os.path as osp
+
+import numpy as np
+
+from pyEdgeEval.common.cache import CachedEvalSingle
+
+
+def _eval_single(sample):
+    with open(sample["pred_path"], "rb") as f:
+        n = len(f.read())
+    counts = np.full(sample["thresholds"], n, dtype=float)
+    return counts, counts + 1
+
+
+def test_cache_hit_and_invalidation(tmp_path):
+    pred_path = str(tmp_path / "pred.png")
+    with open(pred_path, "wb") as f:
+        f.write(b"abc")
+    sample = dict(name="a", pred_path=pred_path, thresholds=3)
+
+    cached = CachedEvalSingle(_eval_single, str(tmp_path / "cache"))
+    key = cached.key(sample)
+    assert cached.load(key) is None
+
+    result = cached(sample)
+    loaded = cached.load(key)
+    assert isinstance(loaded, tuple) and len(loaded) == 2
+    for r, l in zip(result, loaded):
+        assert (r == l).all() and r.dtype == l.dtype
+
+    # changing the contents of a file (or a parameter) changes the key
+    with open(pred_path, "wb") as f:
+        f.write(b"abcd")
+    assert cached.key(sample) != key
+    assert cached.key(dict(sample, thresholds=4)) != key
+
+
+def test_cache_eviction(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cached = CachedEvalSingle(_eval_single, cache_dir, max_size=None)
+    pred_path = str(tmp_path / "pred.png")
+    with open(pred_path, "wb") as f:
+        f.write(b"abc")
+
+    keys = []
+    for i in range(4):
+        sample = dict(name=str(i), pred_path=pred_path, thresholds=3)
+        cached(sample)
+        keys.append(cached.key(sample))
+        # make the access order explicit
+        os.utime(cached.path(keys[-1]), (i, i))
+    size = osp.getsize(cached.path(keys[0]))
+
+    cached.max_size = 2 * size
+    cached.evict()
+    remaining = [osp.exists(cached.path(k)) for k in keys]
+    assert remaining == [False, False, True, True]
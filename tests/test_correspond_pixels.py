@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+
+from pyEdgeEval._lib import (
+    correspond_pixels,
+    correspond_pixels_multi,
+    correspond_pixels_sweep,
+)
+
+
+def _make_sample():
+    gt = np.zeros((64, 96), dtype=bool)
+    gt[20, 10:80] = True
+    gt[10:50, 40] = True
+    pred = np.zeros(gt.shape, dtype=float)
+    pred[21, 5:70] = np.linspace(0.1, 1.0, 65)
+    pred[10:60, 41] = np.linspace(1.0, 0.2, 50)
+    pred[55, 60:90] = 0.5  # false positives
+    return pred, gt
+
+
+def test_correspond_pixels_sweep():
+    pred, gt = _make_sample()
+    thresholds = np.linspace(0.05, 0.95, 10)
+
+    count_p, count_r = correspond_pixels_sweep(pred, gt, thresholds)
+
+    for i_t, thresh in enumerate(thresholds):
+        match1, match2, _, _ = correspond_pixels(pred >= thresh, gt)
+        assert count_p[i_t] == (match1 > 0).sum()
+        assert count_r[i_t] == (match2 > 0).sum()
+
+
+def test_correspond_pixels_sweep_empty():
+    pred, gt = _make_sample()
+    thresholds = np.linspace(0.05, 0.95, 10)
+
+    count_p, count_r = correspond_pixels_sweep(
+        pred, np.zeros_like(gt), thresholds
+    )
+    assert not count_p.any()
+    assert not count_r.any()
+
+
+def test_correspond_pixels_counts():
+    pred, gt = _make_sample()
+    _pred = pred >= 0.5
+
+    match1, match2, _, _ = correspond_pixels(_pred, gt, max_dist=0.02)
+    acc = np.zeros(gt.shape, dtype=bool)
+    count1, count2, _, _ = correspond_pixels(
+        _pred, gt, max_dist=0.02, return_maps=False, acc0=acc
+    )
+    assert count1 == (match1 > 0).sum()
+    assert count2 == (match2 > 0).sum()
+    assert (acc == (match1 > 0)).all()
+
+
+def test_correspond_pixels_seed():
+    pred, gt = _make_sample()
+    _pred = pred >= 0.3
+
+    results = [
+        correspond_pixels(_pred, gt, max_dist=0.02, seed=1) for _ in range(3)
+    ]
+    for match1, match2, cost, _ in results[1:]:
+        assert (match1 == results[0][0]).all()
+        assert (match2 == results[0][1]).all()
+        assert cost == results[0][2]
+
+
+def test_correspond_pixels_multi():
+    pred, gt = _make_sample()
+    _pred = pred >= 0.3
+    gts = np.stack([gt, np.roll(gt, 2, axis=1), np.zeros_like(gt)])
+
+    acc = np.zeros(gt.shape, dtype=bool)
+    count = 0
+    for _gt in gts:
+        _, count2, _, _ = correspond_pixels(
+            _pred, _gt, max_dist=0.02, return_maps=False, acc0=acc
+        )
+        count += count2
+
+    for _gts in (gts, list(gts.astype(np.uint8))):
+        count_multi, acc_multi = correspond_pixels_multi(
+            _pred, _gts, max_dist=0.02
+        )
+        assert count_multi == count
+        assert (acc_multi == acc).all()
+
+
+def test_correspond_pixels_components():
+    pred, gt = _make_sample()
+    _pred = pred >= 0.3
+    h, w = gt.shape
+
+    # two copies of the sample that are too far apart to be matched together
+    pred2 = np.zeros((h, 4 * w), dtype=bool)
+    gt2 = np.zeros((h, 4 * w), dtype=bool)
+    pred2[:, :w] = pred2[:, -w:] = _pred
+    gt2[:, :w] = gt2[:, -w:] = gt
+
+    match1, match2, _, _ = correspond_pixels(pred2, gt2, max_dist=0.02)
+    assert (match1[:, :w] > 0).sum() == (match1[:, -w:] > 0).sum()
+    assert (match2[:, :w] > 0).sum() == (match2[:, -w:] > 0).sum()
+    assert (match1 > 0).sum() == (match2 > 0).sum()
+
+
+def test_correspond_pixels_errors():
+    """The checks should report the offending argument"""
+    pred, gt = _make_sample()
+    thresholds = np.linspace(0.05, 0.95, 10)
+    calls = [
+        lambda **kw: correspond_pixels(pred >= 0.5, gt, **kw),
+        lambda **kw: correspond_pixels_sweep(pred, gt, thresholds, **kw),
+        lambda **kw: correspond_pixels_multi(gt, gt[None], **kw),
+    ]
+    for call in calls:
+        with pytest.raises(ValueError, match=r"max_dist must be > 0 \(it is 0"):
+            call(max_dist=0.0)
+        with pytest.raises(
+            ValueError, match=r"outlier_cost must be > 1 \(it is 0.5\)"
+        ):
+            call(outlier_cost=0.5)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+from PIL import Image
+from scipy import ndimage as ndi
+
+from pyEdgeEval.common.metrics import compute_pr_metrics
+from pyEdgeEval.common.multi_label import (
+    evaluate_boundaries_threshold,
+    rgb_multilabel_encoding,
+)
+from pyEdgeEval.common.multi_label.edge_decoding import decode_png
+from pyEdgeEval.common.multi_label.options import kill_internal_prediction
+from pyEdgeEval.common.utils import check_thresholds
+from pyEdgeEval.datasets import cityscapes, sbd
+from pyEdgeEval.evaluators import (
+    CityscapesEvaluator,
+    OTFCityscapesEvaluator,
+    SBDEvaluator,
+)
+from pyEdgeEval.preprocess import binary_thin, fast_nms
+
+NUM_SAMPLES = 3
+
+
+def _make_dataset(root, evaluator_cls, num_classes, shape=(40, 60)):
+    """Random GT edges, segmentation maps and predictions"""
+    if evaluator_cls is CityscapesEvaluator:
+        gt_dir = root / "gtEval" / "val"
+        (root / "gtFine" / "val").mkdir(parents=True)
+        split_file = root / "splits" / "val.txt"
+    else:
+        gt_dir = root / "gtEval"
+        split_file = root / "val.txt"
+    gt_dir.mkdir(parents=True)
+    split_file.parent.mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(0)
+    names = [f"img{i}" for i in range(NUM_SAMPLES)]
+    for name in names:
+        seg = rng.integers(0, num_classes, size=(4, 6)).astype(np.uint8)
+        seg = np.kron(seg, np.ones((10, 10), dtype=np.uint8))
+        edges = np.stack(
+            [
+                (
+                    ndi.morphological_gradient(
+                        (seg == c).astype(np.uint8), size=2
+                    )
+                ).astype(np.uint8)
+                for c in range(num_classes)
+            ]
+        )
+        edge = Image.fromarray(rgb_multilabel_encoding(edges))
+        for suffix in ("RAW_EDGE_SUFFIX", "RAW_ISEDGE_SUFFIX"):
+            edge.save(gt_dir / f"{name}{getattr(evaluator_cls, suffix)}")
+        Image.fromarray(seg).save(gt_dir / f"{name}{evaluator_cls.SEG_SUFFIX}")
+
+        for c in range(1, num_classes + 1):
+            pred = (
+                ndi.gaussian_filter(edges[c - 1] * 1.0, 1)
+                + rng.random(shape) * 0.2
+            )
+            pred = np.round(pred / pred.max() * 255).astype(np.uint8)
+            pred_dir = root / "preds" / f"class_{str(c).zfill(3)}"
+            pred_dir.mkdir(parents=True, exist_ok=True)
+            Image.fromarray(pred).save(
+                pred_dir / f"{name}{evaluator_cls.PRED_SUFFIX}"
+            )
+    split_file.write_text("\n".join(names))
+
+
+@pytest.mark.parametrize("evaluator_cls", [CityscapesEvaluator, SBDEvaluator])
+def test_evaluate_single_pass(tmp_path, evaluator_cls):
+    """Single-pass evaluation should give the same metrics per category"""
+    num_classes = len(evaluator_cls.CLASSES)
+    _make_dataset(tmp_path, evaluator_cls, num_classes)
+
+    evaluator = evaluator_cls(str(tmp_path), str(tmp_path / "preds"))
+    evaluator.set_eval_params(
+        scale=1.0,
+        apply_nms=True,
+        kill_internal=True,
+        skip_if_nonexistent=True,
+        instance_sensitive=False,
+    )
+    categories = [1, 2, 5]
+    expected = [
+        evaluator.evaluate_category(
+            category=category, thresholds=5, nproc=1, save_dir=None
+        )
+        for category in categories
+    ]
+    results = evaluator.evaluate_all_categories(
+        categories=categories, thresholds=5, nproc=1, save_dir=None
+    )
+    assert results == expected
+
+    # same metrics from the GT store
+    evaluator.compile_gt_store(str(tmp_path / "store"))
+    results = evaluator.evaluate_all_categories(
+        categories=categories, thresholds=5, nproc=1, save_dir=None
+    )
+    assert results == expected
+
+
+def _reference_metrics(
+    root, evaluator_cls, category, thresholds, max_dist, apply_thinning
+):
+    """Evaluate each threshold of each sample like the original code (the
+    internal boundaries are killed after thresholding and thinning, and the
+    matching uses a fixed seed)"""
+    num_classes = len(evaluator_cls.CLASSES)
+    gt_dir = root / "gtEval"
+    load_pred = sbd.load_pred
+    if evaluator_cls is CityscapesEvaluator:
+        gt_dir = gt_dir / "val"
+        load_pred = cityscapes.load_pred
+    thresholds = check_thresholds(thresholds)
+
+    counts = []
+    for i in range(NUM_SAMPLES):
+        name = f"img{i}"
+        edge = Image.open(gt_dir / f"{name}{evaluator_cls.RAW_EDGE_SUFFIX}")
+        gt = decode_png(edge, num_classes)[category - 1]
+        seg = np.array(Image.open(gt_dir / f"{name}{evaluator_cls.SEG_SUFFIX}"))
+        pred_path = (
+            root
+            / "preds"
+            / f"class_{str(category).zfill(3)}"
+            / f"{name}{evaluator_cls.PRED_SUFFIX}"
+        )
+        pred = fast_nms(load_pred(str(pred_path), *gt.shape))
+
+        sample_counts = []
+        for thresh in thresholds:
+            _pred = pred >= thresh
+            if apply_thinning:
+                _pred = binary_thin(_pred)
+            if gt.any():
+                _pred = kill_internal_prediction(
+                    _pred, gt, seg == category - 1, max_dist=max_dist
+                )
+            # a single binary map (`seed=0` of the matching by default)
+            sample_counts.append(
+                evaluate_boundaries_threshold(
+                    thresholds=np.array([0.5]),
+                    pred=_pred.astype(float),
+                    gt=gt,
+                    max_dist=max_dist,
+                    apply_thinning=False,
+                    skip_if_nonexistent=True,
+                )
+            )
+        counts.append(np.concatenate(sample_counts, axis=-1))
+    counts = np.stack(counts, axis=1)
+    return compute_pr_metrics(thresholds, *counts)[2]
+
+
+@pytest.mark.parametrize("apply_thinning", [False, True])
+@pytest.mark.parametrize("evaluator_cls", [CityscapesEvaluator, SBDEvaluator])
+def test_evaluate_reference(tmp_path, evaluator_cls, apply_thinning):
+    """The metrics should match an independent per-threshold evaluation"""
+    num_classes = len(evaluator_cls.CLASSES)
+    _make_dataset(tmp_path, evaluator_cls, num_classes)
+
+    evaluator = evaluator_cls(str(tmp_path), str(tmp_path / "preds"))
+    evaluator.set_eval_params(
+        scale=1.0,
+        apply_thinning=apply_thinning,
+        apply_nms=True,
+        kill_internal=True,
+        skip_if_nonexistent=True,
+        instance_sensitive=False,
+        max_dist=0.02,
+    )
+    categories = [1, 2, 5]
+    results = evaluator.evaluate_all_categories(
+        categories=categories, thresholds=5, nproc=1, save_dir=None
+    )
+    for category, result in zip(categories, results):
+        expected = _reference_metrics(
+            tmp_path, evaluator_cls, category, 5, 0.02, apply_thinning
+        )
+        assert result.keys() == expected.keys()
+        for k in expected:
+            assert result[k] == expected[k], k
+
+
+def test_evaluate_single_pass_otf(tmp_path):
+    """Same as above for the on-the-fly GTs (label and instance maps)"""
+    (tmp_path / "gtEval" / "val").mkdir(parents=True)
+    gt_dir = tmp_path / "gtFine" / "val"
+    gt_dir.mkdir(parents=True)
+    (tmp_path / "splits").mkdir()
+
+    rng = np.random.default_rng(0)
+    names = [f"img{i}" for i in range(NUM_SAMPLES)]
+    for name in names:
+        labels = rng.choice([7, 8, 11, 24, 26], size=(4, 6))
+        seg = np.kron(labels, np.ones((20, 20), dtype=np.uint8))
+        inst = seg.astype(np.uint16)
+        for label in (24, 26):
+            components, num = ndi.label(seg == label)
+            for k in range(num):
+                inst[components == k + 1] = label * 1000 + k
+        Image.fromarray(seg.astype(np.uint8)).save(
+            gt_dir / f"{name}{OTFCityscapesEvaluator.SEG_SUFFIX}"
+        )
+        Image.fromarray(inst).save(
+            gt_dir / f"{name}{OTFCityscapesEvaluator.INST_SUFFIX}"
+        )
+        for c in range(1, len(OTFCityscapesEvaluator.CLASSES) + 1):
+            pred = ndi.gaussian_filter(rng.random(seg.shape), 2)
+            pred = np.round(pred / pred.max() * 255).astype(np.uint8)
+            pred_dir = tmp_path / "preds" / f"class_{str(c).zfill(3)}"
+            pred_dir.mkdir(parents=True, exist_ok=True)
+            Image.fromarray(pred).save(
+                pred_dir / f"{name}{OTFCityscapesEvaluator.PRED_SUFFIX}"
+            )
+    (tmp_path / "splits" / "val.txt").write_text("\n".join(names))
+
+    evaluator = OTFCityscapesEvaluator(str(tmp_path), str(tmp_path / "preds"))
+    evaluator.set_eval_params(scale=0.5, instance_sensitive=True)
+    categories = [1, 3, 12, 14]
+    expected = [
+        evaluator.evaluate_category(
+            category=category, thresholds=5, nproc=1, save_dir=None
+        )
+        for category in categories
+    ]
+    results = evaluator.evaluate_all_categories(
+        categories=categories, thresholds=5, nproc=1, save_dir=None
+    )
+    assert results == expected
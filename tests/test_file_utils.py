@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+
+import json
+import os
+
+import pytest
+
+from pyEdgeEval.utils import atomic_write, load_versioned_json
+
+
+def test_atomic_write(tmp_path):
+    """The file is replaced at once and nothing is left on errors"""
+    path = str(tmp_path / "index.json")
+    atomic_write(path, lambda f: f.write(b'{"version": 1}'), suffix=".tmp")
+    assert load_versioned_json(path, 1) == dict(version=1)
+    with pytest.raises(AssertionError):
+        load_versioned_json(path, 2)
+
+    def _fail(f):
+        f.write(b"partial")
+        raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(path, _fail, suffix=".tmp")
+    # the previous contents are kept and the temporary file is removed
+    with open(path, "r") as f:
+        assert json.load(f) == dict(version=1)
+    assert os.listdir(tmp_path) == ["index.json"]
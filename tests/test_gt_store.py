@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import os
+
+import numpy as np
+from PIL import Image
+
+from pyEdgeEval.common.gt_store import build_gt_store, open_gt_store
+from pyEdgeEval.common.multi_label import (
+    load_packed_edge,
+    rgb_multilabel_encoding,
+)
+from pyEdgeEval.datasets.bsds import load_bsds_gt_boundaries
+
+BSDS_GT_PATH = "data/BSDS500_bench/groundTruth/2018.mat"
+
+
+def test_gt_store(tmp_path):
+    """GTs loaded from the store should be the same as the decoded ones"""
+    rng = np.random.default_rng(0)
+    num_classes = 20
+    edges = (rng.random((num_classes, 30, 40)) < 0.05).astype(np.uint8)
+    edge_path = str(tmp_path / "edge.png")
+    seg_path = str(tmp_path / "seg.png")
+    Image.fromarray(rgb_multilabel_encoding(edges)).save(edge_path)
+    seg = rng.integers(0, num_classes, (30, 40)).astype(np.uint8)
+    Image.fromarray(seg).save(seg_path)
+    store_root = str(tmp_path / "store")
+
+    jobs = [
+        dict(
+            kind="multilabel",
+            edge_path=edge_path,
+            seg_path=seg_path,
+            scale=scale,
+            num_classes=num_classes,
+        )
+        for scale in (1.0, 0.5)
+    ]
+    jobs.append(dict(kind="bsds", gt_path=BSDS_GT_PATH))
+    # small shards to test multiple shards
+    assert build_gt_store(store_root, jobs, shard_size=256) == 3
+    # up-to-date entries are skipped
+    assert build_gt_store(store_root, jobs) == 0
+
+    store = open_gt_store(store_root)
+    for scale in (1.0, 0.5):
+        expected = load_packed_edge(edge_path, scale, num_classes).decode()
+        edge = store.load_multilabel_edge(edge_path, scale, num_classes)
+        assert np.array_equal(edge.decode(), expected)
+        seg = store.load_seg(seg_path, scale)
+        expected_seg = Image.open(seg_path).resize(
+            (edge.width, edge.height), Image.Resampling.NEAREST
+        )
+        assert np.array_equal(seg, np.array(expected_seg))
+
+    gts = store.load_bsds_gt(BSDS_GT_PATH)
+    expected = load_bsds_gt_boundaries(BSDS_GT_PATH)
+    assert len(gts) == len(expected)
+    for gt, expected_gt in zip(gts, expected):
+        assert gt.dtype == expected_gt.dtype
+        assert np.array_equal(gt, expected_gt)
+
+    # changed sources are recompiled
+    st = os.stat(seg_path)
+    os.utime(seg_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert build_gt_store(store_root, jobs) == 2
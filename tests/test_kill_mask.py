@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from scipy import ndimage as ndi
+
+from pyEdgeEval.common.multi_label.options import find_segments, get_kill_mask
+
+
+def _reference_kill_mask(gt, seg, max_dist):
+    # distance transform of the whole image
+    buffer = np.sqrt(gt.shape[0] ** 2 + gt.shape[1] ** 2) * max_dist
+    distmap = ndi.distance_transform_edt(1 - gt)
+    return np.invert((distmap > buffer) * seg)
+
+
+def test_get_kill_mask():
+    """Kill masks of the segments (with or without their bounding boxes)
+    should match the distance transform of the whole image"""
+    rng = np.random.default_rng(0)
+    num_labels = 6
+    seg = ndi.zoom(rng.integers(0, num_labels, (6, 8)), 12, order=0)
+    seg[:10, :10] = 255  # ignored
+    seg[seg == 4] = 3  # absent label
+
+    segments = find_segments(seg, num_labels)
+    assert segments[4] is None
+    for label, box in enumerate(segments):
+        mask = seg == label
+        gt = ndi.morphological_gradient(mask.astype(np.uint8), size=3) > 0
+        gt[rng.random(gt.shape) < 0.3] = False
+        gt = gt.astype(np.uint8)
+        for max_dist in (0.01, 0.02, 0.1):
+            expected = _reference_kill_mask(gt, mask, max_dist)
+            out = get_kill_mask(gt, mask, max_dist)
+            np.testing.assert_array_equal(out, expected)
+            if box is None:
+                assert expected.all()
+                continue
+            out = get_kill_mask(gt, mask[box], max_dist, box=box)
+            np.testing.assert_array_equal(out, expected)
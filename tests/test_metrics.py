@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pyEdgeEval.common.metrics import (
+    PRMetricsAccumulator,
+    area_under_curve,
+    compute_pr_metrics,
+    compute_rec_prec_f1,
+    f1,
+    interpolated_max_scores_batch,
+)
+
+
+def _make_counts(rng, n_curves=3, n_samples=6, n_thresh=9):
+    sum_r = rng.integers(1, 50, (n_curves, n_samples, 1)) * np.ones(n_thresh)
+    count_r = np.minimum(sum_r, rng.integers(0, 50, sum_r.shape))
+    sum_p = np.sort(rng.integers(0, 80, sum_r.shape), axis=-1)[..., ::-1]
+    count_p = np.minimum(sum_p, rng.integers(0, 60, sum_r.shape))
+    return count_r, sum_r, count_p, sum_p.astype(float)
+
+
+def test_interpolated_max_scores_batch():
+    """Compare against scanning the interpolated points in a loop"""
+    rng = np.random.default_rng(0)
+    thresholds = np.linspace(0.1, 0.9, 9)
+    rec = rng.random((4, 9))
+    prec = rng.random((4, 9))
+    best = interpolated_max_scores_batch(thresholds, rec, prec)
+    for i in range(4):
+        expected = (thresholds[0], rec[i, 0], prec[i, 0])
+        best_f1 = f1(prec[i, 0], rec[i, 0])
+        for j in range(1, 9):
+            for d in np.linspace(0, 1, num=101):
+                t = thresholds[j] * d + thresholds[j - 1] * (1 - d)
+                r = rec[i, j] * d + rec[i, j - 1] * (1 - d)
+                p = prec[i, j] * d + prec[i, j - 1] * (1 - d)
+                if f1(p, r) > best_f1:
+                    expected = (t, r, p)
+                    best_f1 = f1(p, r)
+        assert (best[0][i], best[1][i], best[2][i]) == expected
+        assert best[3][i] == best_f1
+
+
+def test_area_under_curve():
+    """Compare against interpolating the unique recalls of each curve"""
+    rng = np.random.default_rng(3)
+    levels = np.arange(0, 1, 0.01)
+    for n_thresh in (1, 2, 9, 99):
+        rec = np.round(rng.random((6, n_thresh)) * 20) / 20  # ties
+        rec[1] = np.sort(rec[1])[::-1]
+        rec[2] = 0.5  # a single recall value
+        rec[3, -1] = levels[-1]
+        prec = rng.random((6, n_thresh))
+        auc = area_under_curve(rec, prec)
+        for i in range(rec.shape[0]):
+            rec_unique, idx = np.unique(rec[i], return_index=True)
+            expected = 0.0
+            if rec_unique.shape[0] > 1:
+                prec_interp = np.interp(
+                    levels, rec_unique, prec[i][idx], left=0.0, right=0.0
+                )
+                expected = prec_interp.sum() * 0.01
+            assert auc[i] == expected
+
+
+def test_compute_pr_metrics_batch():
+    """A batch of curves should give the same results as each curve"""
+    rng = np.random.default_rng(1)
+    thresholds = np.linspace(0.1, 0.9, 9)
+    counts = _make_counts(rng)
+    samples, _, overall = compute_pr_metrics(thresholds, *counts)
+    for i in range(counts[0].shape[0]):
+        s, _, o = compute_pr_metrics(thresholds, *(c[i] for c in counts))
+        for k in o:
+            assert o[k] == overall[k][i]
+        for k in s:
+            assert np.array_equal(s[k], samples[k][i])
+
+        # OIS from the best threshold of each sample
+        rec, prec, f = compute_rec_prec_f1(*(c[i] for c in counts))
+        best = np.argmax(f, axis=1)
+        idx = np.arange(best.shape[0])
+        r, p, f = compute_rec_prec_f1(*(c[i][idx, best].sum() for c in counts))
+        assert o["OIS_recall"] == r
+        assert o["OIS_precision"] == p
+        assert o["OIS_f1"] == f
+
+
+def test_pr_metrics_accumulator():
+    """Adding the samples in any order should give the same results"""
+    rng = np.random.default_rng(2)
+    thresholds = np.linspace(0.1, 0.9, 9)
+    counts = _make_counts(rng)
+    samples, thresh, overall = compute_pr_metrics(thresholds, *counts)
+
+    accumulator = PRMetricsAccumulator(thresholds, shape=(3,))
+    for i in rng.permutation(counts[0].shape[1]):
+        sample = accumulator.update(*(c[:, i] for c in counts))
+        for k in sample:
+            assert np.array_equal(sample[k], samples[k][:, i])
+    acc_thresh, acc_overall = accumulator.compute()
+    for k in thresh:
+        assert np.array_equal(acc_thresh[k], thresh[k])
+    for k in overall:
+        assert np.array_equal(acc_overall[k], overall[k])
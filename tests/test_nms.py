@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+import importlib
+import os.path as osp
+
+import numpy as np
+import pytest
+from PIL import Image
+from scipy import ndimage as ndi
+from scipy import signal
+
+from pyEdgeEval.common.multi_label import (
+    evaluate_boundaries_threshold,
+    rgb_multilabel_encoding,
+)
+from pyEdgeEval.common.multi_label.evaluate_sample import NMS_KWARGS
+from pyEdgeEval.common.utils import check_thresholds
+from pyEdgeEval.datasets import cityscapes
+
+from pyEdgeEval.preprocess import fast_nms, fast_nms_batch
+from pyEdgeEval.preprocess.nms.toolbox import conv_tri
+
+# NOTE: the module is shadowed by the function in `pyEdgeEval.preprocess.nms`
+nms_module = importlib.import_module("pyEdgeEval.preprocess.nms.fast_nms")
+
+BENCH_NAMES = ("2018", "3063", "5096", "6046", "8068")
+
+
+def _make_edges(seed, shape=(60, 80)):
+    rng = np.random.default_rng(seed)
+    img = ndi.gaussian_filter(rng.random(shape), 1.5)
+    img = (img - img.min()) / np.ptp(img)
+    # quantized like the predictions saved as png
+    return np.round(img * 255) / 255
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_fast_nms_native(monkeypatch, dtype):
+    """The fused kernel should give the same edges as the NumPy pipeline"""
+    for seed in range(5):
+        img = _make_edges(seed).astype(dtype)
+        out = fast_nms(img)
+        monkeypatch.setattr(nms_module, "_native_fast_nms", None)
+        expected = fast_nms(img)
+        monkeypatch.undo()
+
+        assert out.dtype == np.float64
+        assert out.shape == img.shape
+        # same taps and order of the sums
+        np.testing.assert_array_equal(out, expected)
+
+
+@pytest.mark.parametrize("native", [True, False])
+def test_fast_nms_baseline(monkeypatch, native):
+    """NMS of the bench predictions should match the stored outputs of the
+    original implementation"""
+    if not native:
+        monkeypatch.setattr(nms_module, "_native_fast_nms", None)
+        monkeypatch.setattr(nms_module, "_native_fast_nms_batch", None)
+    root = osp.join(osp.dirname(__file__), "..", "data", "BSDS500_bench")
+    baseline = np.load(osp.join(root, "nms_baseline.npz"))
+    for name in BENCH_NAMES:
+        pred = np.array(Image.open(osp.join(root, "png", f"{name}.png")))
+        np.testing.assert_array_equal(fast_nms(pred), baseline[name])
+        np.testing.assert_array_equal(
+            fast_nms(pred, half_prec=True), baseline[f"{name}_half_prec"]
+        )
+        np.testing.assert_array_equal(
+            fast_nms_batch(pred[None])[0], baseline[name]
+        )
+
+
+def test_fast_nms_half_prec():
+    """`half_prec` only computes the orientations in single precision"""
+    preds = np.stack([_make_edges(seed) for seed in range(2)])
+    for pred in preds:
+        expected = nms_module._fast_nms(pred, r=1, s=5, m=1.01, half_prec=True)
+        out = fast_nms(pred, half_prec=True)
+        assert out.dtype == np.float64
+        np.testing.assert_array_equal(out, expected)
+
+    expected = np.stack([fast_nms(pred, half_prec=True) for pred in preds])
+    np.testing.assert_array_equal(
+        fast_nms_batch(preds, half_prec=True), expected
+    )
+
+
+@pytest.mark.parametrize("native", [True, False])
+def test_fast_nms_batch(monkeypatch, native):
+    """The batch should give the same edges as `fast_nms` for each class"""
+    if not native:
+        monkeypatch.setattr(nms_module, "_native_fast_nms", None)
+        monkeypatch.setattr(nms_module, "_native_fast_nms_batch", None)
+    preds = np.stack([_make_edges(seed) for seed in range(4)])
+    expected = np.stack([fast_nms(pred) for pred in preds])
+
+    out = fast_nms_batch(preds)
+    assert out.dtype == np.float64
+    np.testing.assert_array_equal(out, expected)
+
+    # uint8
+    out = fast_nms_batch(np.round(preds * 255).astype(np.uint8))
+    np.testing.assert_array_equal(out, expected)
+
+    # in place
+    out = fast_nms_batch(preds, out=preds)
+    assert out is preds
+    np.testing.assert_array_equal(preds, expected)
+
+
+def test_evaluate_single_all_nms(tmp_path):
+    """NMS over all the classes should give the same results per class"""
+    num_classes = 5
+    edges = np.zeros((num_classes, 60, 80), dtype=np.uint8)
+    edges[0, 20, 10:70] = 1
+    edges[2, 10:50, 40] = 1
+    edges[4, 30:35, 5:60] = 1
+    edge_path = str(tmp_path / "edge.png")
+    Image.fromarray(rgb_multilabel_encoding(edges)).save(edge_path)
+    pred_paths = []
+    for i in range(num_classes):
+        pred = _make_edges(i)
+        pred_paths.append(str(tmp_path / f"pred_{i}.png"))
+        Image.fromarray(np.round(pred * 255).astype(np.uint8)).save(
+            pred_paths[-1]
+        )
+
+    categories = list(range(1, num_classes + 1))
+    kwargs = dict(
+        edge_path=edge_path,
+        seg_path=None,
+        scale=1.0,
+        max_dist=0.02,
+        thresholds=5,
+        apply_thinning=True,
+        apply_nms=True,
+        kill_internal=False,
+        num_classes=num_classes,
+    )
+    for skip_if_nonexistent in (True, False):
+        results = cityscapes._evaluate_single_all(
+            pred_paths=pred_paths,
+            categories=categories,
+            skip_if_nonexistent=skip_if_nonexistent,
+            **kwargs,
+        )
+        for i, (category, pred_path) in enumerate(zip(categories, pred_paths)):
+            # nms of a single prediction (`fast_nms`)
+            expected = evaluate_boundaries_threshold(
+                thresholds=check_thresholds(5),
+                pred=cityscapes.load_pred(pred_path, 60, 80),
+                gt=edges[category - 1],
+                gt_seg=None,
+                max_dist=0.02,
+                apply_thinning=True,
+                kill_internal=False,
+                skip_if_nonexistent=skip_if_nonexistent,
+                apply_nms=True,
+                nms_kwargs=NMS_KWARGS,
+            )
+            for result, _expected in zip(results, expected):
+                np.testing.assert_array_equal(result[i], _expected)
+
+
+def _conv_tri_direct(image, r):
+    """Triangle filter with an explicit kernel (the original implementation)"""
+    if r <= 1:
+        p = 12 / r / (r + 2) - 2
+        f = np.array([[1, p, 1]]) / (2 + p)
+        r = 1
+    else:
+        f = np.array([list(range(1, r + 1)) + [r + 1] + list(range(r, 0, -1))])
+        f = f / (r + 1) ** 2
+    f = f.astype(image.dtype)
+    image = np.pad(image, ((r, r), (r, r)), mode="symmetric")
+    return signal.convolve2d(signal.convolve2d(image, f, "valid"), f.T, "valid")
+
+
+@pytest.mark.parametrize("r", [0.5, 1, 2, 3, 4, 7])
+def test_conv_tri(r):
+    rng = np.random.default_rng(0)
+    for shape in ((32, 48), (3, 5)):
+        img = rng.random(shape)
+        # same products summed in the same order
+        expected = _conv_tri_direct(img, r)
+        np.testing.assert_array_equal(conv_tri(img, r), expected)
+
+        out = conv_tri(img.astype(np.float32), r)
+        assert out.dtype == np.float32
+        np.testing.assert_array_equal(
+            out, _conv_tri_direct(img.astype(np.float32), r)
+        )
+
+        # downsampling
+        np.testing.assert_array_equal(
+            conv_tri(img, r, s=2), expected[1::2, 1::2]
+        )
+
+        # running sums only differ by rounding
+        out = conv_tri(img, r, running_sums=True)
+        assert out.dtype == np.float64
+        np.testing.assert_allclose(out, expected, atol=1e-12)
+        out = conv_tri(img.astype(np.float32), r, running_sums=True)
+        assert out.dtype == np.float32
+        np.testing.assert_allclose(out, expected, atol=1e-6)
+
+
+def test_conv_tri_stack():
+    """A stack of images should be filtered like each image"""
+    rng = np.random.default_rng(0)
+    imgs = rng.random((3, 24, 40)).astype(np.float32)
+    for r in (1, 4):
+        out = conv_tri(imgs, r)
+        assert out.shape == imgs.shape
+        for img, _out in zip(imgs, out):
+            np.testing.assert_array_equal(_out, conv_tri(img, r))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import json
+import os.path as osp
+
+import numpy as np
+from PIL import Image
+from scipy import ndimage as ndi
+
+from pyEdgeEval.helpers.nms_predictions import (
+    PackedPredictions,
+    load_prediction,
+    nms_predictions,
+)
+from pyEdgeEval.preprocess import fast_nms
+
+
+def _make_preds(root, num=5, shape=(40, 50)):
+    names = []
+    for i in range(num):
+        rng = np.random.default_rng(i)
+        img = ndi.gaussian_filter(rng.random(shape), 1.5)
+        img = (img - img.min()) / np.ptp(img)
+        name = osp.join(f"city{i % 2}", f"img{i}")
+        path = osp.join(root, f"{name}.png")
+        (root / f"city{i % 2}").mkdir(parents=True, exist_ok=True)
+        Image.fromarray((img * 255).astype(np.uint8)).save(path)
+        names.append(name)
+    return names
+
+
+def test_nms_predictions_png(tmp_path):
+    pred_dir = tmp_path / "preds"
+    save_dir = tmp_path / "nms"
+    names = _make_preds(pred_dir)
+
+    assert nms_predictions(str(pred_dir), str(save_dir)) == len(names)
+    for name in names:
+        pred = load_prediction(osp.join(pred_dir, f"{name}.png"))
+        out = load_prediction(osp.join(save_dir, f"{name}.png"))
+        np.testing.assert_array_equal(out, fast_nms(pred, return_as_uint8=True))
+
+    # finished predictions are skipped
+    assert nms_predictions(str(pred_dir), str(save_dir)) == 0
+    (save_dir / f"{names[0]}.png").unlink()
+    assert nms_predictions(str(pred_dir), str(save_dir)) == 1
+
+
+def test_nms_predictions_packed(tmp_path):
+    pred_dir = tmp_path / "preds"
+    save_dir = tmp_path / "packed"
+    names = _make_preds(pred_dir)
+
+    # interrupted run: only the first shards were written
+    nms_predictions(str(pred_dir / "city0"), str(save_dir), packed=True)
+    packed = PackedPredictions(str(save_dir))
+    assert len(packed) == 3
+    packed.close()
+
+    num = nms_predictions(
+        str(pred_dir),
+        str(save_dir),
+        packed=True,
+        shard_size=2,
+        nproc=2,
+        backend="thread",
+    )
+    # the names are relative to `pred_dir`, so city0 is processed again
+    assert num == len(names)
+    with open(save_dir / "index.json") as f:
+        index = json.load(f)
+    assert len(index["shards"]) == 1 + 3
+
+    packed = PackedPredictions(str(save_dir))
+    for name in names:
+        assert name in packed
+        pred = load_prediction(osp.join(pred_dir, f"{name}.png"))
+        np.testing.assert_array_equal(
+            packed[name], fast_nms(pred, return_as_uint8=True)
+        )
+    packed.close()
+
+    assert nms_predictions(str(pred_dir), str(save_dir), packed=True) == 0
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+from PIL import Image
+from scipy import ndimage as ndi
+
+from pyEdgeEval.common.multi_label import evaluate_boundaries_threshold
+from pyEdgeEval.common.multi_label.evaluate_sample import NMS_KWARGS
+from pyEdgeEval.common.utils import check_thresholds
+from pyEdgeEval.datasets import otf_cityscapes
+from pyEdgeEval.datasets.cityscapes import load_pred
+from pyEdgeEval.datasets.cityscapes_attributes import (
+    CITYSCAPES_labelIds,
+    CITYSCAPES_label2trainId,
+    CITYSCAPES_inst_labelIds,
+)
+from pyEdgeEval.utils import mask2onehot, mask_label2trainId
+
+
+def _make_sample(seed, shape=(96, 128)):
+    """Random label map (with ignored labels) and instance map"""
+    rng = np.random.default_rng(seed)
+    h, w = shape
+    seg = np.zeros(shape, dtype=np.uint8)
+    labels = [0, 2, 3, 7, 8, 11, 21, 23, 24, 26, 33]
+    for _ in range(40):
+        y, x = rng.integers(0, h), rng.integers(0, w)
+        dy, dx = rng.integers(5, 40, size=2)
+        seg[y : y + dy, x : x + dx] = rng.choice(labels)
+    inst = seg.astype(np.int32)
+    for label in (24, 26, 33):
+        components, num = ndi.label(seg == label)
+        for k in range(num):
+            inst[components == k + 1] = label * 1000 + k
+    return seg, inst
+
+
+@pytest.mark.parametrize("radius", [1, 2])
+def test_all_labels_mask2edge(radius):
+    """All the classes at once should give the same edges per label"""
+    seg, inst = _make_sample(0)
+    onehot = mask2onehot(seg, labels=CITYSCAPES_labelIds)
+    args = dict(
+        label2trainId=CITYSCAPES_label2trainId,
+        ignore_indices=[2, 3],
+        radius=radius,
+    )
+    edge = otf_cityscapes.all_labels_mask2edge(seg, **args)
+    isedge = otf_cityscapes.all_labels_mask2edge(
+        seg, inst_mask=inst, inst_labelIds=CITYSCAPES_inst_labelIds, **args
+    )
+    for label, trainId in CITYSCAPES_label2trainId.items():
+        expected = otf_cityscapes.one_label_mask2edge(
+            label, onehot, [2, 3], radius
+        )
+        np.testing.assert_array_equal(edge[trainId], expected)
+        expected = otf_cityscapes.one_label_instance_mask2edge(
+            label, onehot, inst, CITYSCAPES_inst_labelIds, [2, 3], radius
+        )
+        np.testing.assert_array_equal(isedge[trainId], expected)
+
+
+def _expected_counts(seg_path, inst_path, pred_path, category, **kwargs):
+    """Per-category GT generation (one-hot labels) and evaluation"""
+    seg_label = Image.open(seg_path)
+    w, h = seg_label.size
+    size = (int(w * 0.5 + 0.5), int(h * 0.5 + 0.5))
+    seg_label = np.array(seg_label.resize(size, Image.Resampling.NEAREST))
+    onehot = mask2onehot(seg_label, labels=CITYSCAPES_labelIds)
+    label = {v: k for k, v in CITYSCAPES_label2trainId.items()}[category - 1]
+    if inst_path:
+        inst = Image.open(inst_path).resize(size, Image.Resampling.NEAREST)
+        edge = otf_cityscapes.one_label_instance_mask2edge(
+            label, onehot, np.array(inst), CITYSCAPES_inst_labelIds, [2, 3], 2
+        )
+    else:
+        edge = otf_cityscapes.one_label_mask2edge(label, onehot, [2, 3], 2)
+    seg = mask_label2trainId(seg_label, CITYSCAPES_label2trainId)
+    return evaluate_boundaries_threshold(
+        thresholds=check_thresholds(kwargs["thresholds"]),
+        pred=load_pred(pred_path, size[1], size[0]),
+        gt=edge,
+        gt_seg=seg == category - 1,
+        max_dist=kwargs["max_dist"],
+        apply_thinning=kwargs["apply_thinning"],
+        kill_internal=kwargs["kill_internal"],
+        skip_if_nonexistent=kwargs["skip_if_nonexistent"],
+        apply_nms=kwargs["apply_nms"],
+        nms_kwargs=NMS_KWARGS,
+    )
+
+
+@pytest.mark.parametrize("instance_sensitive", [True, False])
+def test_evaluate_single_all(tmp_path, instance_sensitive):
+    """All the categories should give the same results as one by one"""
+    seg, inst = _make_sample(1)
+    seg_path = str(tmp_path / "seg.png")
+    inst_path = str(tmp_path / "inst.png")
+    Image.fromarray(seg).save(seg_path)
+    Image.fromarray(inst.astype(np.uint16)).save(inst_path)
+
+    rng = np.random.default_rng(1)
+    categories = list(range(1, 20))
+    pred_paths = []
+    for category in categories:
+        pred = ndi.gaussian_filter(rng.random(seg.shape), 2)
+        pred = (pred - pred.min()) / np.ptp(pred)
+        pred_path = str(tmp_path / f"pred_{category}.png")
+        Image.fromarray((pred * 255).astype(np.uint8)).save(pred_path)
+        pred_paths.append(pred_path)
+
+    kwargs = dict(
+        seg_path=seg_path,
+        inst_path=inst_path if instance_sensitive else None,
+        scale=0.5,
+        max_dist=0.02,
+        thresholds=5,
+        apply_thinning=True,
+        apply_nms=not instance_sensitive,
+        kill_internal=not instance_sensitive,
+        skip_if_nonexistent=not instance_sensitive,
+        radius=2,
+    )
+
+    otf_cityscapes.clear_otf_sample_cache()
+    results = otf_cityscapes._evaluate_single_all(
+        pred_paths=pred_paths, categories=categories, **kwargs
+    )
+    # the GTs of the sample are generated once
+    sample = otf_cityscapes.load_otf_sample(
+        seg_path, kwargs["inst_path"], scale=0.5, radius=2
+    )
+    assert sample.edge.shape == (19, 48, 64)
+    for i, category in enumerate(categories):
+        expected = _expected_counts(
+            pred_path=pred_paths[i], category=category, **kwargs
+        )
+        for result, value in zip(results, expected):
+            np.testing.assert_array_equal(result[i], value)
+    assert (
+        otf_cityscapes.load_otf_sample(
+            seg_path, kwargs["inst_path"], scale=0.5, radius=2
+        )
+        is sample
+    )
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from pyEdgeEval.common.multi_label import (
+    PackedEdge,
+    decode_png,
+    load_packed_edge,
+    load_scaled_edge,
+    rgb_multilabel_encoding,
+)
+from pyEdgeEval.common.cache import MemoryLRU
+
+
+def test_packed_edge(tmp_path):
+    """Packed edges should decode to the same maps as `decode_png`"""
+    rng = np.random.default_rng(0)
+    num_classes = 19
+    edges = (rng.random((num_classes, 30, 40)) < 0.05).astype(np.uint8)
+    edges[[3, 17]] = 0  # classes without edges
+    edge_path = str(tmp_path / "edge.png")
+    Image.fromarray(rgb_multilabel_encoding(edges)).save(edge_path)
+
+    for scale in (1.0, 0.5):
+        edge, _ = load_scaled_edge(edge_path, scale)
+        expected = decode_png(edge, num_classes)
+        packed = load_packed_edge(edge_path, scale, num_classes)
+        assert packed.shape == expected.shape
+        assert packed.nbytes < expected.nbytes
+        for cat_idx in range(num_classes):
+            assert np.array_equal(packed[cat_idx], expected[cat_idx])
+        assert np.array_equal(packed.present(), expected.any(axis=(1, 2)))
+        # cached per process
+        assert load_packed_edge(edge_path, scale, num_classes) is packed
+
+    assert np.array_equal(
+        PackedEdge.from_png(
+            rgb_multilabel_encoding(edges), num_classes
+        ).decode(),
+        edges,
+    )
+
+
+def test_packed_edge_cache_threads():
+    """The LRU should stay consistent when shared by threads (with evictions)"""
+    edges = [
+        PackedEdge.from_words(np.full((4, 4), i + 1), num_classes=8)
+        for i in range(8)
+    ]
+    cache = MemoryLRU(max_bytes=4 * edges[0].nbytes)
+
+    def work(seed):
+        rng = random.Random(seed)
+        for _ in range(50000):
+            key = rng.randrange(len(edges))
+            edge = cache.get(key)
+            if edge is None:
+                cache.put(key, edges[key])
+            else:
+                assert edge is edges[key]
+
+    # switch threads as often as possible to expose races
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(work, range(8)))
+    finally:
+        sys.setswitchinterval(interval)
+
+    entries = list(cache._entries.values())
+    assert cache.nbytes == sum(edge.nbytes for edge in entries)
+    assert cache.nbytes <= cache.max_bytes
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import os
+
+import numpy as np
+
+from pyEdgeEval.common.binary_label import calculate_metrics
+from pyEdgeEval.utils import WorkerPool
+
+
+def _eval_single(sample):
+    rng = np.random.default_rng(sample["seed"])
+    sum_r = np.full(5, 20.0)
+    count_r = rng.integers(0, 20, 5).astype(float)
+    sum_p = rng.integers(0, 30, 5).astype(float)
+    count_p = np.minimum(sum_p, rng.integers(0, 30, 5))
+    return count_r, sum_r, count_p, sum_p
+
+
+def _worker_pid(_):
+    return os.getpid()
+
+
+def test_worker_pool_reuse():
+    """The same workers should be reused across evaluations"""
+    samples = [dict(name=str(i), seed=i) for i in range(8)]
+    expected = calculate_metrics(_eval_single, 5, samples, nproc=1)
+
+    with WorkerPool(2) as pool:
+        pids = set(pool.imap(_worker_pid, range(8)))
+        for _ in range(2):
+            results = calculate_metrics(
+                _eval_single, 5, samples, nproc=2, pool=pool
+            )
+            assert results == expected
+        pids |= set(pool.imap(_worker_pid, range(8)))
+        # no new workers were spawned
+        assert len(pids) <= 2
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+from scipy import ndimage as ndi
+
+from pyEdgeEval.preprocess import binary_thin_sweep
+from pyEdgeEval.preprocess.thin import thin
+
+
+@pytest.mark.parametrize("native", [True, False])
+def test_binary_thin_sweep(monkeypatch, native):
+    """The sweep should give the same maps as thinning each threshold"""
+    if not native:
+        # use the NumPy implementation of the sweep
+        monkeypatch.setattr(thin, "_native_binary_thin", None)
+    rng = np.random.default_rng(0)
+    thresholds = np.linspace(1.0 / 100, 1.0 - 1.0 / 100, 99)
+    for sigma in (0.5, 1.0, 2.0):
+        pred = ndi.gaussian_filter(rng.random((48, 64)), sigma)
+        pred = (pred - pred.min()) / np.ptp(pred)
+        for thresh, thinned in zip(
+            thresholds, binary_thin_sweep(pred, thresholds)
+        ):
+            expected = thin._binary_thin_lut(pred >= thresh)
+            assert thinned.dtype == bool
+            assert np.array_equal(thinned, expected.astype(bool))
+
+    # small blobs (at the borders) and empty maps
+    pred = np.zeros((48, 64))
+    pred[:6, 50:] = 0.9
+    pred[20:30, 10:18] = 0.5
+    for thresh, thinned in zip(
+        (0.4, 0.8, 1.0), binary_thin_sweep(pred, (0.4, 0.8, 1.0))
+    ):
+        expected = thin._binary_thin_lut(pred >= thresh)
+        assert np.array_equal(thinned, expected.astype(bool))
+
+
+def test_binary_thin_native():
+    """The compiled implementation should match the NumPy implementation"""
+    from pyEdgeEval._lib.thin import binary_thin as native_binary_thin
+
+    rng = np.random.default_rng(2)
+    for i in range(20):
+        pred = ndi.gaussian_filter(rng.random((40, 56)), 0.5 + i / 10)
+        mask = pred >= np.quantile(pred, i / 20)
+        for max_iter in (None, 1, 2, 3):
+            expected = thin._binary_thin_lut(mask, max_iter=max_iter)
+            thinned = native_binary_thin(mask, max_iter=max_iter)
+            assert thinned.dtype == bool
+            assert np.array_equal(thinned, expected.astype(bool))
+
+        # in place on a uint8 buffer
+        buf = mask.astype(np.uint8) * 255
+        native_binary_thin(buf, inplace=True)
+        assert np.array_equal(buf, thin._binary_thin_lut(mask).astype(np.uint8))
+
+    # thick blobs (many sub-iterations with few candidates each)
+    mask = ndi.gaussian_filter(rng.random((120, 160)), 8.0)
+    mask = mask >= np.median(mask)
+    assert np.array_equal(
+        native_binary_thin(mask), thin._binary_thin_lut(mask).astype(bool)
+    )
+
+
+def test_binary_thin_sweep_fortran_order():
+    """Fortran-ordered inputs (e.g. from `nms`) should be thinned too"""
+    rng = np.random.default_rng(2)
+    pred = ndi.gaussian_filter(rng.random((40, 56)), 1.0)
+    thresholds = np.quantile(pred, [0.2, 0.5, 0.8])
+    for thinned, expected in zip(
+        binary_thin_sweep(np.asfortranarray(pred), thresholds),
+        binary_thin_sweep(pred, thresholds),
+    ):
+        assert np.array_equal(thinned, expected)